@@ -4,7 +4,7 @@ import os
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
 # Standard Flask Konfiguration (kann in instance/config.py überschrieben werden)
-DEBUG = True
+DEBUG = True # Mit eingebetteten Managern ohne Reloader (siehe run.py)
 HOST = '0.0.0.0'
 PORT = 5000
 # UNBEDINGT ÄNDERN! Muss ein langer, zufälliger String sein.
@@ -13,10 +13,113 @@ SECRET_KEY = 'default_secret_key_please_change_in_instance_config_very_long_and_
 PERMANENT_SESSION_LIFETIME = 60 * 60 * 24 * 7 # 7 Tage
 
 # Verzeichnisse und Dateien
-SERVER_CONFIG_FILE = os.path.join(BASE_DIR, 'servers.json')
+SERVER_CONFIG_FILE = os.path.join(BASE_DIR, 'servers.json') # Alt: wird beim ersten Start in SERVER_STATE_DB übernommen
+SERVER_STATE_DB = os.path.join(BASE_DIR, 'panel_state.db') # SQLite (WAL) mit der Serverkonfiguration
+STATE_FLUSH_DELAY = 0.5 # Sekunden, in denen Konfigurationsänderungen gesammelt und dann gemeinsam committet werden
 SERVER_INSTANCES_DIR = os.path.join(BASE_DIR, 'servers')
 SERVER_JARS_DIR = os.path.join(BASE_DIR, 'server_jars')
 
+# Ressourcen-Sampler: Abstand (Sekunden) zwischen zwei CPU/RAM-Messungen aller Serverprozesse
+RESOURCE_SAMPLE_INTERVAL = 2.0
+
+# Anzahl Konsolenzeilen, die pro Server im Speicher gehalten werden (Scrollback)
+CONSOLE_BUFFER_LINES = 1000
+# Live-Konsole (Server-Sent Events): max. wartende Zeilen pro Zuschauer, bevor neu synchronisiert wird
+CONSOLE_STREAM_QUEUE_SIZE = 500
+# Sekunden ohne Ausgabe, nach denen ein Keepalive an die Zuschauer geht
+CONSOLE_STREAM_HEARTBEAT = 15
+
+# Persistentes Konsolen-Log pro Instanz (<instanz>/.panel/console/console.log)
+CONSOLE_LOG_MAX_BYTES = 50 * 1024 * 1024 # Rotation ab dieser Größe
+CONSOLE_LOG_BACKUPS = 10 # Anzahl rotierter Dateien, die behalten werden
+CONSOLE_LOG_INDEX_INTERVAL = 64 * 1024 # Ein Zeitstempel/Offset-Indexeintrag etwa alle N Bytes
+
+# Hintergrundaufträge (Start/Stop/Löschen): Anzahl Worker-Threads und gemerkte abgeschlossene Aufträge
+JOB_WORKERS = 4
+JOB_HISTORY_LIMIT = 200
+
+# Massenstart/-stopp: Standard für gleichzeitig hochfahrende Server und wie lange (Sekunden)
+# auf die "Done (...)!"-Zeile gewartet wird, bevor der nächste Server an die Reihe kommt
+BULK_MAX_PARALLEL = 2
+BULK_READY_TIMEOUT = 300
+
+# JAR-Uploads: maximale Dateigröße, Größe der Teilstücke beim fortsetzbaren Upload und
+# nach wie vielen Sekunden unfertige Uploads verworfen werden
+JAR_MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+JAR_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+JAR_UPLOAD_STALE_SECONDS = 24 * 3600
+
+# Gelöschte Instanzen werden in SERVER_INSTANCES_DIR/.trash verschoben und im Hintergrund
+# entfernt: höchstens so viele Dateien pro Sekunde, mit diesem nice-Wert (und I/O-Priorität idle)
+TRASH_UNLINKS_PER_SECOND = 2000
+TRASH_REAPER_NICE = 19
+
+# Backups: inhaltsadressierter Objektspeicher + ein Manifest pro Snapshot
+BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
+BACKUP_WORKERS = 2 # Prozesse für Hashen/Komprimieren
+BACKUP_COMPRESSION_LEVEL = 6 # zlib 1-9 (Region-Chunks sind schon komprimiert und werden roh gespeichert)
+BACKUP_EXCLUDE = ['.panel', 'server.jar', 'cache', 'libraries', 'versions', 'logs'] # Einträge im Instanzordner, die nie gesichert werden
+BACKUP_FLUSH_TIMEOUT = 120 # Sekunden, die auf "Saved the game" nach save-all flush gewartet wird
+BACKUP_KEEP_LAST = 10 # Aufbewahrung: die neuesten N Backups ...
+BACKUP_KEEP_DAILY = 7 # ... plus je eines pro Tag für die letzten N Tage
+
+# RCON für Konsolenbefehle (mit Antwort); Port und Passwort werden pro Instanz erzeugt,
+# verbunden wird nur über 127.0.0.1. Ohne erreichbares RCON gehen Befehle über stdin.
+RCON_ENABLED = True
+RCON_PORT_BASE = 35565 # Erster vergebener RCON-Port
+RCON_POOL_SIZE = 2 # Offene Verbindungen pro Server
+RCON_TIMEOUT = 5.0 # Sekunden für Verbindungsaufbau und Antworten
+
+# Leistungsverlauf (TPS, MSPT, Spieler, CPU, RAM) pro Server in <instanz>/.panel/history.bin
+PERF_SAMPLE_INTERVAL = 1.0 # Sekunden zwischen zwei Punkten im Sekunden-Verlauf
+PERF_POLL_INTERVAL = 5.0 # Sekunden zwischen zwei RCON-Abfragen (tps/mspt bzw. tick query und list)
+HISTORY_PERSIST_INTERVAL = 60 # Sekunden zwischen zwei Sicherungen des Verlaufs auf die Platte
+
+# Server List Ping: alle konfigurierten Ports werden gleichzeitig abgefragt (Status "ready"/"unresponsive")
+SLP_POLL_INTERVAL = 5.0 # Sekunden zwischen zwei Abfragerunden
+SLP_TIMEOUT = 3.0 # Sekunden pro Abfrage
+SLP_UNRESPONSIVE_AFTER = 3 # Fehlgeschlagene Abfragen in Folge, ab denen ein laufender Server als "unresponsive" gilt
+
+# Ressourcen-Limits pro Server (CPU-Quota, Speicherobergrenze, IO-Gewicht) über cgroup v2.
+# CGROUP_ROOT: delegierter Teilbaum, in dem das Panel mc-<server>-cgroups anlegen darf
+# (z.B. per systemd Delegate=yes). None = eigene cgroup des Panels; das Panel zieht dann in "panel" um.
+# Das CPU-Set (Affinität) funktioniert auch ohne cgroups.
+CGROUP_ENABLED = True
+CGROUP_ROOT = None
+
+# Zulassung von Starts: Ein Server zählt mit ram_max plus JVM-Overhead
+# (max(CAPACITY_JVM_OVERHEAD_MIN, ram_max * CAPACITY_JVM_OVERHEAD_RATIO)) bzw. mit seiner Speicherobergrenze.
+# Gestartet wird nur, solange alle Zusagen unter Host-Speicher minus CAPACITY_HEADROOM bleiben.
+# CAPACITY_HOST_MEMORY: None = erkannter Arbeitsspeicher, sonst z.B. "32G".
+CAPACITY_HOST_MEMORY = None
+CAPACITY_HEADROOM = '2G' # Für Betriebssystem, Panel und Page-Cache
+CAPACITY_JVM_OVERHEAD_RATIO = 0.25
+CAPACITY_JVM_OVERHEAD_MIN = '512M'
+ADMISSION_QUEUE_TIMEOUT = 300 # Sekunden, die ein eingereihter Start auf freien Speicher wartet (0 = sofort ablehnen)
+GAME_PORT_BASE = 25565 # Erster Port für automatisch vergebene Spielports
+
+# Ruhezustand: Server mit Ruhezeit (pro Server in der Konsole, Minuten ohne Spieler) werden gestoppt.
+# Ein Platzhalter auf ihrem Port beantwortet Statusanfragen mit HIBERNATE_MOTD und startet sie beim ersten Login.
+HIBERNATE_CHECK_INTERVAL = 30.0 # Sekunden zwischen zwei Prüfungen der Spielerzahl
+HIBERNATE_BIND_HOST = '' # Adresse des Platzhalters ('' = alle, wie server-ip leer)
+HIBERNATE_MOTD = 'Server schläft – zum Aufwecken verbinden'
+
+# Server unter einem losgelösten Aufpasser starten (nur Unix): PID-Datei, Konsolen-Socket und
+# Ausgabepuffer liegen in <instanz>/.panel; ein neu gestartetes Panel übernimmt laufende Server.
+SUPERVISOR_ENABLED = True
+SUPERVISOR_BUFFER_BYTES = 1024 * 1024 # Ausgabe, die ohne verbundenes Panel zwischengespeichert wird
+
+# Betriebsart: 'embedded' = die Manager laufen im Flask-Prozess (nur ein Prozess, z.B. python run.py).
+# 'client' = ein einzelner Steuerdienst (python control.py) besitzt alle Serverprozesse, die Web-Worker
+# (z.B. gunicorn -w 4 -k gthread --threads 8 'run:app') sind zustandslos und sprechen ihn über CONTROL_SOCKET an.
+CONTROL_MODE = 'embedded'
+CONTROL_SOCKET = os.path.join(BASE_DIR, 'control.sock') # Nur für den Panel-Benutzer lesbar
+CONTROL_TIMEOUT = 60.0 # Sekunden, die ein Web-Worker höchstens auf eine Antwort wartet
+
+# /metrics (Prometheus-Textformat): mit Token per "Authorization: Bearer <Token>" abrufbar,
+# ohne Token nur mit angemeldeter Sitzung. Am besten in instance/config.py setzen.
+METRICS_TOKEN = None
+
 # Standard-Benutzer (MUSS in instance/config.py überschrieben/ergänzt werden)
 USERNAME = "admin_default" # Dieser Wert sollte nie verwendet werden
 PASSWORD_HASH = "hash_me_in_instance_config" # Dieser Wert sollte nie verwendet werden
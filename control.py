@@ -0,0 +1,25 @@
+# control.py
+import signal
+import sys
+
+from mc_panel import create_control_daemon
+
+
+def _exit_on_sigterm(signum, frame):
+    sys.exit(0) # SystemExit statt Abbruch, damit atexit-Handler (Zustand, Verlauf) noch laufen
+
+
+if __name__ == '__main__':
+    # Steuerdienst für CONTROL_MODE = 'client': genau einmal starten, danach beliebig viele Web-Worker.
+    # Laufende Server überleben einen Neustart des Dienstes (SUPERVISOR_ENABLED) und werden wieder übernommen.
+    try:
+        daemon = create_control_daemon()
+    except OSError as e:
+        print(f"FEHLER: {e}")
+        sys.exit(1)
+    signal.signal(signal.SIGTERM, _exit_on_sigterm)
+    print(f"INFO: Steuerdienst lauscht auf {daemon.socket_path}")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,11 +1,17 @@
 # mc_panel/__init__.py
-from flask import Flask, g, session, redirect, url_for, request, flash, current_app
+from flask import Flask, Response, g, session, redirect, url_for, request, flash, current_app
 from functools import wraps
 import os
+import time
 
 # Globale Manager-Instanzen (werden in create_app initialisiert)
 jar_manager = None
 server_manager = None
+request_metrics = None # Latenz-Histogramme der Panel-Routen (für /metrics)
+
+# Attribute, die Web-Worker im Client-Modus direkt lesen (alles andere sind Methodenaufrufe).
+# Keine ganzen Dicts wie servers: die enthielten u.a. RCON-Passwörter und gingen bei jedem Zugriff über den Socket.
+CONTROL_ATTRIBUTES = {'server': ('game_port_base',)}
 
 def login_required(f):
     """
@@ -22,14 +28,7 @@ def login_required(f):
     return decorated_function
 
 
-def create_app():
-    """
-    Factory-Funktion für die Flask-Anwendung.
-    """
-    global jar_manager, server_manager
-
-    app = Flask(__name__, instance_relative_config=True)
-
+def _load_config(app):
     # Lade Standardkonfiguration aus config.py im Hauptverzeichnis
     app.config.from_object('config')
 
@@ -43,10 +42,16 @@ def create_app():
         print("Bitte erstelle instance/config.py mit SECRET_KEY, USERNAME und PASSWORD_HASH.")
 
 
+def create_managers(app):
+    """
+    Erzeugt JarManager und ServerManager aus der Konfiguration. Läuft entweder
+    eingebettet in create_app (CONTROL_MODE = 'embedded') oder einmalig im
+    Steuerdienst (control.py), nie in mehreren Web-Workern gleichzeitig.
+    :return: (jar_manager, server_manager)
+    """
     # Stelle sicher, dass die notwendigen Verzeichnisse existieren
     os.makedirs(app.config['SERVER_INSTANCES_DIR'], exist_ok=True)
     os.makedirs(app.config['SERVER_JARS_DIR'], exist_ok=True)
-    os.makedirs(os.path.join(app.root_path, 'static'), exist_ok=True) # Für static Ordner
 
     # Importiere Manager erst hier, NACHDEM die Konfiguration geladen wurde,
     # da sie Pfade aus app.config verwenden könnten.
@@ -54,17 +59,136 @@ def create_app():
     from .managers.server_manager import ServerManager
 
     # Initialisiere die Manager mit Pfaden aus der App-Konfiguration
-    # Diese Instanzen werden dann von den Blueprints importiert
-    jar_manager_instance = JarManager(app.config['SERVER_JARS_DIR'])
+    jar_manager_instance = JarManager(
+        app.config['SERVER_JARS_DIR'],
+        max_upload_bytes=app.config.get('JAR_MAX_UPLOAD_BYTES', 512 * 1024 * 1024),
+        upload_chunk_size=app.config.get('JAR_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024),
+        upload_stale_seconds=app.config.get('JAR_UPLOAD_STALE_SECONDS', 24 * 3600)
+    )
     server_manager_instance = ServerManager(
         config_file=app.config['SERVER_CONFIG_FILE'],
+        state_db=app.config.get('SERVER_STATE_DB'),
+        state_flush_delay=app.config.get('STATE_FLUSH_DELAY', 0.5),
         instances_dir=app.config['SERVER_INSTANCES_DIR'],
-        jars_dir=app.config['SERVER_JARS_DIR']
+        jars_dir=app.config['SERVER_JARS_DIR'],
+        resource_sample_interval=app.config.get('RESOURCE_SAMPLE_INTERVAL', 2.0),
+        console_buffer_lines=app.config.get('CONSOLE_BUFFER_LINES', 1000),
+        console_stream_queue_size=app.config.get('CONSOLE_STREAM_QUEUE_SIZE', 500),
+        console_stream_heartbeat=app.config.get('CONSOLE_STREAM_HEARTBEAT', 15),
+        console_log_max_bytes=app.config.get('CONSOLE_LOG_MAX_BYTES', 50 * 1024 * 1024),
+        console_log_backups=app.config.get('CONSOLE_LOG_BACKUPS', 10),
+        console_log_index_interval=app.config.get('CONSOLE_LOG_INDEX_INTERVAL', 64 * 1024),
+        job_workers=app.config.get('JOB_WORKERS', 4),
+        job_history_limit=app.config.get('JOB_HISTORY_LIMIT', 200),
+        bulk_max_parallel=app.config.get('BULK_MAX_PARALLEL', 2),
+        bulk_ready_timeout=app.config.get('BULK_READY_TIMEOUT', 300),
+        jar_manager=jar_manager_instance,
+        trash_unlinks_per_second=app.config.get('TRASH_UNLINKS_PER_SECOND', 2000),
+        trash_reaper_nice=app.config.get('TRASH_REAPER_NICE', 19),
+        backup_dir=app.config.get('BACKUP_DIR'),
+        backup_workers=app.config.get('BACKUP_WORKERS', 2),
+        backup_compression_level=app.config.get('BACKUP_COMPRESSION_LEVEL', 6),
+        backup_exclude=app.config.get('BACKUP_EXCLUDE', ['.panel', 'server.jar', 'cache', 'libraries', 'versions', 'logs']),
+        backup_flush_timeout=app.config.get('BACKUP_FLUSH_TIMEOUT', 120),
+        rcon_enabled=app.config.get('RCON_ENABLED', True),
+        rcon_port_base=app.config.get('RCON_PORT_BASE', 35565),
+        rcon_pool_size=app.config.get('RCON_POOL_SIZE', 2),
+        rcon_timeout=app.config.get('RCON_TIMEOUT', 5.0),
+        perf_sample_interval=app.config.get('PERF_SAMPLE_INTERVAL', 1.0),
+        perf_poll_interval=app.config.get('PERF_POLL_INTERVAL', 5.0),
+        history_persist_interval=app.config.get('HISTORY_PERSIST_INTERVAL', 60),
+        slp_poll_interval=app.config.get('SLP_POLL_INTERVAL', 5.0),
+        slp_timeout=app.config.get('SLP_TIMEOUT', 3.0),
+        slp_unresponsive_after=app.config.get('SLP_UNRESPONSIVE_AFTER', 3),
+        cgroup_enabled=app.config.get('CGROUP_ENABLED', True),
+        cgroup_root=app.config.get('CGROUP_ROOT'),
+        game_port_base=app.config.get('GAME_PORT_BASE', 25565),
+        capacity_host_memory=app.config.get('CAPACITY_HOST_MEMORY'),
+        capacity_headroom=app.config.get('CAPACITY_HEADROOM', '2G'),
+        capacity_overhead_ratio=app.config.get('CAPACITY_JVM_OVERHEAD_RATIO', 0.25),
+        capacity_overhead_min=app.config.get('CAPACITY_JVM_OVERHEAD_MIN', '512M'),
+        admission_queue_timeout=app.config.get('ADMISSION_QUEUE_TIMEOUT', 300),
+        hibernate_check_interval=app.config.get('HIBERNATE_CHECK_INTERVAL', 30.0),
+        hibernate_bind_host=app.config.get('HIBERNATE_BIND_HOST', ''),
+        hibernate_motd=app.config.get('HIBERNATE_MOTD'),
+        supervisor_enabled=app.config.get('SUPERVISOR_ENABLED', True),
+        supervisor_buffer_bytes=app.config.get('SUPERVISOR_BUFFER_BYTES', 1024 * 1024)
     )
+    return jar_manager_instance, server_manager_instance
+
+
+def create_control_daemon():
+    """
+    Steuerdienst für CONTROL_MODE = 'client': besitzt die einzigen Manager-Instanzen
+    (und damit alle Serverprozesse) und bedient die Web-Worker über CONTROL_SOCKET.
+    :raises OSError: wenn auf CONTROL_SOCKET schon ein Steuerdienst lauscht
+    """
+    app = Flask(__name__, instance_relative_config=True)
+    _load_config(app)
+    from .managers.control import ControlServer
+    control = ControlServer(app.config['CONTROL_SOCKET'], {}, attributes=CONTROL_ATTRIBUTES)
+    # Vor den Managern binden: ein zweiter Dienst darf die laufenden Server nicht ebenfalls übernehmen
+    control.bind()
+    jar_manager_instance, server_manager_instance = create_managers(app)
+    from .utils.metrics import RequestMetrics
+    # Latenzen aller Web-Worker an einer Stelle, sonst zählte jeder Scrape nur den zufällig getroffenen Worker
+    control.targets.update({'server': server_manager_instance, 'jar': jar_manager_instance,
+                            'metrics': RequestMetrics()})
+    return control
+
+
+def create_app():
+    """
+    Factory-Funktion für die Flask-Anwendung.
+    """
+    global jar_manager, server_manager, request_metrics
+
+    app = Flask(__name__, instance_relative_config=True)
+
+    _load_config(app)
+    os.makedirs(os.path.join(app.root_path, 'static'), exist_ok=True) # Für static Ordner
+
+    # Diese Instanzen werden dann von den Blueprints importiert
+    if app.config.get('CONTROL_MODE', 'embedded') == 'client':
+        # Zustandsloser Web-Worker: alle Aufrufe gehen an den Steuerdienst (control.py)
+        from .managers.control import ControlClient
+        control_client = ControlClient(app.config['CONTROL_SOCKET'], timeout=app.config.get('CONTROL_TIMEOUT', 60.0))
+        jar_manager_instance = control_client.manager('jar')
+        server_manager_instance = control_client.manager('server')
+        request_metrics_instance = control_client.manager('metrics') # observe() geht an den Steuerdienst
+    else:
+        jar_manager_instance, server_manager_instance = create_managers(app)
+        from .utils.metrics import RequestMetrics
+        request_metrics_instance = RequestMetrics()
 
     # Die globalen Variablen im Modul setzen
     globals()['jar_manager'] = jar_manager_instance
     globals()['server_manager'] = server_manager_instance
+    globals()['request_metrics'] = request_metrics_instance
+
+    from .managers.control import ControlUnavailable
+
+    @app.errorhandler(ControlUnavailable)
+    def _control_unavailable(error):
+        print(f"FEHLER: {error}")
+        return Response("Steuerdienst nicht erreichbar, bitte später erneut versuchen.\n", status=503,
+                        mimetype='text/plain')
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request_latency(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            # Routen-Regel statt URL, sonst entsteht pro Server eine eigene Zeitreihe
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            try:
+                request_metrics.observe(route, request.method, response.status_code, time.perf_counter() - started)
+            except ControlUnavailable: # Die Antwort selbst soll daran nicht scheitern
+                pass
+        return response
 
     # Blueprints registrieren
     from .blueprints.main_bp import main_bp
@@ -1,14 +1,18 @@
 # mc_panel/blueprints/jar_bp.py
-from flask import Blueprint, request, redirect, url_for, flash, render_template, current_app
+import re
+from flask import Blueprint, request, redirect, url_for, flash, render_template, current_app, jsonify
 from mc_panel import jar_manager, login_required # Globale Instanz und Decorator
 
 jar_bp = Blueprint('jar', __name__) # url_prefix='/jar' wird in __init__.py gesetzt
 
+CONTENT_RANGE_PATTERN = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
 @jar_bp.route('/manage', methods=['GET', 'POST'])
 @login_required
 def manage_jars_route():
     # Initialisiere available_jars mit einem Standardwert (leere Liste)
     available_jars = []
+    jar_details = {}
 
     if request.method == 'POST': # Dieser Block ist für den Upload
         if 'jar_file' not in request.files:
@@ -24,13 +28,15 @@ def manage_jars_route():
             
     # Dieser Teil wird nur bei GET-Requests erreicht
     try:
-        available_jars = jar_manager.list_jars()
+        jar_infos = jar_manager.list_jars_with_metadata()
+        available_jars = [j['name'] for j in jar_infos]
+        jar_details = {j['name']: j for j in jar_infos}
     except Exception as e:
         current_app.logger.error(f"Fehler beim Auflisten der JARs in manage_jars_route: {e}")
         flash("Ein Fehler ist beim Laden der JAR-Dateien aufgetreten.", "error")
         # available_jars bleibt die initialisierte leere Liste im Fehlerfall
         
-    return render_template('upload_jar.html', available_jars=available_jars)
+    return render_template('upload_jar.html', available_jars=available_jars, jar_details=jar_details, store_stats=jar_manager.get_store_stats())
 
 @jar_bp.route('/delete/<path:jar_name>', methods=['POST']) # <path:jar_name> um Dateinamen mit Punkten zu erlauben
 @login_required
@@ -41,4 +47,67 @@ def delete_jar_route(jar_name):
         flash(message, "success")
     else:
         flash(message, "error") # oder "warning"
-    return redirect(url_for('jar.manage_jars_route'))
\ No newline at end of file
+    return redirect(url_for('jar.manage_jars_route'))
+
+# --- Fortsetzbarer Upload in Teilstücken ---
+# POST   /jar/upload                {filename, size}  -> Upload anlegen
+# PUT    /jar/upload/<id>           Rohdaten mit Content-Range: bytes <start>-<ende>/<gesamt>
+# GET    /jar/upload/<id>           Aktueller Offset (zum Fortsetzen nach Abbruch)
+# POST   /jar/upload/<id>/complete  {sha256 (optional)} -> prüfen und veröffentlichen
+# DELETE /jar/upload/<id>           Abbrechen
+
+def _upload_error(message, status, upload=None):
+    payload = {'status': 'error', 'message': message}
+    if upload is not None:
+        payload['upload'] = upload
+    return jsonify(payload), status
+
+@jar_bp.route('/upload', methods=['POST'])
+@login_required
+def begin_upload_route():
+    data = request.get_json(silent=True) or request.form
+    success, result = jar_manager.begin_upload(data.get('filename'), data.get('size'))
+    if not success:
+        return _upload_error(result, 400)
+    return jsonify({'status': 'success', 'upload': result}), 201
+
+@jar_bp.route('/upload/<upload_id>', methods=['GET'])
+@login_required
+def upload_status_route(upload_id):
+    upload = jar_manager.get_upload(upload_id)
+    if upload is None:
+        return _upload_error('Upload nicht gefunden oder abgelaufen.', 404)
+    return jsonify({'status': 'success', 'upload': upload})
+
+@jar_bp.route('/upload/<upload_id>', methods=['PUT'])
+@login_required
+def upload_chunk_route(upload_id):
+    match = CONTENT_RANGE_PATTERN.fullmatch(request.headers.get('Content-Range', '').strip())
+    if not match:
+        return _upload_error('Content-Range-Header fehlt oder ist ungültig.', 400)
+    start, end = int(match.group(1)), int(match.group(2))
+    if request.content_length is not None and request.content_length != end - start + 1:
+        return _upload_error('Content-Range passt nicht zur Länge des Teilstücks.', 400)
+    # request.stream liest den Body direkt vom Socket, ohne ihn vorher komplett zu puffern
+    outcome = jar_manager.append_upload(upload_id, start, request.stream)
+    if not outcome[0]:
+        message, upload = outcome[1], outcome[2]
+        return _upload_error(message, 404 if upload is None else 409, upload)
+    return jsonify({'status': 'success', 'upload': outcome[1]})
+
+@jar_bp.route('/upload/<upload_id>/complete', methods=['POST'])
+@login_required
+def finish_upload_route(upload_id):
+    data = request.get_json(silent=True) or request.form
+    success, message = jar_manager.finish_upload(upload_id, data.get('sha256'))
+    if not success:
+        return _upload_error(message, 400)
+    return jsonify({'status': 'success', 'filename': message, 'message': f'JAR-Datei "{message}" erfolgreich hochgeladen.'})
+
+@jar_bp.route('/upload/<upload_id>', methods=['DELETE'])
+@login_required
+def abort_upload_route(upload_id):
+    success, message = jar_manager.abort_upload(upload_id)
+    if not success:
+        return _upload_error(message, 404)
+    return jsonify({'status': 'success', 'message': message})
@@ -1,6 +1,11 @@
 # mc_panel/blueprints/main_bp.py
-from flask import Blueprint, render_template, jsonify, redirect, url_for, flash, current_app
-from mc_panel import server_manager, login_required # Importiere globale Instanz und Decorator
+import hmac
+import json
+import time
+from datetime import datetime
+from flask import Blueprint, render_template, jsonify, redirect, url_for, flash, current_app, request, Response, session, stream_with_context
+from mc_panel import server_manager, jar_manager, request_metrics, login_required # Importiere globale Instanzen und Decorator
+from mc_panel.utils.metrics import render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 main_bp = Blueprint('main', __name__) # url_prefix ist standardmäßig '/'
 
@@ -9,7 +14,8 @@ main_bp = Blueprint('main', __name__) # url_prefix ist standardmäßig '/'
 def index():
     # server_manager ist global in mc_panel/__init__.py verfügbar
     servers = server_manager.get_all_servers_with_resources()
-    return render_template('index.html', servers=servers)
+    return render_template('index.html', servers=servers, trash_status=server_manager.get_trash_status(),
+                           capacity=server_manager.get_capacity_status())
 
 @main_bp.route('/server_console/<server_name>')
 @login_required
@@ -20,15 +26,111 @@ def server_console(server_name):
     if not server_info:
         flash(f"Server '{server_name}' nicht gefunden oder Zugriff verweigert.", "error")
         return redirect(url_for('main.index'))
-    return render_template('console.html', server_name=server_name, server_info=server_info)
+    _, start_command = server_manager.get_start_command(server_name)
+    return render_template('console.html', server_name=server_name, server_info=server_info,
+                           start_command=start_command, available_jars=jar_manager.list_jars(),
+                           jar_details={j['name']: j for j in jar_manager.list_jars_with_metadata()})
 
 @main_bp.route('/get_console_output/<server_name>')
 @login_required
 def get_console_output(server_name):
     # Auch hier: server_name validieren oder sicherstellen, dass Manager es tut.
-    output = server_manager.get_console_output_with_resources(server_name)
+    # ?since=<seq> liefert nur Zeilen ab diesem Cursor, ohne Parameter den ganzen Puffer
+    since = request.args.get('since', type=int)
+    output = server_manager.get_console_output_with_resources(server_name, since=since)
     return jsonify(output)
 
+@main_bp.route('/console_stream/<server_name>')
+@login_required
+def console_stream(server_name):
+    """
+    Server-Sent Events: schiebt neue Konsolenzeilen, sobald sie ankommen.
+    Die Event-ID ist der Cursor, damit EventSource nach einem Verbindungsabbruch
+    über den Last-Event-ID-Header genau dort weitermacht.
+    """
+    if not server_manager.server_exists(server_name):
+        return jsonify({'error': 'server_not_found'}), 404
+    since = request.args.get('since', type=int)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+
+    def generate():
+        for event in server_manager.stream_console(server_name, since=since):
+            if event['event'] == 'heartbeat':
+                yield ": heartbeat\n\n" # Kommentarzeile hält Proxies wach und erkennt getrennte Clients
+                continue
+            payload = {k: v for k, v in event.items() if k != 'event'}
+            yield f"id: {event['next']}\nevent: {event['event']}\ndata: {json.dumps(payload)}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _parse_time_arg(value):
+    """ Akzeptiert Unix-Zeit oder ISO-Datum (ohne Zeitzone = lokale Zeit). """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    return datetime.fromisoformat(value).timestamp() # ValueError geht an den Aufrufer
+
+@main_bp.route('/console_log/<server_name>/search')
+@login_required
+def search_console_log(server_name):
+    """
+    Durchsucht die persistente Konsolen-Historie.
+    Parameter: from, to (Unix-Zeit oder ISO), q (Suchtext), regex=1, icase=1, limit
+    """
+    try:
+        start = _parse_time_arg(request.args.get('from'))
+        end = _parse_time_arg(request.args.get('to'))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': "Ungültige Zeitangabe (Unix-Zeit oder ISO-Format erwartet)."}), 400
+    limit = min(max(request.args.get('limit', 500, type=int), 1), 5000)
+    started = time.monotonic()
+    success, result = server_manager.search_console_log(
+        server_name, start=start, end=end, query=request.args.get('q') or None,
+        regex=request.args.get('regex') == '1', ignore_case=request.args.get('icase') == '1', limit=limit)
+    if not success:
+        return jsonify({'status': 'error', 'message': result}), 400
+    result['status'] = 'success'
+    result['took_ms'] = round((time.monotonic() - started) * 1000, 1)
+    return jsonify(result)
+
+@main_bp.route('/history')
+@login_required
+def history():
+    """
+    Leistungsverlauf mehrerer Server in einem Request.
+    Parameter: servers (kommagetrennt, leer = alle), resolution (1s|1m|1h), since (Unix-Zeit)
+    """
+    names_param = request.args.get('servers', '')
+    names = [n for n in names_param.split(',') if n] if names_param else None
+    success, result = server_manager.get_history(names, request.args.get('resolution', '1m'),
+                                                 request.args.get('since', type=float))
+    if not success:
+        return jsonify({'status': 'error', 'message': result}), 400
+    result['status'] = 'success'
+    return jsonify(result)
+
+@main_bp.route('/metrics')
+def metrics():
+    """
+    Prometheus-Textformat. Liest nur gecachte Werte (Ressourcen-Sampler, Zähler),
+    ein Scrape misst also nichts selbst. Zugriff per Bearer-Token (METRICS_TOKEN)
+    oder mit angemeldeter Sitzung.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    auth = request.headers.get('Authorization', '')
+    token_ok = bool(token) and auth.startswith('Bearer ') and hmac.compare_digest(auth[7:].encode(), str(token).encode())
+    if not token_ok and 'user_id' not in session:
+        return Response("Nicht autorisiert.\n", status=401, mimetype='text/plain',
+                        headers={'WWW-Authenticate': 'Bearer'})
+    body = render_metrics(server_manager.get_metrics_samples(), request_metrics)
+    return Response(body, content_type=METRICS_CONTENT_TYPE)
+
 # Eine einfache Route, um zu sehen, ob die App läuft (optional, ohne Login)
 @main_bp.route('/health')
 def health_check():
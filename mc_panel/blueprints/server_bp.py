@@ -1,54 +1,214 @@
 # mc_panel/blueprints/server_bp.py
 from flask import Blueprint, request, redirect, url_for, flash, render_template, current_app, jsonify
 from mc_panel import server_manager, jar_manager, login_required # Globale Instanzen und Decorator
+from mc_panel.managers.jvm_profiles import PROFILES as JVM_PROFILES
 
 server_bp = Blueprint('server', __name__) # url_prefix='/server' wird in __init__.py gesetzt
 
-@server_bp.route('/start/<server_name>', methods=['POST'])
-@login_required
-def start_server_route(server_name):
-    success, message = server_manager.start_server(server_name)
+def _wants_json():
+    """ True, wenn der Client (z.B. fetch im Dashboard) JSON statt Redirect erwartet. """
+    accept = request.accept_mimetypes
+    return accept.best == 'application/json' or (accept.accept_json and not accept.accept_html)
+
+def _job_response(success, result, queued_message, error_status=404):
+    """
+    Antwort für eingereihte Lifecycle-Aufträge: JSON mit Job-ID (HTTP 202) für
+    fetch-Clients, sonst Flash-Meldung und Redirect wie bisher.
+    """
+    if _wants_json():
+        if success:
+            return jsonify({'status': 'success', 'job': result}), 202
+        return jsonify({'status': 'error', 'message': result}), error_status
     if success:
-        flash(message, "success")
+        flash(queued_message, "info")
     else:
-        flash(message, "error")
+        flash(result, "error")
     return redirect(url_for('main.index'))
 
+@server_bp.route('/start/<server_name>', methods=['POST'])
+@login_required
+def start_server_route(server_name):
+    success, result = server_manager.submit_start(server_name)
+    return _job_response(success, result, f"Start von Server '{server_name}' wurde eingereiht.")
+
 @server_bp.route('/stop/<server_name>', methods=['POST'])
 @login_required
 def stop_server_route(server_name):
-    success, message = server_manager.stop_server(server_name)
-    if success:
-        flash(message, "success")
-    else:
-        flash(message, "warning") # Kann auch ein Fehler sein, je nach msg
-    return redirect(url_for('main.index'))
+    success, result = server_manager.submit_stop(server_name)
+    return _job_response(success, result, f"Stopp von Server '{server_name}' wurde eingereiht.")
 
 @server_bp.route('/delete/<server_name>', methods=['POST'])
 @login_required
 def delete_server_route(server_name):
-    success, message = server_manager.delete_server(server_name)
-    if success:
-        flash(message, "success")
+    success, result = server_manager.submit_delete(server_name)
+    return _job_response(success, result, f"Löschen von Server '{server_name}' wurde eingereiht.")
+
+@server_bp.route('/bulk/<action>', methods=['POST'])
+@login_required
+def bulk_action_route(action):
+    """
+    Massenstart/-stopp. Erwartet 'servers' (mehrfach oder kommagetrennt, 'all'
+    für alle) und optional 'max_parallel', als Formular oder JSON.
+    """
+    payload = request.get_json(silent=True) or {}
+    if payload:
+        server_names = payload.get('servers', 'all')
+        max_parallel = payload.get('max_parallel')
     else:
-        flash(message, "error")
-    return redirect(url_for('main.index'))
+        server_names = [n.strip() for value in request.form.getlist('servers') for n in value.split(',') if n.strip()]
+        max_parallel = request.form.get('max_parallel')
+    if server_names in ('all', ['all']) or request.form.get('all') == '1':
+        server_names = 'all'
+    success, result = server_manager.submit_bulk(action, server_names, max_parallel=max_parallel)
+    verb = 'Start' if action == 'start' else 'Stopp'
+    return _job_response(success, result, f"Massen-{verb} wurde eingereiht.", error_status=400)
+
+@server_bp.route('/job/<job_id>', methods=['GET'])
+@login_required
+def job_status_route(job_id):
+    job = server_manager.get_job(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Auftrag nicht gefunden.'}), 404
+    return jsonify({'status': 'success', 'job': job})
+
+@server_bp.route('/jobs', methods=['GET'])
+@login_required
+def list_jobs_route():
+    server_name = request.args.get('server') or None
+    return jsonify({'status': 'success', 'jobs': server_manager.list_jobs(server_name=server_name)})
+
+@server_bp.route('/backup/<server_name>', methods=['POST'])
+@login_required
+def backup_server_route(server_name):
+    label = (request.form.get('label') or (request.get_json(silent=True) or {}).get('label') or '').strip()[:100]
+    success, result = server_manager.submit_backup(server_name, label)
+    return _job_response(success, result, f"Backup von '{server_name}' wurde eingereiht.")
+
+@server_bp.route('/backups/<server_name>', methods=['GET'])
+@login_required
+def list_backups_route(server_name):
+    return jsonify({'status': 'success', 'backups': server_manager.list_backups(server_name)})
+
+@server_bp.route('/restore/<server_name>/<snapshot_id>', methods=['POST'])
+@login_required
+def restore_backup_route(server_name, snapshot_id):
+    success, result = server_manager.submit_restore(server_name, snapshot_id)
+    return _job_response(success, result, f"Wiederherstellung von '{server_name}' wurde eingereiht.")
+
+@server_bp.route('/prune_backups/<server_name>', methods=['POST'])
+@login_required
+def prune_backups_route(server_name):
+    data = request.get_json(silent=True) or request.form
+    keep_last = data.get('keep_last') or current_app.config.get('BACKUP_KEEP_LAST', 10)
+    keep_daily = data.get('keep_daily') or current_app.config.get('BACKUP_KEEP_DAILY', 7)
+    success, result = server_manager.submit_prune_backups(server_name, keep_last, keep_daily)
+    return _job_response(success, result, f"Aufräumen der Backups von '{server_name}' wurde eingereiht.", error_status=400)
+
+@server_bp.route('/world/<server_name>/analyze', methods=['POST'])
+@login_required
+def analyze_world_route(server_name):
+    # Ergebnis steht nach Abschluss im 'result' des Auftrags (/server/job/<id>)
+    data = request.get_json(silent=True) or request.form
+    with_inhabited = str(data.get('inhabited', '')).lower() in ('1', 'true', 'on')
+    success, result = server_manager.submit_analyze_world(server_name, with_inhabited)
+    return _job_response(success, result, f"Analyse der Welt von '{server_name}' wurde eingereiht.")
+
+@server_bp.route('/world/<server_name>/compact', methods=['POST'])
+@login_required
+def compact_world_route(server_name):
+    data = request.get_json(silent=True) or request.form
+    max_inhabited = data.get('max_inhabited_seconds') if str(data.get('prune', '')).lower() in ('1', 'true', 'on') else None
+    success, result = server_manager.submit_compact_world(server_name, max_inhabited, data.get('older_than_days'))
+    return _job_response(success, result, f"Kompaktieren der Welt von '{server_name}' wurde eingereiht.", error_status=400)
+
+@server_bp.route('/trash', methods=['GET'])
+@login_required
+def trash_status_route():
+    # Fortschritt der Hintergrund-Löschung gelöschter Instanzen
+    return jsonify({'status': 'success', 'trash': server_manager.get_trash_status()})
 
 @server_bp.route('/send_command/<server_name>', methods=['POST'])
 @login_required
 def send_command_route(server_name):
-    command_text = request.form.get('command')
-    success, message = server_manager.send_command(server_name, command_text)
+    # Per RCON kommt die Antwort des Servers mit ('response'), bei stdin ist sie None.
+    # JSON {"commands": [...]} schickt mehrere Befehle in einem Rutsch.
+    data = request.get_json(silent=True) or {}
+    if isinstance(data.get('commands'), list):
+        success, result = server_manager.send_commands(server_name, [str(c) for c in data['commands']])
+        if success:
+            return jsonify({'status': 'success', 'results': result})
+        return jsonify({'status': 'error', 'message': result}), 400
+    command_text = request.form.get('command') or data.get('command')
+    success, result = server_manager.send_command(server_name, command_text)
     if success:
-        return jsonify({'status': 'success', 'message': message})
+        return jsonify(dict(result, status='success'))
     else:
-        return jsonify({'status': 'error', 'message': message}), 400 # HTTP 400 für Client-Fehler
+        return jsonify({'status': 'error', 'message': result}), 400 # HTTP 400 für Client-Fehler
+
+@server_bp.route('/change_jar/<server_name>', methods=['POST'])
+@login_required
+def change_jar_route(server_name):
+    # Tauscht den server.jar-Link atomar; ein laufender Server bemerkt das erst beim Neustart
+    jar_name = request.form.get('jar') or (request.get_json(silent=True) or {}).get('jar')
+    if not jar_name or jar_name not in jar_manager.list_jars():
+        message = "Ausgewählte JAR-Datei ist nicht (mehr) verfügbar."
+        success = False
+    else:
+        success, message = server_manager.change_server_jar(server_name, jar_name)
+    if _wants_json():
+        return jsonify({'status': 'success' if success else 'error', 'message': message}), (200 if success else 400)
+    flash(message, "success" if success else "error")
+    return redirect(url_for('main.server_console', server_name=server_name))
+
+
+@server_bp.route('/jvm_profile/<server_name>', methods=['POST'])
+@login_required
+def change_jvm_profile_route(server_name):
+    profile = request.form.get('jvm_profile') or (request.get_json(silent=True) or {}).get('jvm_profile')
+    success, message = server_manager.change_jvm_profile(server_name, profile)
+    if _wants_json():
+        return jsonify({'status': 'success' if success else 'error', 'message': message}), (200 if success else 400)
+    flash(message, "success" if success else "error")
+    return redirect(url_for('main.server_console', server_name=server_name))
+
+@server_bp.route('/limits/<server_name>', methods=['POST'])
+@login_required
+def change_resource_limits_route(server_name):
+    # CPU-Set, CPU-Quota (% eines Kerns), Speicherobergrenze und IO-Gewicht; leere Felder heben Limits auf
+    data = request.get_json(silent=True) or request.form
+    success, message = server_manager.change_resource_limits(server_name, data)
+    if _wants_json():
+        return jsonify({'status': 'success' if success else 'error', 'message': message}), (200 if success else 400)
+    flash(message, "success" if success else "error")
+    return redirect(url_for('main.server_console', server_name=server_name))
+
+@server_bp.route('/idle/<server_name>', methods=['POST'])
+@login_required
+def change_idle_timeout_route(server_name):
+    # Minuten ohne Spieler, nach denen der Server schlafen gelegt wird (0 = nie)
+    data = request.get_json(silent=True) or request.form
+    success, message = server_manager.change_idle_timeout(server_name, data.get('idle_timeout'))
+    if _wants_json():
+        return jsonify({'status': 'success' if success else 'error', 'message': message}), (200 if success else 400)
+    flash(message, "success" if success else "error")
+    return redirect(url_for('main.server_console', server_name=server_name))
+
+@server_bp.route('/start_command/<server_name>', methods=['GET'])
+@login_required
+def start_command_route(server_name):
+    # Aufgelöster Startbefehl (Vorschau) und ggf. die Befehlszeile des laufenden Prozesses
+    success, result = server_manager.get_start_command(server_name)
+    if success:
+        return jsonify(dict(result, status='success'))
+    return jsonify({'status': 'error', 'message': result}), 404
 
 
 @server_bp.route('/create', methods=['GET', 'POST'])
 @login_required
 def create_server_route():
-    available_jars = jar_manager.list_jars()
+    jar_infos = jar_manager.list_jars_with_metadata()
+    available_jars = [j['name'] for j in jar_infos]
+    jar_details = {j['name']: j for j in jar_infos} # Software/Version/Build für die Auswahlliste
     form_data_on_error = {} # Für den Fall, dass das Formular mit Fehlern erneut angezeigt wird
 
     if request.method == 'POST':
@@ -71,14 +231,16 @@ def create_server_route():
             'difficulty': request.form.get('difficulty', 'easy'),
             'max_players': request.form.get('max_players', '20').strip(),
             'online_mode': online_mode_val,
-            'custom_jvm_args': request.form.get('custom_jvm_args', '').strip()
+            'custom_jvm_args': request.form.get('custom_jvm_args', '').strip(),
+            'jvm_profile': request.form.get('jvm_profile', 'auto'),
+            'start_priority': request.form.get('start_priority', '0').strip() or '0'
         }
         selected_jar_val = server_data['selected_jar'] # Für Validierung und Übergabe
 
         # --- Validierungen direkt in der Route für schnelles Feedback ---
         error_occured = False
-        if not all([server_data['server_name'], server_data['port'], server_data['ram_min'], server_data['ram_max'], selected_jar_val]):
-            flash("Grundlegende Felder (Name, Port, RAM, JAR) müssen ausgefüllt sein.", "error")
+        if not all([server_data['server_name'], server_data['ram_min'], server_data['ram_max'], selected_jar_val]):
+            flash("Grundlegende Felder (Name, RAM, JAR) müssen ausgefüllt sein.", "error")
             error_occured = True
         
         if not error_occured and (not server_data['server_name'] or not all(c.isalnum() or c in ['_', '-'] for c in server_data['server_name'])):
@@ -92,7 +254,7 @@ def create_server_route():
             flash("RAM Angaben müssen eine Zahl gefolgt von M oder G sein (z.B. 512M, 2G).", "error")
             error_occured = True
         
-        if not error_occured:
+        if not error_occured and server_data['port']: # Leer = nächster freier Port
             try:
                 port_num = int(server_data['port'])
                 if not (1024 <= port_num <= 65535):
@@ -112,12 +274,19 @@ def create_server_route():
                 flash("Maximale Spieleranzahl muss eine Zahl sein.", "error")
                 error_occured = True
         
+        if not error_occured:
+            try:
+                int(server_data['start_priority'])
+            except ValueError:
+                flash("Startpriorität muss eine ganze Zahl sein.", "error")
+                error_occured = True
+
         if not error_occured and selected_jar_val not in available_jars:
             flash("Ausgewählte JAR-Datei ist nicht (mehr) verfügbar. Bitte Seite neu laden.", "error")
             error_occured = True
         
         if error_occured:
-            return render_template('create_server.html', available_jars=available_jars, form_data=form_data_on_error)
+            return render_template('create_server.html', available_jars=available_jars, jar_details=jar_details, form_data=form_data_on_error, jvm_profiles=JVM_PROFILES, game_port_base=server_manager.game_port_base)
         # --- Ende Validierungen in Route ---
 
         success, message = server_manager.create_server(server_data, selected_jar_val)
@@ -128,14 +297,24 @@ def create_server_route():
         else:
             flash(message, "error")
             # Formular erneut mit den alten Daten anzeigen
-            return render_template('create_server.html', available_jars=available_jars, form_data=form_data_on_error)
+            return render_template('create_server.html', available_jars=available_jars, jar_details=jar_details, form_data=form_data_on_error, jvm_profiles=JVM_PROFILES, game_port_base=server_manager.game_port_base)
 
     # Für GET Request oder wenn keine POST-Daten (Initialaufruf)
-    return render_template('create_server.html', available_jars=available_jars, form_data={
+    return render_template('create_server.html', available_jars=available_jars, jar_details=jar_details, form_data={
         # Standardwerte für das Formular beim ersten Laden
         'level_name': 'world', 'gamemode': 'survival', 'difficulty': 'easy',
-        'max_players': '20', 'online_mode': True, 'velocity_secret': '', 'custom_jvm_args': ''
-    })
+        'max_players': '20', 'online_mode': True, 'velocity_secret': '', 'custom_jvm_args': '',
+        'jvm_profile': 'auto', 'start_priority': '0'
+    }, jvm_profiles=JVM_PROFILES, game_port_base=server_manager.game_port_base)
+
+# Sammelabfrage: ein Request für alle Server (oder ?servers=a,b) statt einer pro Server
+@server_bp.route('/resource_usage', methods=['GET'])
+@login_required
+def resource_usage_bulk_route():
+    requested = request.args.get('servers', '')
+    server_names = [n.strip() for n in requested.split(',') if n.strip()] or None
+    data = server_manager.get_resource_usage_bulk(server_names)
+    return jsonify({'servers': data})
 
 # NEUE/KORRIGIERTE ROUTE für Ressourcen-Abfrage
 @server_bp.route('/resource_usage/<server_name>', methods=['GET'])
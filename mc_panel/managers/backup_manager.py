@@ -0,0 +1,527 @@
+# mc_panel/managers/backup_manager.py
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import re
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .region_file import SECTOR_SIZE, REGION_HEADER_SIZE, parse_region
+
+# Minecraft meldet das Ende von "save-all flush" mit "Saved the game" (ältere Versionen: "Saved the world")
+SAVE_COMPLETE_PATTERN = re.compile(r'Saved the (game|world)')
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+# Jedes Objekt beginnt mit einem Byte für das Format des restlichen Inhalts
+CODEC_RAW = b'N' # Unkomprimiert (z.B. Chunks, die in der .mca schon komprimiert sind)
+CODEC_ZLIB = b'Z'
+
+
+# --- Funktionen für die Worker-Prozesse (müssen auf Modulebene liegen) ---
+
+def _object_path(objects_dir, sha):
+    return os.path.join(objects_dir, sha[:2], sha)
+
+
+def _write_object(objects_dir, sha, codec, chunks):
+    """Schreibt ein Objekt atomar. :return: geschriebene Bytes (0, wenn schon vorhanden)"""
+    path = _object_path(objects_dir, sha)
+    if os.path.exists(path):
+        return 0
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    written = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(codec)
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return written + 1
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def store_file_object(path, objects_dir, level):
+    """
+    Speichert eine normale Datei zlib-komprimiert im Objektspeicher.
+    :return: (sha256, neu geschriebene Bytes)
+    """
+    sha = _hash_file(path)
+    if os.path.exists(_object_path(objects_dir, sha)):
+        return sha, 0
+
+    def compressed_blocks():
+        compressor = zlib.compressobj(level)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+                data = compressor.compress(block)
+                if data:
+                    yield data
+        yield compressor.flush()
+
+    return sha, _write_object(objects_dir, sha, CODEC_ZLIB, compressed_blocks())
+
+
+def store_region_object(path, objects_dir):
+    """
+    Zerlegt eine .mca-Datei in einzelne Chunks und speichert jeden als eigenes
+    Objekt. Unveränderte Chunks haben denselben Hash und kosten keinen Platz.
+    Die Chunks sind in der Datei bereits komprimiert und werden roh gespeichert.
+    :return: (Manifest-Eintrag oder None bei unlesbarem Header, neu geschriebene Bytes)
+    """
+    new_bytes = 0
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < REGION_HEADER_SIZE:
+            return None, 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            chunks = parse_region(mm)
+            if chunks is None:
+                return None, 0
+            timestamps = mm[SECTOR_SIZE:REGION_HEADER_SIZE]
+            timestamps_sha = hashlib.sha256(timestamps).hexdigest()
+            new_bytes += _write_object(objects_dir, timestamps_sha, CODEC_RAW, [timestamps])
+            chunk_map = {}
+            for index, start, length in chunks:
+                data = mm[start:start + length]
+                sha = hashlib.sha256(data).hexdigest()
+                new_bytes += _write_object(objects_dir, sha, CODEC_RAW, [data])
+                chunk_map[str(index)] = sha
+    return {'kind': 'region', 'timestamps': timestamps_sha, 'chunks': chunk_map}, new_bytes
+
+
+def _noop():
+    return os.getpid()
+
+
+class BackupManager:
+    """
+    Inkrementelle, deduplizierende Backups der Instanzverzeichnisse.
+
+    Alle Inhalte liegen einmalig in einem inhaltsadressierten Objektspeicher
+    (<backup_dir>/objects). Ein Snapshot ist nur ein Manifest mit Pfad ->
+    Objekt-Hash. Dateien mit unveränderter Größe und mtime werden aus dem
+    vorherigen Snapshot übernommen, ohne sie zu lesen. Region-Dateien werden
+    chunkweise gespeichert, sodass ein geänderter Chunk nicht die ganze Datei
+    neu kostet. Hashen und Komprimieren laufen in einem Prozesspool.
+    """
+
+    def __init__(self, backup_dir, workers=2, compression_level=6, exclude=(), flush_timeout=120):
+        self.backup_dir = backup_dir
+        self.objects_dir = os.path.join(backup_dir, 'objects')
+        self.snapshots_dir = os.path.join(backup_dir, 'snapshots')
+        self.workers = max(1, int(workers))
+        self.compression_level = int(compression_level)
+        self.exclude = frozenset(exclude) # Namen auf oberster Ebene der Instanz, die nie gesichert werden
+        self.flush_timeout = flush_timeout
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        # Speicherbereinigung darf nie parallel zu einem Backup laufen, das gerade
+        # Objekte schreibt, die noch in keinem Manifest stehen
+        self._gate = threading.Condition()
+        self._active_backups = 0
+        self._gc_running = False
+        self._pool = None
+        self._start_pool()
+
+    def _start_pool(self):
+        """
+        Startet den Prozesspool sofort. 'fork' statt 'spawn', weil spawn das
+        Hauptmodul (run.py) und damit die ganze App in jedem Worker neu laden würde;
+        deshalb wird der Pool erzeugt, bevor das Panel weitere Threads startet.
+        """
+        try:
+            context = multiprocessing.get_context('fork')
+        except ValueError: # Windows kennt kein fork
+            self._pool = None
+            return
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        for future in [self._pool.submit(_noop) for _ in range(self.workers)]:
+            future.result()
+
+    def _run_in_pool(self, tasks):
+        """
+        Führt (fn, args)-Aufgaben im Pool aus, ohne Pool im aufrufenden Thread.
+        :return: Ergebnisse in derselben Reihenfolge
+        """
+        if self._pool is not None:
+            try:
+                futures = [self._pool.submit(fn, *args) for fn, args in tasks]
+                return [future.result() for future in futures]
+            except BrokenProcessPool:
+                print("WARNUNG: Backup-Prozesspool ist ausgefallen, komprimiere im Panel-Prozess.")
+                self._pool = None
+        return [fn(*args) for fn, args in tasks]
+
+    # --- Manifeste ---
+
+    def _server_dir(self, server_name):
+        return os.path.join(self.snapshots_dir, server_name)
+
+    def _manifest_path(self, server_name, snapshot_id):
+        if not re.fullmatch(r'[0-9TZ\-]+-[0-9a-f]{6}', snapshot_id or ''):
+            return None
+        return os.path.join(self._server_dir(server_name), f'{snapshot_id}.json')
+
+    def _load_manifest(self, server_name, snapshot_id):
+        path = self._manifest_path(server_name, snapshot_id)
+        if path is None:
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list_backups(self, server_name):
+        """Alle Snapshots eines Servers (ohne Dateiliste), neueste zuerst."""
+        try:
+            names = sorted(os.listdir(self._server_dir(server_name)), reverse=True)
+        except OSError:
+            return []
+        backups = []
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            manifest = self._load_manifest(server_name, name[:-5])
+            if manifest:
+                backups.append({k: v for k, v in manifest.items() if k != 'files'})
+        backups.sort(key=lambda b: b.get('created_at', 0), reverse=True)
+        return backups
+
+    def _latest_manifest(self, server_name):
+        backups = self.list_backups(server_name)
+        return self._load_manifest(server_name, backups[0]['id']) if backups else None
+
+    # --- Backup ---
+
+    def _scan(self, instance_dir):
+        """:return: (Dateien {relpath: stat}, leere Verzeichnisse)"""
+        files, dirs = {}, []
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            has_entries = False
+            with os.scandir(os.path.join(instance_dir, rel_dir)) as entries:
+                for entry in entries:
+                    rel = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                    if not rel_dir and entry.name in self.exclude:
+                        continue
+                    if entry.name.endswith('.tmp') or entry.is_symlink():
+                        continue
+                    has_entries = True
+                    if entry.is_dir():
+                        stack.append(rel)
+                    elif entry.is_file():
+                        files[rel] = entry.stat()
+            if rel_dir and not has_entries:
+                dirs.append(rel_dir)
+        return files, dirs
+
+    def _enter_backup(self):
+        with self._gate:
+            while self._gc_running:
+                self._gate.wait()
+            self._active_backups += 1
+
+    def _leave_backup(self):
+        with self._gate:
+            self._active_backups -= 1
+            self._gate.notify_all()
+
+    def create_backup(self, job, server_name, instance_dir, label='', run_command=None):
+        """
+        Erstellt einen Snapshot. Läuft der Server (run_command gesetzt), werden
+        Speichervorgänge mit save-off angehalten, mit 'save-all flush' auf die
+        Platte gebracht und nach dem Backup mit save-on wieder aktiviert.
+        :param run_command: Callable(command, wait_pattern, timeout) -> (success, message)
+        :return: (success, message, manifest-Zusammenfassung)
+        """
+        if not os.path.isdir(instance_dir):
+            return False, f"Instanzverzeichnis '{instance_dir}' nicht gefunden."
+        saving_disabled = False
+        self._enter_backup()
+        try:
+            if run_command is not None:
+                job.set_message('Automatisches Speichern wird angehalten (save-off)...')
+                ok, msg = run_command('save-off', None, None)
+                saving_disabled = ok
+                job.set_message('Welt wird auf die Platte geschrieben (save-all flush)...')
+                ok, msg = run_command('save-all flush', SAVE_COMPLETE_PATTERN, self.flush_timeout)
+                if not ok:
+                    return False, f"Server hat das Speichern nicht bestätigt: {msg}"
+            return self._snapshot(job, server_name, instance_dir, label)
+        finally:
+            if saving_disabled:
+                run_command('save-on', None, None)
+            self._leave_backup()
+
+    def _snapshot(self, job, server_name, instance_dir, label):
+        started = time.time()
+        job.set_message('Dateien werden verglichen...')
+        files, empty_dirs = self._scan(instance_dir)
+        previous = self._latest_manifest(server_name)
+        previous_files = previous.get('files', {}) if previous else {}
+
+        entries = {}
+        tasks, task_paths = [], []
+        for rel, stat in files.items():
+            old = previous_files.get(rel)
+            if old and old.get('size') == stat.st_size and old.get('mtime_ns') == stat.st_mtime_ns:
+                entries[rel] = old # Unverändert: nicht lesen
+                continue
+            path = os.path.join(instance_dir, rel)
+            if rel.endswith('.mca'):
+                tasks.append((store_region_object, (path, self.objects_dir)))
+            else:
+                tasks.append((store_file_object, (path, self.objects_dir, self.compression_level)))
+            task_paths.append((rel, stat))
+
+        new_bytes = 0
+        done = 0
+        batch_size = max(8, self.workers * 4)
+        for i in range(0, len(tasks), batch_size):
+            job.set_message(f"Sichere geänderte Dateien ({done}/{len(tasks)})...")
+            batch = tasks[i:i + batch_size]
+            results = self._run_in_pool(batch)
+            for (rel, stat), (fn, args), result in zip(task_paths[i:i + batch_size], batch, results):
+                entry, written = result
+                if fn is store_region_object and entry is None: # Kaputter Header: als normale Datei sichern
+                    entry, written = store_file_object(args[0], self.objects_dir, self.compression_level)
+                if isinstance(entry, str):
+                    entry = {'kind': 'file', 'sha': entry}
+                entry.update({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'mode': stat.st_mode & 0o777})
+                entries[rel] = entry
+                new_bytes += written
+            done += len(batch)
+
+        now = time.time()
+        # Sortierbar bis auf die Millisekunde, Zufallsanteil gegen Kollisionen
+        snapshot_id = time.strftime('%Y%m%dT%H%M%S', time.gmtime(now)) + f'{int(now * 1000) % 1000:03d}Z-' + uuid.uuid4().hex[:6]
+        manifest = {
+            'id': snapshot_id,
+            'server': server_name,
+            'label': label or '',
+            'created_at': now,
+            'duration_s': round(now - started, 2),
+            'file_count': len(entries),
+            'changed_files': len(tasks),
+            'total_bytes': sum(e['size'] for e in entries.values()),
+            'new_bytes': new_bytes,
+            'parent': previous['id'] if previous else None,
+            'empty_dirs': empty_dirs,
+            'files': entries,
+        }
+        server_dir = self._server_dir(server_name)
+        os.makedirs(server_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=server_dir, prefix='.manifest-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, separators=(',', ':'))
+        os.replace(tmp_path, os.path.join(server_dir, f'{snapshot_id}.json'))
+        summary = {k: v for k, v in manifest.items() if k != 'files'}
+        return True, (f"Backup {snapshot_id} erstellt: {len(tasks)} von {len(entries)} Dateien geändert, "
+                      f"{new_bytes / 1048576:.1f} MB neu gespeichert."), summary
+
+    # --- Wiederherstellen ---
+
+    def _read_object(self, sha):
+        """Liefert den Inhalt eines Objekts blockweise."""
+        with open(_object_path(self.objects_dir, sha), 'rb') as f:
+            codec = f.read(1)
+            if codec == CODEC_RAW:
+                yield from iter(lambda: f.read(READ_BLOCK_SIZE), b'')
+            elif codec == CODEC_ZLIB:
+                decompressor = zlib.decompressobj()
+                for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+                    yield decompressor.decompress(block)
+                yield decompressor.flush()
+            else:
+                raise ValueError(f"Unbekanntes Objektformat in {sha}")
+
+    def _restore_region(self, entry, target):
+        """Baut die Region-Datei lückenlos neu auf (gleichzeitig kompaktiert)."""
+        locations = bytearray(SECTOR_SIZE)
+        chunks = []
+        sector = 2
+        for index, sha in sorted(entry['chunks'].items(), key=lambda item: int(item[0])):
+            data = b''.join(self._read_object(sha))
+            sectors = -(-len(data) // SECTOR_SIZE)
+            if sectors > 255:
+                raise ValueError(f"Chunk {index} ist zu groß für eine Region-Datei")
+            struct.pack_into('>I', locations, int(index) * 4, (sector << 8) | sectors)
+            chunks.append(data + b'\0' * (sectors * SECTOR_SIZE - len(data)))
+            sector += sectors
+        with open(target, 'wb') as f:
+            f.write(locations)
+            f.write(b''.join(self._read_object(entry['timestamps'])))
+            for data in chunks:
+                f.write(data)
+
+    def restore_backup(self, job, server_name, snapshot_id, instance_dir, trash):
+        """
+        Stellt einen Snapshot in einem Nachbarverzeichnis her und tauscht es dann
+        gegen die Instanz. Ausgeschlossene Einträge (Konsolen-Log, server.jar, ...)
+        werden aus der alten Instanz übernommen, die alte Instanz geht in den Papierkorb.
+        """
+        manifest = self._load_manifest(server_name, snapshot_id)
+        if manifest is None:
+            return False, f"Backup '{snapshot_id}' für '{server_name}' nicht gefunden."
+        parent = os.path.dirname(instance_dir)
+        staging = os.path.join(parent, f'.restore-{server_name}-{uuid.uuid4().hex[:8]}')
+        try:
+            os.makedirs(staging)
+            files = manifest['files']
+            for n, (rel, entry) in enumerate(sorted(files.items())):
+                if n % 100 == 0:
+                    job.set_message(f"Stelle Dateien wieder her ({n}/{len(files)})...")
+                target = os.path.join(staging, rel)
+                if not os.path.abspath(target).startswith(os.path.abspath(staging) + os.sep):
+                    raise ValueError(f"Ungültiger Pfad im Backup: {rel}")
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                if entry['kind'] == 'region':
+                    self._restore_region(entry, target)
+                else:
+                    with open(target, 'wb') as f:
+                        for block in self._read_object(entry['sha']):
+                            f.write(block)
+                os.chmod(target, entry.get('mode', 0o644))
+                # Gleiche mtime wie im Manifest: das nächste Backup erkennt die Datei als unverändert
+                os.utime(target, ns=(entry['mtime_ns'], entry['mtime_ns']))
+            for rel in manifest.get('empty_dirs', []):
+                os.makedirs(os.path.join(staging, rel), exist_ok=True)
+            if os.path.isdir(instance_dir):
+                for name in self.exclude:
+                    source = os.path.join(instance_dir, name)
+                    if os.path.lexists(source):
+                        os.rename(source, os.path.join(staging, name))
+        except (OSError, ValueError, KeyError) as e:
+            shutil.rmtree(staging, ignore_errors=True)
+            return False, f"Wiederherstellung fehlgeschlagen: {e}"
+
+        moved, result = trash.move_to_trash(instance_dir, f'{server_name}-vor-restore')
+        if not moved:
+            shutil.rmtree(staging, ignore_errors=True)
+            return False, result
+        os.rename(staging, instance_dir)
+        return True, f"Backup {snapshot_id} für '{server_name}' wiederhergestellt."
+
+    # --- Aufbewahrung ---
+
+    def prune_backups(self, job, server_name, keep_last=10, keep_daily=7):
+        """
+        Behält die keep_last neuesten Snapshots und zusätzlich den jeweils neuesten
+        der letzten keep_daily Tage; der Rest wird gelöscht. Danach werden Objekte
+        freigegeben, die kein Snapshot (auch anderer Server) mehr benutzt.
+        """
+        backups = self.list_backups(server_name)
+        keep = {b['id'] for b in backups[:max(0, int(keep_last))]}
+        days = []
+        for backup in backups: # neueste zuerst
+            day = time.strftime('%Y-%m-%d', time.gmtime(backup['created_at']))
+            if day not in days:
+                days.append(day)
+                if len(days) <= int(keep_daily):
+                    keep.add(backup['id'])
+        removed = [b['id'] for b in backups if b['id'] not in keep]
+        for snapshot_id in removed:
+            try:
+                os.remove(self._manifest_path(server_name, snapshot_id))
+            except OSError:
+                pass
+        job.set_message(f"{len(removed)} Snapshots gelöscht, gebe ungenutzte Objekte frei...")
+        ok, result = self.collect_garbage()
+        if not ok:
+            return False, f"{len(removed)} von {len(backups)} Backups gelöscht. {result}"
+        freed_objects, freed_bytes = result
+        return True, (f"{len(removed)} von {len(backups)} Backups gelöscht, "
+                      f"{freed_objects} Objekte ({freed_bytes / 1048576:.1f} MB) freigegeben.")
+
+    def _referenced_objects(self):
+        """
+        Sammelt alle Objekt-Hashes, auf die ein Manifest verweist.
+
+        :raises OSError, ValueError: wenn ein Manifest nicht gelesen werden kann – dann
+            ist unbekannt, was noch gebraucht wird, und es darf nichts gelöscht werden.
+        """
+        referenced = set()
+        for server_name in os.listdir(self.snapshots_dir):
+            server_dir = self._server_dir(server_name)
+            if not os.path.isdir(server_dir):
+                raise ValueError(f"Unerwarteter Eintrag im Snapshot-Verzeichnis: {server_name}")
+            for name in os.listdir(server_dir):
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(server_dir, name)
+                try:
+                    with open(path, 'r') as f:
+                        manifest = json.load(f)
+                    for entry in manifest['files'].values():
+                        if entry['kind'] == 'region':
+                            referenced.add(entry['timestamps'])
+                            referenced.update(entry['chunks'].values())
+                        else:
+                            referenced.add(entry['sha'])
+                except (KeyError, TypeError, AttributeError) as e:
+                    raise ValueError(f"Manifest {server_name}/{name} ist ungültig: {e}") from e
+                except (OSError, ValueError) as e:
+                    raise ValueError(f"Manifest {server_name}/{name} nicht lesbar: {e}") from e
+        return referenced
+
+    def collect_garbage(self):
+        """
+        Löscht alle Objekte, auf die kein Manifest mehr verweist.
+
+        :return: (True, (freigegebene Objekte, Bytes)) oder (False, Fehlermeldung), falls
+            ein Manifest nicht lesbar war; in dem Fall wird nichts gelöscht.
+        """
+        with self._gate:
+            while self._active_backups or self._gc_running:
+                self._gate.wait()
+            self._gc_running = True
+        try:
+            try:
+                referenced = self._referenced_objects()
+            except (OSError, ValueError) as e:
+                print(f"FEHLER: Objekt-Freigabe abgebrochen: {e}")
+                return False, f"Objekt-Freigabe abgebrochen, nichts gelöscht: {e}"
+            freed_objects = freed_bytes = 0
+            for prefix in os.listdir(self.objects_dir):
+                prefix_dir = os.path.join(self.objects_dir, prefix)
+                if not os.path.isdir(prefix_dir):
+                    continue
+                for name in os.listdir(prefix_dir):
+                    if name not in referenced:
+                        path = os.path.join(prefix_dir, name)
+                        try:
+                            freed_bytes += os.path.getsize(path)
+                            os.remove(path)
+                            freed_objects += 1
+                        except OSError:
+                            pass
+            return True, (freed_objects, freed_bytes)
+        finally:
+            with self._gate:
+                self._gc_running = False
+                self._gate.notify_all()
@@ -0,0 +1,132 @@
+# mc_panel/managers/capacity.py
+import threading
+import time
+
+from .jvm_profiles import parse_memory_size, host_facts
+
+try:
+    import psutil # Für den tatsächlich verfügbaren Speicher
+except ImportError:
+    psutil = None
+
+MIB = 1024 ** 2
+
+
+def _format_mb(value):
+    return f"{value / MIB:,.0f} MB".replace(',', '.')
+
+
+class CapacityPlanner:
+    """
+    Buchführung über den Speicher, den laufende Server zugesagt bekommen haben.
+
+    Ein Server belegt ram_max plus geschätzten JVM-Overhead (Metaspace,
+    Code-Cache, Thread-Stacks, Netty-Puffer, GC-Strukturen): max(overhead_min,
+    ram_max * overhead_ratio). Hat er eine cgroup-Speicherobergrenze, zählt
+    diese, weil er nie mehr belegen kann. Gestartet wird nur, wenn alle
+    Zusagen zusammen unter Host-Speicher minus Reserve bleiben. Zusätzlich
+    muss der Host gerade genug freien Speicher haben, denn andere Programme
+    tauchen in der Buchführung nicht auf.
+    """
+
+    def __init__(self, host_memory=None, headroom='2G', overhead_ratio=0.25, overhead_min='512M'):
+        detected = None
+        if psutil is not None:
+            detected = psutil.virtual_memory().total
+        self.host_memory = parse_memory_size(host_memory) if host_memory else (detected or host_facts()['memory_bytes'] or 0)
+        self.headroom = parse_memory_size(headroom) or 0
+        self.overhead_ratio = float(overhead_ratio)
+        self.overhead_min = parse_memory_size(overhead_min) or 0
+        self._reservations = {} # server_name -> Bytes
+        self._fresh = {} # server_name -> Zeitpunkt der Zusage, solange der Server noch hochfährt
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+
+    @property
+    def capacity(self):
+        """Bytes, die insgesamt an Server vergeben werden dürfen."""
+        return max(0, self.host_memory - self.headroom)
+
+    def footprint(self, details):
+        """Geschätzter Speicherbedarf eines Servers aus seiner Konfiguration (Bytes)."""
+        memory_max = parse_memory_size(details.get('memory_max'))
+        if memory_max:
+            return memory_max
+        heap = parse_memory_size(details.get('ram_max')) or 2 * 1024 ** 3
+        return heap + max(self.overhead_min, int(heap * self.overhead_ratio))
+
+    def fits_at_all(self, required):
+        """:return: (True, None) oder (False, Grund), wenn der Server nicht einmal auf einem leeren Host passt"""
+        if required > self.capacity:
+            return False, (f"Benötigt {_format_mb(required)} (Heap + JVM-Overhead), der Host kann nach Abzug der "
+                           f"Reserve von {_format_mb(self.headroom)} nur {_format_mb(self.capacity)} vergeben.")
+        return True, None
+
+    def _check(self, server_name, required):
+        committed = sum(v for name, v in self._reservations.items() if name != server_name)
+        if committed + required > self.capacity:
+            return (f"Nicht genug Speicher: benötigt {_format_mb(required)}, zugesagt sind bereits "
+                    f"{_format_mb(committed)} von {_format_mb(self.capacity)} "
+                    f"(Host {_format_mb(self.host_memory)} minus Reserve {_format_mb(self.headroom)}).")
+        if psutil is not None:
+            available = psutil.virtual_memory().available
+            # Gerade zugesagte, aber noch nicht belegte Heaps stecken noch in 'available'
+            pending = sum(v for name, v in self._reservations.items() if name != server_name and name in self._fresh)
+            if available - pending < required:
+                return (f"Nicht genug freier Speicher auf dem Host: benötigt {_format_mb(required)}, "
+                        f"frei sind {_format_mb(max(0, available - pending))}.")
+        return None
+
+    def admit(self, server_name, required, wait=0, on_wait=None):
+        """
+        Sagt einem Server Speicher zu, falls er passt. Mit wait > 0 wird bis zu
+        wait Sekunden gewartet, dass andere Server Speicher freigeben.
+        :param on_wait: Optionales Callable(Grund), aufgerufen, sobald gewartet wird
+        :return: (True, None) oder (False, Grund)
+        """
+        ok, reason = self.fits_at_all(required)
+        if not ok:
+            return False, reason
+        deadline = time.monotonic() + max(0.0, float(wait or 0))
+        with self._lock:
+            while True:
+                reason = self._check(server_name, required)
+                if reason is None:
+                    self._reservations[server_name] = required
+                    self._fresh[server_name] = time.monotonic()
+                    return True, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False, reason
+                if on_wait is not None:
+                    on_wait(f"{reason} Start wartet auf frei werdenden Speicher.")
+                self._released.wait(min(remaining, 5.0)) # Freier Host-Speicher ändert sich auch ohne release()
+
+    def record(self, server_name, required):
+        """Übernimmt die Zusage eines schon laufenden Servers (z.B. nach einem Panel-Neustart) ohne Prüfung."""
+        with self._lock:
+            self._reservations[server_name] = required
+            self._fresh[server_name] = time.monotonic()
+
+    def settled(self, server_name):
+        """Der Server hat seinen Heap belegt (z.B. "Done" erreicht); er steckt nicht mehr in 'available'."""
+        with self._lock:
+            self._fresh.pop(server_name, None)
+
+    def release(self, server_name):
+        with self._lock:
+            self._fresh.pop(server_name, None)
+            if self._reservations.pop(server_name, None) is not None:
+                self._released.notify_all()
+
+    def snapshot(self):
+        with self._lock:
+            committed = sum(self._reservations.values())
+            return {
+                'host_memory_bytes': self.host_memory,
+                'headroom_bytes': self.headroom,
+                'capacity_bytes': self.capacity,
+                'committed_bytes': committed,
+                'free_bytes': max(0, self.capacity - committed),
+                'reservations': dict(self._reservations),
+            }
@@ -0,0 +1,276 @@
+# mc_panel/managers/cgroup_limits.py
+import os
+import re
+import threading
+
+from .jvm_profiles import parse_memory_size
+
+CGROUP_MOUNT = '/sys/fs/cgroup'
+CPU_PERIOD_USEC = 100000
+CONTROLLERS = ('cpu', 'memory', 'io')
+CPU_SET_PATTERN = re.compile(r'^\d+(-\d+)?(,\d+(-\d+)?)*$')
+
+
+def parse_cpu_set(text):
+    """'0-3,6' -> {0, 1, 2, 3, 6}; leer -> None. :raises ValueError: bei ungültiger Angabe"""
+    text = (text or '').replace(' ', '')
+    if not text:
+        return None
+    if not CPU_SET_PATTERN.match(text):
+        raise ValueError(f"Ungültiges CPU-Set '{text}' (Beispiel: 0-3,6).")
+    cpus = set()
+    for part in text.split(','):
+        first, _, last = part.partition('-')
+        first, last = int(first), int(last or first)
+        if last < first:
+            raise ValueError(f"Ungültiger Bereich '{part}' im CPU-Set.")
+        cpus.update(range(first, last + 1))
+    return cpus
+
+
+def normalize_limits(data, host_cpu_count=None):
+    """
+    Prüft die Limit-Angaben eines Servers.
+    :param data: dict mit 'cpu_set', 'cpu_quota' (Prozent eines Kerns), 'memory_max', 'io_weight'
+    :return: (True, normalisiertes dict) oder (False, Fehlermeldung)
+    """
+    result = {'cpu_set': '', 'cpu_quota': None, 'memory_max': '', 'io_weight': None}
+    try:
+        cpus = parse_cpu_set(data.get('cpu_set'))
+    except ValueError as e:
+        return False, str(e)
+    if cpus:
+        host_cpu_count = host_cpu_count or os.cpu_count() or 1
+        if max(cpus) >= host_cpu_count:
+            return False, f"CPU {max(cpus)} gibt es nicht (Host hat {host_cpu_count} Kerne, gezählt ab 0)."
+        result['cpu_set'] = str(data.get('cpu_set')).replace(' ', '')
+    if str(data.get('cpu_quota') or '').strip():
+        try:
+            quota = int(str(data['cpu_quota']).strip().rstrip('%'))
+        except ValueError:
+            return False, "CPU-Quota muss eine ganze Zahl in Prozent eines Kerns sein (z.B. 200 für zwei Kerne)."
+        if quota < 1:
+            return False, "CPU-Quota muss mindestens 1 % sein."
+        result['cpu_quota'] = quota
+    if str(data.get('memory_max') or '').strip():
+        memory_max = str(data['memory_max']).strip().upper()
+        if not parse_memory_size(memory_max):
+            return False, "Speicherobergrenze muss eine Zahl gefolgt von M oder G sein (z.B. 6G)."
+        result['memory_max'] = memory_max
+    if str(data.get('io_weight') or '').strip():
+        try:
+            weight = int(str(data['io_weight']).strip())
+        except ValueError:
+            return False, "IO-Gewicht muss eine ganze Zahl sein."
+        if not 1 <= weight <= 10000:
+            return False, "IO-Gewicht muss zwischen 1 und 10000 liegen (Standard: 100)."
+        result['io_weight'] = weight
+    return True, result
+
+
+def _read(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _write(path, value):
+    with open(path, 'w') as f:
+        f.write(str(value))
+
+
+def _keyed(text):
+    """'nr_periods 10\\nnr_throttled 2' -> {'nr_periods': 10, 'nr_throttled': 2}"""
+    values = {}
+    for line in (text or '').splitlines():
+        key, _, value = line.partition(' ')
+        if value.strip().lstrip('-').isdigit():
+            values[key] = int(value)
+    return values
+
+
+def place_process(pid, procs_path, cpus):
+    """
+    Verschiebt einen gerade gestarteten Prozess in seine cgroup und setzt die
+    CPU-Affinität aller seiner Threads. Läuft im Panel direkt nach Popen, nicht
+    als preexec_fn: zwischen fork und exec ist im Kind nur async-signal-sicherer
+    Code erlaubt, solange das Panel Threads hat (open/write können dort hängen).
+    Mit Aufpasser erledigt supervisor.py das vor dem Start des Servers selbst.
+    :return: Liste der Fehlermeldungen (leer bei Erfolg)
+    """
+    errors = []
+    if procs_path:
+        try:
+            _write(procs_path, pid)
+        except OSError as e:
+            errors.append(f"cgroup {procs_path}: {e}")
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        try:
+            tids = [int(tid) for tid in os.listdir(f'/proc/{pid}/task')]
+        except OSError:
+            tids = [pid]
+        for tid in tids: # Affinität gilt pro Thread; neue Threads erben sie
+            try:
+                os.sched_setaffinity(tid, cpus)
+            except ProcessLookupError:
+                pass
+            except OSError as e:
+                errors.append(f"CPU-Affinität: {e}")
+                break
+    return errors
+
+
+class CgroupLimiter:
+    """
+    Legt pro Server eine cgroup (v2) mc-<name> unterhalb eines delegierten
+    Teilbaums an und setzt dort cpu.max, memory.max und io.weight.
+
+    Ohne konfigurierten Teilbaum wird die cgroup des Panels verwendet: Das
+    Panel zieht dafür selbst in die Unter-cgroup "panel", weil cgroup v2
+    Prozesse nur in Blättern erlaubt, sobald Controller an Kinder delegiert
+    sind (unter systemd: Delegate=yes). Erkannt wird das erst beim ersten
+    Server mit Limits; ohne Limits ändert sich am Panel nichts.
+    """
+
+    def __init__(self, root=None, mount=CGROUP_MOUNT):
+        self.configured_root = root
+        self.mount = mount
+        self.root = None
+        self.controllers = set()
+        self.unavailable_reason = None
+        self._detected = False
+        self._lock = threading.Lock()
+
+    def _own_cgroup(self):
+        for line in (_read('/proc/self/cgroup') or '').splitlines():
+            if line.startswith('0::'):
+                return line[3:]
+        return None
+
+    def detect(self):
+        """:return: True, wenn cgroups für Server angelegt werden können (Ergebnis wird gemerkt)"""
+        with self._lock:
+            if not self._detected:
+                self._detected = True
+                try:
+                    self._setup()
+                except OSError as e:
+                    self.root = None
+                    self.unavailable_reason = f"cgroup-Teilbaum nicht nutzbar: {e}"
+                if self.unavailable_reason:
+                    print(f"WARNUNG: {self.unavailable_reason} Es wird nur die CPU-Affinität gesetzt.")
+            return self.root is not None
+
+    def _setup(self):
+        if os.name == 'nt' or not os.path.exists(os.path.join(self.mount, 'cgroup.controllers')):
+            self.unavailable_reason = "Kein cgroup v2 (unified) unter " + self.mount + "."
+            return
+        root = self.configured_root
+        if root is None:
+            own = self._own_cgroup()
+            if own is None:
+                self.unavailable_reason = "Eigene cgroup nicht ermittelbar."
+                return
+            root = os.path.join(self.mount, own.lstrip('/'))
+            if own != '/':
+                leaf = os.path.join(root, 'panel')
+                os.makedirs(leaf, exist_ok=True)
+                _write(os.path.join(leaf, 'cgroup.procs'), os.getpid())
+        available = set((_read(os.path.join(root, 'cgroup.controllers')) or '').split())
+        wanted = [c for c in CONTROLLERS if c in available]
+        if wanted:
+            _write(os.path.join(root, 'cgroup.subtree_control'), ' '.join('+' + c for c in wanted))
+        self.controllers = set((_read(os.path.join(root, 'cgroup.subtree_control')) or '').split())
+        if not self.controllers & set(CONTROLLERS):
+            self.unavailable_reason = f"In {root} sind weder cpu, memory noch io delegiert."
+            return
+        self.root = root
+
+    def path_for(self, server_name):
+        return os.path.join(self.root, f"mc-{server_name}") if self.root else None
+
+    def prepare(self, server_name, limits):
+        """
+        Legt die cgroup an und schreibt die Limits (nicht gesetzte werden aufgehoben).
+        :return: (True, Pfad der cgroup.procs) oder (False, Grund)
+        """
+        if not self.detect():
+            return False, self.unavailable_reason
+        path = self.path_for(server_name)
+        skipped = []
+        try:
+            os.makedirs(path, exist_ok=True)
+            if 'cpu' in self.controllers:
+                quota = limits.get('cpu_quota')
+                _write(os.path.join(path, 'cpu.max'),
+                       f"{quota * CPU_PERIOD_USEC // 100} {CPU_PERIOD_USEC}" if quota else f"max {CPU_PERIOD_USEC}")
+            elif limits.get('cpu_quota'):
+                skipped.append('cpu')
+            if 'memory' in self.controllers:
+                memory_max = parse_memory_size(limits.get('memory_max'))
+                _write(os.path.join(path, 'memory.max'), memory_max or 'max')
+                if os.path.exists(os.path.join(path, 'memory.swap.max')):
+                    # Eine harte Obergrenze soll nicht in den Swap ausweichen (GC-Pausen)
+                    _write(os.path.join(path, 'memory.swap.max'), 0 if memory_max else 'max')
+            elif limits.get('memory_max'):
+                skipped.append('memory')
+            if 'io' in self.controllers and os.path.exists(os.path.join(path, 'io.weight')):
+                _write(os.path.join(path, 'io.weight'), f"default {limits.get('io_weight') or 100}")
+            elif limits.get('io_weight'):
+                skipped.append('io')
+        except OSError as e:
+            return False, f"cgroup {path} konnte nicht eingerichtet werden: {e}"
+        if skipped:
+            print(f"WARNUNG: Controller {', '.join(skipped)} nicht verfügbar, Limits für '{server_name}' teilweise ohne Wirkung.")
+        return True, os.path.join(path, 'cgroup.procs')
+
+    def contains(self, server_name, pid):
+        """Prüft nach dem Start, ob der Prozess wirklich in seiner cgroup gelandet ist."""
+        cgroup = None
+        for line in (_read(f'/proc/{pid}/cgroup') or '').splitlines():
+            if line.startswith('0::'):
+                cgroup = line[3:]
+        path = self.path_for(server_name)
+        return bool(cgroup and path and os.path.join(self.mount, cgroup.lstrip('/')) == path)
+
+    def remove(self, server_name):
+        """Entfernt die (leere) cgroup nach dem Prozessende; Fehler sind egal."""
+        path = self.path_for(server_name)
+        if path:
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+
+    def read_stats(self, server_name):
+        """
+        Wirksame Limits und Drosselungszähler aus der cgroup (None ohne cgroup).
+        """
+        path = self.path_for(server_name)
+        if not path or not os.path.isdir(path):
+            return None
+        stats = {}
+        cpu_max = (_read(os.path.join(path, 'cpu.max')) or '').split()
+        if len(cpu_max) == 2 and cpu_max[0] != 'max':
+            stats['cpu_quota_percent'] = round(int(cpu_max[0]) * 100 / int(cpu_max[1]), 1)
+        cpu_stat = _keyed(_read(os.path.join(path, 'cpu.stat')))
+        if 'nr_periods' in cpu_stat:
+            stats['cpu_periods'] = cpu_stat['nr_periods']
+            stats['cpu_throttled_periods'] = cpu_stat.get('nr_throttled', 0)
+            stats['cpu_throttled_seconds'] = cpu_stat.get('throttled_usec', 0) / 1e6
+        memory_max = _read(os.path.join(path, 'memory.max'))
+        if memory_max and memory_max.isdigit():
+            stats['memory_max_bytes'] = int(memory_max)
+        memory_current = _read(os.path.join(path, 'memory.current'))
+        if memory_current and memory_current.isdigit():
+            stats['memory_current_bytes'] = int(memory_current)
+        memory_events = _keyed(_read(os.path.join(path, 'memory.events')))
+        if memory_events:
+            stats['memory_max_events'] = memory_events.get('max', 0)
+            stats['oom_kills'] = memory_events.get('oom_kill', 0)
+        io_weight = _keyed(_read(os.path.join(path, 'io.weight')))
+        if 'default' in io_weight:
+            stats['io_weight'] = io_weight['default']
+        return stats
@@ -0,0 +1,129 @@
+# mc_panel/managers/console_buffer.py
+import queue
+import threading
+from collections import deque
+from itertools import islice
+
+
+class ConsoleSubscription:
+    """
+    Live-Abonnement eines Konsolenpuffers (z.B. für einen SSE-Client).
+
+    Neue Zeilen landen als (seq, line) in einer begrenzten Queue. Ist die Queue
+    voll, weil der Client zu langsam liest, werden weitere Zeilen verworfen und
+    'overflowed' gesetzt; der Leser holt die Lücke dann per resync() aus dem
+    Ringpuffer nach.
+    """
+
+    def __init__(self, buffer, queue_size):
+        self.buffer = buffer
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.overflowed = False
+
+    def offer(self, seq, line):
+        try:
+            self.queue.put_nowait((seq, line))
+        except queue.Full:
+            self.overflowed = True
+
+    def resync(self, cursor):
+        """Verwirft die Queue und liefert alles ab cursor direkt aus dem Puffer."""
+        return self.buffer._resync(self, cursor)
+
+    def close(self):
+        self.buffer.unsubscribe(self)
+
+
+class ConsoleBuffer:
+    """
+    Ringpuffer für die Konsolenausgabe eines Servers.
+
+    Jede Zeile bekommt eine fortlaufende Sequenznummer. Clients merken sich die
+    nächste Nummer (Cursor) und holen mit since() nur die neuen Zeilen ab.
+    Ist der Puffer voll, fällt die älteste Zeile in O(1) heraus.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = max(1, int(capacity))
+        self._lines = deque(maxlen=self.capacity)
+        self._next_seq = 0 # Sequenznummer der nächsten Zeile
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    @property
+    def next_seq(self):
+        with self._lock:
+            return self._next_seq
+
+    def __len__(self):
+        with self._lock:
+            return len(self._lines)
+
+    def append(self, line):
+        """Hängt eine Zeile an und gibt ihre Sequenznummer zurück."""
+        with self._lock:
+            seq = self._next_seq
+            self._lines.append(line)
+            self._next_seq += 1
+            # Ein Fan-out für alle Zuschauer dieses Servers
+            for subscriber in self._subscribers:
+                subscriber.offer(seq, line)
+            return seq
+
+    @property
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(self, since=None, queue_size=500):
+        """
+        Registriert einen Live-Abonnenten. Rückstand ab 'since' und Anmeldung
+        passieren unter demselben Lock, damit keine Zeile verloren geht.
+        :return: (ConsoleSubscription, Rückstand wie bei since())
+        """
+        subscription = ConsoleSubscription(self, queue_size)
+        with self._lock:
+            self._subscribers.append(subscription)
+            return subscription, self._since_locked(since)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def _resync(self, subscription, cursor):
+        with self._lock:
+            while True:
+                try:
+                    subscription.queue.get_nowait()
+                except queue.Empty:
+                    break
+            subscription.overflowed = False
+            return self._since_locked(cursor)
+
+    def since(self, seq=None):
+        """
+        Liefert alle Zeilen ab Sequenznummer seq.
+        :return: dict mit 'lines', 'next' (neuer Cursor), 'missed' (Zeilen, die
+                 bereits aus dem Puffer gefallen sind) und 'reset' (Cursor ungültig,
+                 Client soll seine Anzeige leeren).
+        """
+        with self._lock:
+            return self._since_locked(seq)
+
+    def _since_locked(self, seq):
+        first_seq = self._next_seq - len(self._lines)
+        missed = 0
+        reset = False
+        if seq is None:
+            start = first_seq
+        elif seq > self._next_seq: # Cursor aus einem früheren Puffer (z.B. nach Panel-Neustart)
+            start = first_seq
+            reset = True
+        elif seq < first_seq:
+            start = first_seq
+            missed = first_seq - seq
+        else:
+            start = seq
+        lines = list(islice(self._lines, start - first_seq, None))
+        return {'lines': lines, 'next': self._next_seq, 'missed': missed, 'reset': reset}
@@ -0,0 +1,240 @@
+# mc_panel/managers/console_log.py
+import bisect
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from collections import deque
+
+# Jede Zeile beginnt mit einem UTC-Zeitstempel fester Breite, z.B.
+# "2026-10-17T12:00:00.123Z ". Dadurch lassen sich Zeitbereiche beim Scannen
+# per Bytevergleich prüfen, ohne jede Zeile zu parsen.
+TIMESTAMP_WIDTH = 24 # Länge des Zeitstempels ohne das folgende Leerzeichen
+_INDEX_RECORD = struct.Struct('<dQ') # (Zeitstempel, Byte-Offset des Zeilenanfangs)
+
+
+def format_timestamp(ts):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(ts)) + f'.{int(ts * 1000) % 1000:03d}Z'
+
+
+class ConsoleLog:
+    """
+    Persistentes, größenbasiert rotiertes Konsolen-Log eines Servers.
+
+    Neben jeder Logdatei liegt ein dünnbesetzter Index (.idx) mit
+    (Zeitstempel, Offset)-Paaren, etwa alle index_interval Bytes. Suchen
+    springen darüber direkt in den passenden Bereich und scannen die Datei
+    per mmap, sodass auch Gigabytes an Historie nicht in den Speicher geladen
+    werden.
+    """
+
+    def __init__(self, log_dir, base_name='console.log', max_bytes=50 * 1024 * 1024,
+                 backups=10, index_interval=64 * 1024):
+        self.log_dir = log_dir
+        self.base_name = base_name
+        self.max_bytes = max(1024, int(max_bytes))
+        self.backups = max(0, int(backups))
+        self.index_interval = max(1024, int(index_interval))
+        self._lock = threading.Lock()
+        self._file = None
+        self._index_file = None
+        self._size = 0
+        self._last_indexed_offset = None
+        self._last_flush = 0.0
+
+    # --- Schreiben ---
+
+    def _path(self, generation=0):
+        name = self.base_name if generation == 0 else f'{self.base_name}.{generation}'
+        return os.path.join(self.log_dir, name)
+
+    def _open(self):
+        os.makedirs(self.log_dir, exist_ok=True)
+        path = self._path()
+        self._file = open(path, 'ab')
+        self._index_file = open(path + '.idx', 'ab')
+        self._size = self._file.tell()
+        self._last_indexed_offset = None if self._size == 0 else self._size - self.index_interval
+
+    def _rotate(self):
+        self._close_files()
+        for generation in range(self.backups, 0, -1):
+            src = self._path(generation - 1)
+            dst = self._path(generation)
+            for suffix in ('', '.idx'):
+                if os.path.exists(src + suffix):
+                    os.replace(src + suffix, dst + suffix)
+        if self.backups == 0: # Keine Backups gewünscht: aktuelle Datei einfach verwerfen
+            for suffix in ('', '.idx'):
+                try:
+                    os.remove(self._path() + suffix)
+                except FileNotFoundError:
+                    pass
+        self._open()
+
+    def _close_files(self):
+        for f in (self._file, self._index_file):
+            if f is not None and not f.closed:
+                f.close()
+        self._file = None
+        self._index_file = None
+
+    def append(self, line, ts=None):
+        """Hängt eine Zeile (ohne Zeilenumbruch) mit Zeitstempel an."""
+        ts = time.time() if ts is None else ts
+        data = (format_timestamp(ts) + ' ' + line.replace('\n', ' ') + '\n').encode('utf-8', 'replace')
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._open()
+                if self._size > 0 and self._size + len(data) > self.max_bytes:
+                    self._rotate()
+                if self._last_indexed_offset is None or self._size - self._last_indexed_offset >= self.index_interval:
+                    self._index_file.write(_INDEX_RECORD.pack(ts, self._size))
+                    self._last_indexed_offset = self._size
+                self._file.write(data)
+                self._size += len(data)
+                if ts - self._last_flush >= 1.0:
+                    self._flush_locked()
+                    self._last_flush = ts
+            except OSError as e:
+                print(f"FEHLER: Konnte Konsolen-Log in '{self.log_dir}' nicht schreiben: {e}")
+                self._close_files()
+
+    def _flush_locked(self):
+        if self._file is not None:
+            self._file.flush()
+            self._index_file.flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._close_files()
+
+    # --- Suchen ---
+
+    def _read_index(self, path):
+        try:
+            with open(path + '.idx', 'rb') as f:
+                raw = f.read()
+        except OSError:
+            return []
+        usable = len(raw) - len(raw) % _INDEX_RECORD.size
+        return list(_INDEX_RECORD.iter_unpack(raw[:usable]))
+
+    def _byte_range(self, index, size, start, end):
+        """Grenzt per Index den Bereich [lo, hi) ein, der den Zeitraum enthalten kann."""
+        lo, hi = 0, size
+        if not index:
+            return lo, hi
+        timestamps = [ts for ts, _ in index]
+        if start is not None:
+            pos = bisect.bisect_right(timestamps, start) - 1
+            if pos >= 0:
+                lo = index[pos][1]
+        if end is not None:
+            pos = bisect.bisect_right(timestamps, end)
+            if pos < len(index):
+                hi = index[pos][1]
+        return lo, hi
+
+    def search(self, start=None, end=None, query=None, regex=False, ignore_case=False, limit=500):
+        """
+        Sucht im gesamten Log (inkl. rotierter Dateien) nach Zeilen im Zeitraum
+        [start, end] (Unix-Zeit, jeweils optional), die query enthalten bzw. auf
+        den regulären Ausdruck passen.
+        :return: dict mit 'matches' (die letzten 'limit' Treffer, chronologisch)
+                 und 'truncated' (es gab mehr Treffer).
+        """
+        pattern = None
+        needle = None
+        if query:
+            if regex or ignore_case:
+                flags = re.IGNORECASE if ignore_case else 0
+                source = query.encode('utf-8') if regex else re.escape(query.encode('utf-8'))
+                pattern = re.compile(source, flags) # re.error geht an den Aufrufer
+            else:
+                needle = query.encode('utf-8')
+        start_key = format_timestamp(start).encode('ascii') if start is not None else None
+        end_key = format_timestamp(end).encode('ascii') if end is not None else None
+
+        self.flush()
+        matches = deque(maxlen=max(1, int(limit)))
+        total = 0
+        for generation in range(self.backups, -1, -1): # Älteste Datei zuerst
+            path = self._path(generation)
+            try:
+                with open(path, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    if size == 0:
+                        continue
+                    index = self._read_index(path)
+                    if index and end is not None and index[0][0] > end:
+                        continue
+                    lo, hi = self._byte_range(index, size, start, end)
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        for line_start, line_end in self._scan(mm, lo, hi, needle, pattern, regex and pattern is not None):
+                            stamp = mm[line_start:line_start + TIMESTAMP_WIDTH]
+                            if start_key is not None and stamp < start_key:
+                                continue
+                            if end_key is not None and stamp > end_key:
+                                continue
+                            total += 1
+                            raw = mm[line_start:line_end].decode('utf-8', 'replace')
+                            matches.append({'ts': raw[:TIMESTAMP_WIDTH], 'line': raw[TIMESTAMP_WIDTH + 1:]})
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                print(f"WARNUNG: Konnte Konsolen-Log '{path}' nicht durchsuchen: {e}")
+        return {'matches': list(matches), 'truncated': total > len(matches)}
+
+    @staticmethod
+    def _scan(mm, lo, hi, needle, pattern, regex=False):
+        """
+        Liefert (Anfang, Ende) aller passenden Zeilen im Bereich [lo, hi).
+        Gesucht wird nur im Zeilentext hinter dem Zeitstempel. Reguläre Ausdrücke
+        werden zeilenweise geprüft, damit ^ und $ sich auf den Zeilentext beziehen.
+        """
+        # lo kann mitten in einer Zeile liegen, wenn der Index nicht exakt passt
+        if lo > 0 and mm[lo - 1:lo] != b'\n':
+            nl = mm.find(b'\n', lo, hi)
+            if nl == -1:
+                return
+            lo = nl + 1
+        pos = lo
+        while pos < hi:
+            if needle is not None:
+                hit = mm.find(needle, pos, hi)
+                if hit == -1:
+                    return
+            elif pattern is not None and not regex:
+                m = pattern.search(mm, pos, hi)
+                if m is None:
+                    return
+                hit = m.start()
+            else:
+                hit = pos # Jede Zeile ist ein Kandidat
+            line_start = mm.rfind(b'\n', lo, hit) + 1 if hit > lo else lo
+            line_start = max(line_start, lo)
+            line_end = mm.find(b'\n', hit, hi)
+            if line_end == -1:
+                line_end = hi
+            body = min(line_start + TIMESTAMP_WIDTH + 1, line_end)
+            if (needle is not None or pattern is not None) and (hit < body or regex):
+                # Treffer im Zeitstempel zählt nicht, nur der Zeilentext wird geprüft
+                if needle is not None:
+                    matched = mm.find(needle, body, line_end) != -1
+                elif regex:
+                    matched = pattern.search(mm[body:line_end]) is not None
+                else:
+                    matched = pattern.search(mm, body, line_end) is not None
+                if not matched:
+                    pos = line_end + 1
+                    continue
+            yield line_start, line_end
+            pos = line_end + 1
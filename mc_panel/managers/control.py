@@ -0,0 +1,412 @@
+# mc_panel/managers/control.py
+"""
+Steuerdienst: ein einzelner Prozess besitzt ServerManager und JarManager, die
+Web-Worker sprechen ihn über einen lokalen Unix-Socket an.
+
+Protokoll (eine JSON-Zeile pro Nachricht):
+
+    -> {"target": "server", "op": "call", "name": "submit_start", "args": [...], "kwargs": {...}}
+    <- {"ok": true, "result": ...}  bzw.  {"ok": false, "error": "...", "type": "ValueError"}
+
+"op" ist "call" (öffentliche Methode), "get" (freigegebenes Attribut) oder
+"describe" (Liste beider). Liefert eine Methode einen Generator (z.B.
+stream_console), antwortet der Dienst mit {"ok": true, "stream": true}, dann
+einer Zeile {"item": ...} pro Wert und zum Schluss {"end": true}; die
+Verbindung gehört danach allein diesem Strom. Ein Datei-Argument (Upload)
+wird als "upload": {"arg": Index, "filename": ...} angekündigt und folgt roh
+in Blöcken "<Länge hex>\\n<Bytes>", abgeschlossen durch "0\\n".
+"""
+import builtins
+import json
+import os
+import select
+import socket
+import socketserver
+import threading
+import types
+
+MAX_REQUEST_BYTES = 1024 * 1024 # Nur die JSON-Zeile; Uploads kommen in Blöcken hinterher
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+
+class ControlError(RuntimeError):
+    """Fehler, den der Steuerdienst bei der Ausführung gemeldet hat."""
+
+
+class ControlUnavailable(ConnectionError):
+    """Der Steuerdienst ist nicht erreichbar oder hat die Verbindung verloren."""
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return str(value)
+
+
+def _encode(message):
+    return json.dumps(message, default=_json_default, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class _UploadReader:
+    """Dateiähnliches read() über die Upload-Blöcke einer Anfrage."""
+
+    def __init__(self, rfile):
+        self._rfile = rfile
+        self._remaining = 0
+        self._done = False
+
+    def read(self, size=-1):
+        while not self._done and self._remaining == 0:
+            header = self._rfile.readline(32)
+            try:
+                self._remaining = int(header.strip(), 16)
+            except ValueError:
+                raise OSError("Upload-Block ohne gültige Länge.")
+            if self._remaining == 0:
+                self._done = True
+        if self._done:
+            return b''
+        size = self._remaining if size is None or size < 0 else min(size, self._remaining)
+        data = self._rfile.read(size)
+        if not data:
+            raise OSError("Verbindung während des Uploads abgebrochen.")
+        self._remaining -= len(data)
+        return data
+
+    def drain(self):
+        """Liest nicht verbrauchte Blöcke weg, damit die nächste Anfrage wieder an einer Zeilengrenze beginnt."""
+        while self.read(UPLOAD_BLOCK_SIZE):
+            pass
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+            if not line:
+                return
+            try:
+                if not line.endswith(b'\n'):
+                    raise ValueError("Anfrage zu lang.")
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Anfrage ist kein Objekt.")
+            except ValueError as e:
+                self.wfile.write(_encode({'ok': False, 'error': f"Ungültige Anfrage: {e}", 'type': 'ControlError'}))
+                return
+            try:
+                if not self.server.control.handle(request, self.rfile, self.wfile):
+                    return
+            except (ConnectionError, OSError): # Worker weg (z.B. Browser hat den Konsolenstrom geschlossen)
+                return
+
+
+class ControlServer:
+    """
+    Stellt die öffentlichen Methoden der Manager über einen Unix-Socket bereit.
+    Methoden mit führendem Unterstrich und nicht freigegebene Attribute sind
+    nicht erreichbar. Jede Verbindung bekommt einen eigenen Thread; die
+    Manager sind ohnehin für gleichzeitige Aufrufe aus mehreren Threads
+    gebaut (vorher waren das die Request-Threads von Flask).
+    """
+
+    def __init__(self, socket_path, targets, attributes=None):
+        """
+        :param targets: {Name: Manager-Instanz}, z.B. {'server': ServerManager, 'jar': JarManager}
+        :param attributes: {Name: (Attributname, ...)}, die per "get" gelesen werden dürfen
+        """
+        self.socket_path = socket_path
+        self.targets = dict(targets)
+        self.attributes = {name: frozenset(attrs) for name, attrs in (attributes or {}).items()}
+        self._server = None
+
+    def describe(self, target):
+        manager = self.targets[target]
+        methods = sorted(name for name in dir(type(manager))
+                         if not name.startswith('_') and callable(getattr(manager, name, None)))
+        return {'methods': methods, 'attributes': sorted(self.attributes.get(target, ()))}
+
+    def handle(self, request, rfile, wfile):
+        """
+        Beantwortet eine Anfrage.
+        :return: False, wenn die Verbindung danach geschlossen werden soll
+        """
+        upload = _UploadReader(rfile) if request.get('upload') else None
+        result = None
+        try:
+            result = self._invoke(request, upload)
+            response = {'ok': True, 'result': result}
+        except Exception as e:
+            if not isinstance(e, ControlError):
+                print(f"FEHLER: Steuerbefehl {request.get('target')}.{request.get('name')}: {e}")
+            response = {'ok': False, 'error': str(e), 'type': type(e).__name__}
+        finally:
+            if upload is not None:
+                upload.drain()
+        if not isinstance(result, types.GeneratorType):
+            wfile.write(_encode(response))
+            return True
+        try:
+            wfile.write(_encode({'ok': True, 'stream': True}))
+            for item in result:
+                wfile.write(_encode({'item': item}))
+            wfile.write(_encode({'end': True}))
+        finally:
+            result.close() # Gibt z.B. das Konsolen-Abo frei, sobald der Worker die Verbindung schließt
+        return False
+
+    def _invoke(self, request, upload):
+        target, op, name = request.get('target'), request.get('op'), request.get('name')
+        manager = self.targets.get(target)
+        if manager is None:
+            raise ControlError(f"Unbekanntes Ziel '{target}'.")
+        if op == 'describe':
+            return self.describe(target)
+        if not isinstance(name, str) or not name or name.startswith('_'):
+            raise ControlError(f"Ungültiger Name '{name}'.")
+        if op == 'get':
+            if name not in self.attributes.get(target, ()):
+                raise ControlError(f"Attribut '{target}.{name}' ist nicht freigegeben.")
+            return getattr(manager, name)
+        if op != 'call':
+            raise ControlError(f"Unbekannte Operation '{op}'.")
+        method = getattr(type(manager), name, None)
+        if method is None or not callable(method):
+            raise ControlError(f"Unbekannte Methode '{target}.{name}'.")
+        args = list(request.get('args') or [])
+        kwargs = dict(request.get('kwargs') or {})
+        if upload is not None:
+            spec = request['upload']
+            # Mit Dateiname wie Flasks FileStorage (save_jar), sonst ein reiner Datenstrom (append_upload)
+            value = upload if spec.get('filename') is None else types.SimpleNamespace(filename=spec['filename'], stream=upload)
+            args.insert(min(int(spec.get('arg', len(args))), len(args)), value)
+        return getattr(manager, name)(*args, **kwargs)
+
+    # --- Socket ---
+
+    def bind(self):
+        """
+        Legt den Socket an (nur für den eigenen Benutzer lesbar).
+        :raises OSError: wenn dort schon ein Steuerdienst lauscht
+        """
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            pass # Kein Dienst: ein übrig gebliebener Socket darf weg
+        else:
+            raise OSError(f"Auf {self.socket_path} läuft bereits ein Steuerdienst.")
+        finally:
+            probe.close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+        old_umask = os.umask(0o077) # Wer den Socket öffnen kann, kann alle Server steuern
+        try:
+            self._server = _UnixServer(self.socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+        self._server.control = self
+
+    def serve_forever(self):
+        if self._server is None:
+            self.bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self.close()
+
+    def start(self):
+        """Bedient den Socket in einem Hintergrund-Thread."""
+        if self._server is None:
+            self.bind()
+        threading.Thread(target=self._server.serve_forever, name='control-server', daemon=True).start()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+        self.close()
+
+    def close(self):
+        if self._server is None:
+            return
+        self._server.server_close()
+        self._server = None
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+class _Connection:
+    def __init__(self, socket_path, timeout):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(socket_path)
+        except OSError:
+            self.sock.close()
+            raise
+        self.rfile = self.sock.makefile('rb')
+
+    def alive(self):
+        """False, wenn die Gegenseite die gehaltene Verbindung inzwischen geschlossen hat."""
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+            if not readable: # Nichts zu lesen: Verbindung steht
+                return True
+            return self.sock.recv(1, socket.MSG_PEEK) != b''
+        except OSError:
+            return False
+
+    def send(self, data):
+        self.sock.sendall(data)
+
+    def receive(self):
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError("Steuerdienst hat die Verbindung geschlossen.")
+        return json.loads(line)
+
+    def close(self):
+        try:
+            self.rfile.close()
+        finally:
+            self.sock.close()
+
+
+def _upload_argument(args):
+    """Sucht ein Datei-Argument: FileStorage (hat filename und stream) oder ein Datenstrom mit read()."""
+    for index, value in enumerate(args):
+        if hasattr(value, 'filename') and hasattr(value, 'stream'):
+            return index, value.filename or '', value.stream
+        if hasattr(value, 'read'):
+            return index, None, value
+    return None
+
+
+class ControlClient:
+    """
+    Verbindung eines Web-Workers zum Steuerdienst. Jeder Thread hält eine eigene
+    Verbindung offen; Konsolenströme bekommen jeweils eine zusätzliche.
+    """
+
+    def __init__(self, socket_path, timeout=60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def manager(self, target):
+        return RemoteManager(self, target)
+
+    def _connect(self):
+        try:
+            return _Connection(self.socket_path, self.timeout)
+        except OSError as e:
+            raise ControlUnavailable(f"Steuerdienst unter {self.socket_path} nicht erreichbar: {e}") from e
+
+    def _drop(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection is not None:
+            connection.close()
+
+    def request(self, target, op, name=None, args=(), kwargs=None):
+        args = list(args)
+        upload = _upload_argument(args) if op == 'call' else None
+        if upload is not None:
+            index, filename, stream = upload
+            del args[index]
+        message = {'target': target, 'op': op, 'name': name, 'args': args, 'kwargs': kwargs or {}}
+        if upload is not None:
+            message['upload'] = {'arg': index, 'filename': filename}
+        payload = _encode(message)
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and not connection.alive(): # z.B. Steuerdienst neu gestartet
+            self._drop()
+            connection = None
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        try:
+            connection.send(payload)
+            if upload is not None:
+                for block in iter(lambda: stream.read(UPLOAD_BLOCK_SIZE), b''):
+                    connection.send(b'%x\n' % len(block) + block)
+                connection.send(b'0\n')
+            response = connection.receive()
+        except (OSError, ValueError) as e:
+            self._drop() # Antwort unvollständig: die Verbindung ist nicht mehr synchron
+            raise ControlUnavailable(f"Steuerdienst: {target}.{name} fehlgeschlagen: {e}") from e
+
+        if response.get('stream'):
+            self._local.connection = None # Gehört ab jetzt dem Generator
+            connection.sock.settimeout(None) # Der Dienst schickt selbst Heartbeats; Ende erkennt recv() an EOF
+            return self._iterate(connection)
+        if not response.get('ok'):
+            raise self._remote_error(response)
+        return response.get('result')
+
+    @staticmethod
+    def _remote_error(response):
+        error_type = getattr(builtins, response.get('type') or '', None)
+        if isinstance(error_type, type) and issubclass(error_type, Exception) and error_type is not ConnectionError:
+            return error_type(response.get('error'))
+        return ControlError(response.get('error'))
+
+    def _iterate(self, connection):
+        try:
+            while True:
+                try:
+                    message = connection.receive()
+                except (OSError, ValueError) as e:
+                    raise ControlUnavailable(f"Steuerdienst: Strom abgebrochen: {e}") from e
+                if 'item' in message:
+                    yield message['item']
+                elif message.get('end'):
+                    return
+                else:
+                    raise self._remote_error(message)
+        finally:
+            connection.close()
+
+
+class RemoteManager:
+    """
+    Stellvertreter für einen Manager im Steuerdienst: Methodenaufrufe und
+    freigegebene Attribute werden weitergereicht, sodass die Blueprints
+    unverändert bleiben. Tupel kommen als Listen zurück (Entpacken geht weiter).
+    """
+
+    def __init__(self, client, target):
+        self._client = client
+        self._target = target
+        self._description = None
+
+    def _describe(self):
+        if self._description is None:
+            description = self._client.request(self._target, 'describe')
+            self._description = (frozenset(description['methods']), frozenset(description['attributes']))
+        return self._description
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        methods, attributes = self._describe()
+        if name in attributes:
+            return self._client.request(self._target, 'get', name)
+        if name not in methods:
+            raise AttributeError(f"'{self._target}' hat kein öffentliches Attribut '{name}'")
+
+        def remote_call(*args, **kwargs):
+            return self._client.request(self._target, 'call', name, args, kwargs)
+        remote_call.__name__ = name
+        return remote_call
@@ -0,0 +1,214 @@
+# mc_panel/managers/hibernation.py
+import asyncio
+import struct
+import threading
+import time
+
+from ..utils.slp import (STATE_LOGIN, STATE_STATUS, STATE_TRANSFER, login_disconnect_packet, parse_handshake,
+                         pong_packet, read_packet, status_packet)
+
+CLIENT_TIMEOUT = 10.0 # Sekunden pro Paket; langsame oder stumme Verbindungen werden getrennt
+MAX_PACKET_BYTES = 32 * 1024 # Handshake, Statusanfrage und Login Start sind winzig
+
+
+class Hibernator:
+    """
+    Schickt leere Server schlafen und weckt sie beim ersten Login wieder auf.
+
+    Laufende Server mit Ruhezeit werden alle check_interval Sekunden auf ihre
+    Spielerzahl geprüft. Sind sie idle_timeout Sekunden ohne Spieler, wird
+    on_idle(server_name) aufgerufen (der ServerManager stoppt den Server dann
+    und ruft sleep()). Solange ein Server schläft, lauscht hier ein kleiner
+    asyncio-Server auf seinem Port: Statusanfragen bekommen ein "schläft"-MOTD,
+    ein Login-Versuch wird mit einer Meldung getrennt, der Port freigegeben
+    und on_wake(server_name) aufgerufen. Alle Platzhalter teilen sich eine
+    Ereignisschleife in einem eigenen Thread.
+    """
+
+    def __init__(self, idle_source, players_source, on_idle, on_wake, check_interval=30.0, host='',
+                 motd='Server schläft – zum Aufwecken verbinden', wake_message='Server wird gestartet, bitte in etwa einer Minute erneut verbinden.'):
+        """
+        :param idle_source: Callable -> {server_name: Ruhezeit in Sekunden} aller bereiten Server mit Ruhezeit
+        :param players_source: Callable(server_name) -> Spielerzahl oder None (unbekannt)
+        """
+        self.idle_source = idle_source
+        self.players_source = players_source
+        self.on_idle = on_idle
+        self.on_wake = on_wake
+        self.check_interval = max(1.0, float(check_interval))
+        self.host = host
+        self.motd = motd
+        self.wake_message = wake_message
+        self._idle_since = {} # server_name -> Zeitpunkt, seit dem keine Spieler online sind
+        self._reported = set() # Server, für die on_idle schon aufgerufen wurde
+        self._listeners = {} # server_name -> (asyncio.Server, Status-Infos)
+        self._lock = threading.Lock()
+        self._loop = None
+        self._ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._thread_main, name='hibernator', daemon=True)
+        self._thread.start()
+        self._ready.wait(5)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _thread_main(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._ready.set()
+        while not self._stop_event.is_set():
+            try:
+                self.check_idle()
+            except Exception as e: # Die Prüfung darf niemals sterben
+                print(f"FEHLER: Prüfung auf leere Server: {e}")
+            await asyncio.sleep(self.check_interval)
+        for name in list(self._listeners):
+            await self._close(name)
+
+    # --- Leerlauf erkennen ---
+
+    def check_idle(self, now=None):
+        now = time.monotonic() if now is None else now
+        targets = dict(self.idle_source())
+        with self._lock:
+            for name in list(self._idle_since):
+                if name not in targets:
+                    del self._idle_since[name]
+            self._reported &= set(targets)
+        due = []
+        for name, timeout in targets.items():
+            players = self.players_source(name)
+            with self._lock:
+                if players is None or players > 0: # Unbekannt zählt nicht als leer
+                    self._idle_since.pop(name, None)
+                    self._reported.discard(name)
+                    continue
+                since = self._idle_since.setdefault(name, now)
+                if now - since >= timeout and name not in self._reported:
+                    self._reported.add(name)
+                    due.append(name)
+        for name in due:
+            self.on_idle(name)
+
+    def idle_seconds(self, server_name):
+        """Sekunden ohne Spieler (None, solange Spieler online oder unbekannt)."""
+        with self._lock:
+            since = self._idle_since.get(server_name)
+        return round(time.monotonic() - since) if since is not None else None
+
+    def reset(self, server_name):
+        """Leerlaufzähler zurücksetzen (z.B. nach einem Neustart)."""
+        with self._lock:
+            self._idle_since.pop(server_name, None)
+            self._reported.discard(server_name)
+
+    # --- Platzhalter schlafender Server ---
+
+    def is_sleeping(self, server_name):
+        with self._lock:
+            return server_name in self._listeners
+
+    def sleeping(self):
+        with self._lock:
+            return sorted(self._listeners)
+
+    def sleep(self, server_name, port, info=None, timeout=5.0):
+        """
+        Lauscht auf dem Port des (gestoppten) Servers.
+        :param info: Optionales dict mit 'version', 'protocol' und 'max_players' für die Statusantwort
+        :return: (True, None) oder (False, Grund)
+        """
+        if self._loop is None:
+            return False, "Ruhezustand-Thread läuft nicht."
+        future = asyncio.run_coroutine_threadsafe(self._open(server_name, int(port), info or {}), self._loop)
+        try:
+            future.result(timeout)
+        except OSError as e:
+            return False, f"Port {port} konnte nicht belegt werden: {e}"
+        except Exception as e:
+            return False, f"Platzhalter für '{server_name}' nicht gestartet: {e}"
+        return True, None
+
+    def wake(self, server_name, timeout=5.0):
+        """
+        Beendet den Platzhalter und gibt den Port frei (ohne on_wake).
+        :return: True, wenn der Server geschlafen hat
+        """
+        if not self.is_sleeping(server_name) or self._loop is None:
+            return False
+        future = asyncio.run_coroutine_threadsafe(self._close(server_name), self._loop)
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            print(f"WARNUNG: Platzhalter von '{server_name}' nicht sauber beendet: {e}")
+            return True
+
+    async def _open(self, server_name, port, info):
+        await self._close(server_name)
+        server = await asyncio.start_server(
+            lambda reader, writer: self._handle_client(server_name, reader, writer), self.host or None, port)
+        with self._lock:
+            self._listeners[server_name] = (server, dict(info, port=port))
+
+    async def _close(self, server_name):
+        with self._lock:
+            entry = self._listeners.pop(server_name, None)
+        if entry is None:
+            return False
+        server = entry[0]
+        server.close()
+        try:
+            await asyncio.wait_for(server.wait_closed(), 2.0) # Ab 3.12 wartet das auch auf offene Verbindungen
+        except asyncio.TimeoutError:
+            pass
+        return True
+
+    def _status(self, server_name, protocol):
+        with self._lock:
+            entry = self._listeners.get(server_name)
+        info = entry[1] if entry else {}
+        return {
+            # Protokoll des Clients übernehmen, sonst zeigt er "veraltet"/"inkompatibel" statt des MOTDs
+            'version': {'name': info.get('version') or 'Schlafend', 'protocol': protocol if protocol > 0 else info.get('protocol') or 0},
+            'players': {'online': 0, 'max': int(info.get('max_players') or 20), 'sample': []},
+            'description': {'text': self.motd, 'color': 'gray'},
+        }
+
+    async def _handle_client(self, server_name, reader, writer):
+        waking = False
+        try:
+            packet_id, payload = await asyncio.wait_for(read_packet(reader, MAX_PACKET_BYTES), CLIENT_TIMEOUT)
+            if packet_id != 0x00:
+                return
+            handshake = parse_handshake(payload)
+            if handshake['next_state'] == STATE_STATUS:
+                while True:
+                    packet_id, payload = await asyncio.wait_for(read_packet(reader, MAX_PACKET_BYTES), CLIENT_TIMEOUT)
+                    if packet_id == 0x00:
+                        writer.write(status_packet(self._status(server_name, handshake['protocol'])))
+                    elif packet_id == 0x01:
+                        writer.write(pong_packet(payload))
+                        await writer.drain()
+                        return
+                    await writer.drain()
+            elif handshake['next_state'] in (STATE_LOGIN, STATE_TRANSFER):
+                writer.write(login_disconnect_packet(self.wake_message))
+                await writer.drain()
+                waking = True
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError, struct.error):
+            pass
+        finally:
+            writer.close()
+        if waking and await self._close(server_name): # Nur der erste Login weckt
+            print(f"INFO: Login-Versuch auf schlafendem Server '{server_name}', wird geweckt.")
+            # on_wake blockiert ggf. (Auftrag einreihen), nicht in der Ereignisschleife ausführen
+            asyncio.get_running_loop().run_in_executor(None, self.on_wake, server_name)
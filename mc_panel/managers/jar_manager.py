@@ -1,19 +1,327 @@
 # mc_panel/managers/jar_manager.py
+import hashlib
+import json
 import os
 import shutil
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
 from werkzeug.utils import secure_filename # Für sichere Dateinamen
+from .jar_metadata import read_jar_metadata, complete_from_filename
+
+try:
+    import fcntl # Für Reflinks (FICLONE), nur unter Unix verfügbar
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409 # ioctl aus linux/fs.h: Datei als Copy-on-Write-Klon anlegen (btrfs, XFS, ...)
+HASH_CHUNK_SIZE = 1024 * 1024
+UPLOAD_ID_CHARS = frozenset('0123456789abcdef')
+
+
+def _clone_or_copy(src, dst, allow_hardlink=True):
+    """
+    Legt dst als Reflink von src an, sonst als Hardlink (falls erlaubt), sonst als Kopie.
+    :return: 'reflink', 'hardlink' oder 'copy'
+    """
+    if fcntl is not None:
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return 'reflink'
+        except OSError:
+            try:
+                os.remove(dst)
+            except OSError:
+                pass
+    if allow_hardlink:
+        try:
+            os.link(src, dst)
+            return 'hardlink'
+        except OSError: # Anderes Dateisystem, keine Hardlinks unterstützt, ...
+            pass
+    shutil.copyfile(src, dst)
+    return 'copy'
+
 
 class JarManager:
-    def __init__(self, jars_dir):
+    """
+    Verwaltet die hochgeladenen JARs und einen inhaltsadressierten Speicher
+    (<jars_dir>/.store/<sha256>.jar) mit Referenzzählung pro Server.
+
+    Instanzen bekommen ihre server.jar als Reflink bzw. Hardlink auf das
+    gespeicherte Objekt statt einer eigenen Kopie; 100 Server mit derselben
+    Paper-JAR belegen den Platz also nur einmal. Der Wechsel auf eine andere
+    JAR ersetzt den Link atomar per os.replace().
+    """
+
+    def __init__(self, jars_dir, max_upload_bytes=512 * 1024 * 1024, upload_chunk_size=8 * 1024 * 1024,
+                 upload_stale_seconds=24 * 3600):
         self.jars_dir = jars_dir
+        self.store_dir = os.path.join(jars_dir, '.store')
+        self.uploads_dir = os.path.join(jars_dir, '.uploads') # Unfertige (fortsetzbare) Uploads
+        self.index_path = os.path.join(self.store_dir, 'index.json')
+        self.metadata_path = os.path.join(self.store_dir, 'metadata.json')
+        self.max_upload_bytes = int(max_upload_bytes)
+        self.upload_chunk_size = int(upload_chunk_size)
+        self.upload_stale_seconds = upload_stale_seconds
         os.makedirs(self.jars_dir, exist_ok=True)
+        os.makedirs(self.store_dir, exist_ok=True)
+        os.makedirs(self.uploads_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._index = self._load_index()
+        self._metadata = self._load_metadata() # jar_name -> {'size', 'mtime_ns', 'meta'}
+        self._metadata_dirty = False
+        self._uploads = {} # upload_id -> laufender SHA-256 (nur im Speicher, wird nach Neustart neu berechnet)
+        self._upload_locks = {}
 
-    def list_jars(self):
-        """Gibt eine Liste der verfügbaren JAR-Dateien zurück."""
+    # --- Inhaltsadressierter Speicher ---
+
+    def _load_index(self):
+        index = {'objects': {}, 'owners': {}, 'sources': {}}
+        try:
+            with open(self.index_path, 'r') as f:
+                loaded = json.load(f)
+            for key in index:
+                if isinstance(loaded.get(key), dict):
+                    index[key] = loaded[key]
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"WARNUNG: JAR-Index {self.index_path} nicht lesbar ({e}), wird neu aufgebaut.")
+        # Referenzzähler aus der Zuordnung Server -> Objekt ableiten, damit beides nie auseinanderläuft
+        for obj in index['objects'].values():
+            obj['refs'] = 0
+        for owner, sha in list(index['owners'].items()):
+            if sha in index['objects']:
+                index['objects'][sha]['refs'] += 1
+            else:
+                del index['owners'][owner]
+        return index
+
+    def _save_index(self):
+        self._save_json(self.index_path, self._index)
+
+    def _load_metadata(self):
+        try:
+            with open(self.metadata_path, 'r') as f:
+                loaded = json.load(f)
+            return loaded if isinstance(loaded, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"WARNUNG: JAR-Metadaten {self.metadata_path} nicht lesbar ({e}), werden neu eingelesen.")
+            return {}
+
+    def _save_json(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, prefix='.index-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"FEHLER: Konnte {path} nicht speichern: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _object_path(self, sha):
+        return os.path.join(self.store_dir, f'{sha}.jar')
+
+    @staticmethod
+    def hash_file(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _ingest(self, path, source_name=None, sha=None):
+        """
+        Legt den Inhalt von path im Speicher ab (falls noch nicht vorhanden).
+        Quell-JARs im sichtbaren Verzeichnis werden per Reflink oder Kopie
+        übernommen, nie per Hardlink, damit ein späteres Überschreiben der
+        Quelle nicht die laufenden Instanzen verändert.
+        :param sha: Bereits bekannter SHA-256 (z.B. beim Upload berechnet), spart das erneute Lesen.
+        :return: SHA-256 des Inhalts
+        """
+        stat = os.stat(path)
+        cached = self._index['sources'].get(source_name) if source_name else None
+        if cached and cached.get('size') == stat.st_size and cached.get('mtime_ns') == stat.st_mtime_ns \
+                and os.path.exists(self._object_path(cached.get('sha'))):
+            return cached['sha']
+
+        sha = sha or self.hash_file(path)
+        obj_path = self._object_path(sha)
+        if not os.path.exists(obj_path):
+            tmp_path = os.path.join(self.store_dir, f'.{sha}.tmp')
+            _clone_or_copy(path, tmp_path, allow_hardlink=False)
+            if os.name != 'nt':
+                os.chmod(tmp_path, 0o444) # Gemeinsam genutzte Objekte schreibgeschützt
+            os.replace(tmp_path, obj_path)
+        self._index['objects'].setdefault(sha, {'size': stat.st_size, 'refs': 0})
+        if source_name:
+            previous = self._index['sources'].get(source_name)
+            self._index['sources'][source_name] = {'sha': sha, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            if previous and previous.get('sha') != sha: # Unter gleichem Namen mit neuem Inhalt ersetzt
+                self._drop_if_unused_locked(previous.get('sha'))
+        return sha
+
+    def _drop_if_unused_locked(self, sha):
+        """Gibt das Objekt frei, wenn es weder ein Server noch eine hochgeladene JAR mehr benutzt."""
+        obj = self._index['objects'].get(sha)
+        if obj is None or obj['refs'] > 0:
+            return
+        if sha in {s.get('sha') for s in self._index['sources'].values()}:
+            return # Dieselbe JAR kann unter einem anderen Namen hochgeladen sein
+        del self._index['objects'][sha]
+        try:
+            os.remove(self._object_path(sha))
+        except OSError:
+            pass
+
+    def _release_locked(self, owner):
+        sha = self._index['owners'].pop(owner, None)
+        obj = self._index['objects'].get(sha)
+        if obj is None:
+            return
+        obj['refs'] = max(0, obj['refs'] - 1)
+        self._drop_if_unused_locked(sha)
+
+    def link_jar(self, owner, jar_name, destination):
+        """
+        Stellt die JAR jar_name als destination (z.B. <instanz>/server.jar) bereit
+        und merkt sie als von owner benutzt vor. Eine vorhandene Datei wird atomar
+        ersetzt; ein laufender Prozess behält die alte Datei bis zum Neustart.
+        :return: (True, 'reflink'|'hardlink'|'copy') oder (False, Fehlermeldung)
+        """
+        source_path = self.get_jar_path(jar_name)
+        if not source_path or not os.path.isfile(source_path):
+            return False, f"JAR-Datei '{jar_name}' nicht gefunden."
+        tmp_path = os.path.join(os.path.dirname(destination), '.server.jar.tmp')
+        with self._lock:
+            try:
+                sha = self._ingest(source_path, os.path.basename(source_path))
+                method = _clone_or_copy(self._object_path(sha), tmp_path)
+                os.replace(tmp_path, destination)
+            except OSError as e:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return False, f"Fehler beim Bereitstellen der JAR: {e}"
+            if self._index['owners'].get(owner) != sha:
+                self._release_locked(owner)
+                self._index['owners'][owner] = sha
+                self._index['objects'][sha]['refs'] += 1
+            self._save_index()
+        return True, method
+
+    def adopt_jar(self, owner, path):
+        """
+        Übernimmt eine bereits vorhandene (kopierte) server.jar in den Speicher und
+        ersetzt sie durch einen Link. Für Instanzen aus der Zeit vor dem Speicher.
+        :return: (True, Methode) oder (False, Meldung)
+        """
+        if not os.path.isfile(path):
+            return False, f"'{path}' nicht gefunden."
+        tmp_path = path + '.tmp'
+        with self._lock:
+            if owner in self._index['owners']:
+                return True, 'bereits verwaltet'
+            try:
+                sha = self._ingest(path)
+                method = _clone_or_copy(self._object_path(sha), tmp_path)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return False, f"Fehler beim Übernehmen von '{path}': {e}"
+            self._index['owners'][owner] = sha
+            self._index['objects'][sha]['refs'] += 1
+            self._save_index()
+        return True, method
+
+    def release_jar(self, owner):
+        """Gibt die Referenz eines (gelöschten) Servers frei."""
+        with self._lock:
+            if owner in self._index['owners']:
+                self._release_locked(owner)
+                self._save_index()
+
+    def is_managed(self, owner):
+        with self._lock:
+            return owner in self._index['owners']
+
+    def get_store_stats(self):
+        """Objekte, Referenzen und durch Deduplizierung gesparte Bytes."""
+        with self._lock:
+            objects = list(self._index['objects'].values())
+        stored = sum(o['size'] for o in objects)
+        referenced = sum(o['size'] * o['refs'] for o in objects)
+        return {
+            'objects': len(objects),
+            'references': sum(o['refs'] for o in objects),
+            'stored_bytes': stored,
+            'saved_bytes': max(0, referenced - stored),
+        }
+
+    def _scan_jars(self):
+        """ :return: {jar_name: os.stat_result} für alle JAR-Dateien in jars_dir """
+        jars = {}
         try:
-            return [f for f in os.listdir(self.jars_dir) if f.endswith('.jar') and os.path.isfile(os.path.join(self.jars_dir, f))]
+            with os.scandir(self.jars_dir) as entries: # d_type aus readdir, kein extra stat() pro Eintrag
+                for entry in entries:
+                    if entry.name.endswith('.jar') and not entry.name.startswith('.') and entry.is_file():
+                        jars[entry.name] = entry
         except OSError:
-            return []
+            pass
+        return jars
+
+    def list_jars(self):
+        """Gibt eine Liste der verfügbaren JAR-Dateien zurück."""
+        return sorted(self._scan_jars())
+
+    def list_jars_with_metadata(self):
+        """
+        Wie list_jars(), aber mit Software, Minecraft-Version und Build je JAR.
+        Die Angaben werden pro (Name, Größe, mtime) zwischengespeichert und nur für
+        neue oder geänderte Dateien aus dem Archiv gelesen.
+        :return: Liste von dicts mit 'name', 'size', 'software', 'mc_version', 'build', 'main_class'
+        """
+        result = []
+        jars = self._scan_jars()
+        with self._lock:
+            for name in sorted(jars):
+                try:
+                    stat = jars[name].stat()
+                except OSError:
+                    continue
+                cached = self._metadata.get(name)
+                if not cached or cached.get('size') != stat.st_size or cached.get('mtime_ns') != stat.st_mtime_ns:
+                    meta = complete_from_filename(read_jar_metadata(os.path.join(self.jars_dir, name)), name)
+                    cached = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'meta': meta}
+                    self._metadata[name] = cached
+                    self._metadata_dirty = True
+                result.append(dict(cached['meta'], name=name, size=stat.st_size))
+            for name in [n for n in self._metadata if n not in jars]: # Gelöschte JARs vergessen
+                del self._metadata[name]
+                self._metadata_dirty = True
+            if self._metadata_dirty:
+                self._save_json(self.metadata_path, self._metadata)
+                self._metadata_dirty = False
+        return result
+
+    def get_jar_metadata(self, jar_name):
+        for entry in self.list_jars_with_metadata():
+            if entry['name'] == jar_name:
+                return entry
+        return None
 
     def get_jar_path(self, jar_name):
         """Gibt den vollständigen Pfad zu einer JAR-Datei zurück, prüft auf Sicherheit."""
@@ -30,6 +338,62 @@ class JarManager:
         return os.path.join(self.jars_dir, safe_jar_name)
 
 
+    def _safe_upload_name(self, filename):
+        """ :return: (True, gesicherter Dateiname) oder (False, Fehlermeldung) """
+        filename = secure_filename(filename or '')
+        if not filename.endswith('.jar'): # Überprüfen, ob es nach secure_filename noch eine .jar ist
+            return False, 'Ungültiger Dateityp oder Dateiname. Nur .jar Dateien sind erlaubt.'
+        filepath = os.path.join(self.jars_dir, filename)
+        # Zusätzlicher Check, ob der Pfad immer noch im JARS_DIR ist (paranoider Check)
+        if os.path.commonprefix((os.path.realpath(filepath), os.path.realpath(self.jars_dir))) != os.path.realpath(self.jars_dir):
+            return False, 'Ungültiger Speicherpfad für JAR-Datei.'
+        return True, filename
+
+    def _copy_stream(self, stream, f, digest, written, limit):
+        """
+        Schreibt stream blockweise nach f und aktualisiert dabei den SHA-256.
+        :return: Gesamtzahl geschriebener Bytes
+        :raises ValueError: wenn limit überschritten wird
+        """
+        while True:
+            chunk = stream.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                return written
+            written += len(chunk)
+            if written > limit:
+                raise ValueError(f'Datei ist größer als erlaubt ({limit // (1024 * 1024)} MB).')
+            digest.update(chunk)
+            f.write(chunk)
+
+    @staticmethod
+    def _check_jar_archive(path):
+        """Prüft über das zentrale Verzeichnis, ob die Datei ein vollständiges ZIP/JAR ist."""
+        try:
+            with zipfile.ZipFile(path) as archive:
+                if not archive.infolist():
+                    return False, 'Die JAR-Datei ist leer.'
+        except (zipfile.BadZipFile, OSError) as e:
+            return False, f'Keine gültige JAR-Datei (unvollständig oder beschädigt): {e}'
+        return True, None
+
+    def _publish(self, tmp_path, filename, sha):
+        """Prüft die fertige Datei und benennt sie atomar in jars_dir um."""
+        ok, error = self._check_jar_archive(tmp_path)
+        if not ok:
+            os.remove(tmp_path)
+            return False, error
+        # Umbenennen statt Überschreiben an Ort und Stelle: neuer Inode, laufende
+        # Server und der JAR-Speicher sehen nie eine halb geschriebene Datei
+        filepath = os.path.join(self.jars_dir, filename)
+        os.replace(tmp_path, filepath)
+        try:
+            with self._lock:
+                self._ingest(filepath, filename, sha=sha)
+                self._save_index()
+        except OSError as e: # Nicht fatal, wird beim ersten Verwenden nachgeholt
+            print(f"WARNUNG: Konnte '{filename}' nicht in den JAR-Speicher übernehmen: {e}")
+        return True, filename
+
     def save_jar(self, file_storage):
         """
         Speichert eine hochgeladene JAR-Datei.
@@ -38,23 +402,179 @@ class JarManager:
         """
         if not file_storage or not file_storage.filename:
             return False, 'Keine Datei ausgewählt.'
-        
-        # Dateinamen zuerst sichern
-        filename = secure_filename(file_storage.filename)
-        if not filename.endswith('.jar'): # Überprüfen, ob es nach secure_filename noch eine .jar ist
-            return False, 'Ungültiger Dateityp oder Dateiname. Nur .jar Dateien sind erlaubt.'
-
-        filepath = os.path.join(self.jars_dir, filename)
-        
-        # Zusätzlicher Check, ob der Pfad immer noch im JARS_DIR ist (paranoider Check)
-        if os.path.commonprefix((os.path.realpath(filepath), os.path.realpath(self.jars_dir))) != os.path.realpath(self.jars_dir):
-            return False, 'Ungültiger Speicherpfad für JAR-Datei.'
+        ok, filename = self._safe_upload_name(file_storage.filename)
+        if not ok:
+            return False, filename
 
+        fd, tmp_path = tempfile.mkstemp(dir=self.uploads_dir, prefix='form-', suffix='.part')
+        digest = hashlib.sha256()
         try:
-            file_storage.save(filepath)
-            return True, filename
-        except Exception as e:
+            with os.fdopen(fd, 'wb') as f:
+                self._copy_stream(file_storage.stream, f, digest, 0, self.max_upload_bytes)
+        except (ValueError, OSError) as e:
+            os.remove(tmp_path)
             return False, f'Fehler beim Speichern der Datei: {e}'
+        return self._publish(tmp_path, filename, digest.hexdigest())
+
+    # --- Fortsetzbare Uploads in Teilstücken ---
+
+    def _upload_paths(self, upload_id):
+        if not upload_id or len(upload_id) != 32 or not set(upload_id) <= UPLOAD_ID_CHARS:
+            return None, None
+        base = os.path.join(self.uploads_dir, upload_id)
+        return base + '.part', base + '.json'
+
+    def _read_upload_meta(self, upload_id):
+        part_path, meta_path = self._upload_paths(upload_id)
+        if part_path is None:
+            return None
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            meta['offset'] = os.path.getsize(part_path) # Die Datei selbst ist maßgeblich
+        except (OSError, ValueError):
+            return None
+        meta['id'] = upload_id
+        return meta
+
+    def _cleanup_stale_uploads(self):
+        cutoff = time.time() - self.upload_stale_seconds
+        try:
+            entries = os.listdir(self.uploads_dir)
+        except OSError:
+            return
+        for entry in entries:
+            path = os.path.join(self.uploads_dir, entry)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    self._uploads.pop(entry.split('.')[0], None)
+            except OSError:
+                pass
+
+    def begin_upload(self, filename, total_size):
+        """
+        Legt einen fortsetzbaren Upload an.
+        :return: (True, Upload-Status-Dict) oder (False, Fehlermeldung)
+        """
+        ok, filename = self._safe_upload_name(filename)
+        if not ok:
+            return False, filename
+        try:
+            total_size = int(total_size)
+        except (TypeError, ValueError):
+            return False, 'Ungültige Dateigröße.'
+        if total_size <= 0:
+            return False, 'Die Datei ist leer.'
+        if total_size > self.max_upload_bytes:
+            return False, f'Datei ist größer als erlaubt ({self.max_upload_bytes // (1024 * 1024)} MB).'
+        self._cleanup_stale_uploads()
+
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path = self._upload_paths(upload_id)
+        meta = {'filename': filename, 'total_size': total_size, 'created_at': time.time()}
+        try:
+            open(part_path, 'wb').close()
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+        except OSError as e:
+            return False, f'Upload konnte nicht angelegt werden: {e}'
+        self._uploads[upload_id] = hashlib.sha256()
+        return True, dict(meta, id=upload_id, offset=0, chunk_size=self.upload_chunk_size)
+
+    def get_upload(self, upload_id):
+        meta = self._read_upload_meta(upload_id)
+        if meta is not None:
+            meta['chunk_size'] = self.upload_chunk_size
+        return meta
+
+    def _upload_lock(self, upload_id):
+        with self._lock:
+            return self._upload_locks.setdefault(upload_id, threading.Lock())
+
+    def append_upload(self, upload_id, offset, stream):
+        """
+        Hängt ein Teilstück an. offset muss dem bisher empfangenen Stand entsprechen;
+        sonst (z.B. nach einem Abbruch) meldet der Client sich mit dem aktuellen
+        Offset neu und setzt dort fort.
+        :return: (True, Status) oder (False, Fehlermeldung, Status oder None)
+        """
+        meta = self._read_upload_meta(upload_id)
+        if meta is None:
+            return False, 'Upload nicht gefunden oder abgelaufen.', None
+        part_path, _ = self._upload_paths(upload_id)
+        with self._upload_lock(upload_id):
+            meta = self._read_upload_meta(upload_id)
+            if offset != meta['offset']:
+                return False, f"Falscher Offset {offset}, erwartet {meta['offset']}.", meta
+            digest = self._uploads.get(upload_id)
+            if digest is None: # Nach einem Panel-Neustart: Hash über den bisherigen Teil neu aufbauen
+                digest = hashlib.sha256()
+                with open(part_path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+                        digest.update(chunk)
+            # Auf einer Kopie arbeiten, damit ein abgebrochenes Teilstück den Hash nicht verfälscht
+            working = digest.copy()
+            try:
+                with open(part_path, 'r+b') as f:
+                    f.seek(offset)
+                    written = self._copy_stream(stream, f, working, offset, meta['total_size'])
+            except (ValueError, OSError) as e:
+                with open(part_path, 'r+b') as f: # Auf den letzten bestätigten Stand zurücksetzen
+                    f.truncate(offset)
+                if isinstance(e, ValueError):
+                    e = f"Mehr Daten als die angekündigten {meta['total_size']} Bytes."
+                return False, str(e), self._read_upload_meta(upload_id)
+            self._uploads[upload_id] = working
+            meta['offset'] = written
+        return True, meta
+
+    def finish_upload(self, upload_id, expected_sha256=None):
+        """
+        Schließt einen vollständigen Upload ab: Prüfsumme und ZIP-Verzeichnis prüfen,
+        dann atomar in jars_dir umbenennen.
+        :return: (True, Dateiname) oder (False, Fehlermeldung)
+        """
+        meta = self._read_upload_meta(upload_id)
+        if meta is None:
+            return False, 'Upload nicht gefunden oder abgelaufen.'
+        part_path, meta_path = self._upload_paths(upload_id)
+        with self._upload_lock(upload_id):
+            if meta['offset'] != meta['total_size']:
+                return False, f"Upload unvollständig ({meta['offset']} von {meta['total_size']} Bytes)."
+            digest = self._uploads.pop(upload_id, None)
+            sha = digest.hexdigest() if digest is not None else self.hash_file(part_path)
+            if expected_sha256 and expected_sha256.lower() != sha:
+                self._discard_upload(upload_id)
+                return False, 'Prüfsumme stimmt nicht überein, Upload verworfen.'
+            try:
+                os.remove(meta_path)
+            except OSError:
+                pass
+            try:
+                return self._publish(part_path, meta['filename'], sha)
+            except OSError as e:
+                return False, f'Fehler beim Speichern der Datei: {e}'
+            finally:
+                with self._lock:
+                    self._upload_locks.pop(upload_id, None)
+
+    def _discard_upload(self, upload_id):
+        self._uploads.pop(upload_id, None)
+        for path in self._upload_paths(upload_id):
+            try:
+                os.remove(path)
+            except (OSError, TypeError):
+                pass
+
+    def abort_upload(self, upload_id):
+        if self._read_upload_meta(upload_id) is None:
+            return False, 'Upload nicht gefunden oder abgelaufen.'
+        with self._upload_lock(upload_id):
+            self._discard_upload(upload_id)
+        with self._lock:
+            self._upload_locks.pop(upload_id, None)
+        return True, 'Upload abgebrochen.'
 
 
     def delete_jar(self, jar_name):
@@ -78,6 +598,12 @@ class JarManager:
         if os.path.exists(jar_path) and os.path.isfile(jar_path):
             try:
                 os.remove(jar_path)
+                # Server, die diese JAR nutzen, behalten ihr Objekt im Speicher
+                with self._lock:
+                    source = self._index['sources'].pop(safe_jar_name, None)
+                    if source:
+                        self._drop_if_unused_locked(source.get('sha'))
+                    self._save_index()
                 return True, f"JAR-Datei '{safe_jar_name}' gelöscht."
             except Exception as e:
                 return False, f"Fehler beim Löschen der JAR-Datei '{safe_jar_name}': {e}"
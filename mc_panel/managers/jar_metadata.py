@@ -0,0 +1,138 @@
+# mc_panel/managers/jar_metadata.py
+import json
+import re
+import zipfile
+
+# Bekannte Main-Class-Einträge -> Server-Software
+MAIN_CLASS_SOFTWARE = {
+    'io.papermc.paperclip.Main': 'Paper',
+    'io.papermc.paperclip.Paperclip': 'Paper',
+    'net.minecraft.server.Main': 'Vanilla',
+    'net.minecraft.server.MinecraftServer': 'Vanilla',
+    'net.minecraft.bundler.Main': 'Vanilla',
+    'org.bukkit.craftbukkit.bootstrap.Main': 'Spigot',
+    'org.bukkit.craftbukkit.Main': 'CraftBukkit',
+    'net.fabricmc.installer.ServerLauncher': 'Fabric',
+    'net.fabricmc.loader.impl.launch.server.FabricServerLauncher': 'Fabric',
+    'net.minecraftforge.server.ServerMain': 'Forge',
+    'net.minecraftforge.installer.SimpleInstaller': 'Forge',
+    'net.neoforged.installer.SimpleInstaller': 'NeoForge',
+    'com.velocitypowered.proxy.Velocity': 'Velocity',
+    'net.md_5.bungee.Bootstrap': 'BungeeCord',
+}
+
+# Dateinamen mit Projektnamen, die (vor allem bei Paperclip) genauer sind als die Main-Class
+NAME_SOFTWARE = (
+    ('purpur', 'Purpur'), ('folia', 'Folia'), ('pufferfish', 'Pufferfish'), ('paper', 'Paper'),
+    ('spigot', 'Spigot'), ('craftbukkit', 'CraftBukkit'), ('fabric', 'Fabric'), ('neoforge', 'NeoForge'),
+    ('forge', 'Forge'), ('velocity', 'Velocity'), ('waterfall', 'Waterfall'), ('bungeecord', 'BungeeCord'),
+    ('minecraft_server', 'Vanilla'), ('vanilla', 'Vanilla'),
+)
+
+# "git-Paper-496 (MC: 1.20.4)" bzw. "git-Purpur-2176 (MC: 1.20.4)"
+IMPLEMENTATION_VERSION_PATTERN = re.compile(r'git-(\w+)-(\d+)\s*\(MC:\s*([\w.\-]+)\)')
+MC_VERSION_PATTERN = re.compile(r'(?<![\d.])(1\.\d{1,2}(?:\.\d{1,2})?)(?![\d.])')
+# Build-Nummer am Ende des Dateinamens, z.B. paper-1.20.4-496.jar
+FILENAME_BUILD_PATTERN = re.compile(r'(?:build|b)?[-_.](\d{1,5})\.jar$', re.IGNORECASE)
+
+
+def _parse_manifest(raw):
+    """Liest MANIFEST.MF inkl. Fortsetzungszeilen (beginnen mit einem Leerzeichen)."""
+    entries = {}
+    key = None
+    for line in raw.decode('utf-8', 'replace').splitlines():
+        if line.startswith(' ') and key:
+            entries[key] += line[1:]
+        elif ':' in line:
+            key, _, value = line.partition(':')
+            key = key.strip()
+            entries[key] = value.strip()
+        elif not line.strip(): # Ende der Hauptsektion
+            break
+    return entries
+
+
+def _read_member(archive, names, member, limit=256 * 1024):
+    if member not in names:
+        return None
+    info = archive.getinfo(member)
+    if info.file_size > limit: # Schutz vor riesigen bzw. präparierten Einträgen
+        return None
+    return archive.read(info)
+
+
+def read_jar_metadata(path):
+    """
+    Ermittelt Server-Software, Minecraft-Version und Build einer JAR. Gelesen
+    werden nur das zentrale ZIP-Verzeichnis und wenige kleine Einträge
+    (MANIFEST.MF, version.json, versions.list, install.properties).
+    :return: dict mit 'software', 'mc_version', 'build', 'main_class' (jeweils ggf. None)
+             und bei nicht lesbaren Dateien 'error'.
+    """
+    meta = {'software': None, 'mc_version': None, 'build': None, 'main_class': None}
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names = set(archive.namelist())
+            manifest_raw = _read_member(archive, names, 'META-INF/MANIFEST.MF')
+            manifest = _parse_manifest(manifest_raw) if manifest_raw else {}
+            version_raw = _read_member(archive, names, 'version.json')
+            versions_list = _read_member(archive, names, 'META-INF/versions.list')
+            install_props = _read_member(archive, names, 'install.properties')
+    except (zipfile.BadZipFile, OSError, KeyError) as e:
+        meta['error'] = str(e)
+        return meta
+
+    main_class = manifest.get('Main-Class')
+    meta['main_class'] = main_class
+    meta['software'] = MAIN_CLASS_SOFTWARE.get(main_class)
+
+    impl = IMPLEMENTATION_VERSION_PATTERN.search(manifest.get('Implementation-Version', ''))
+    if impl:
+        meta['software'], meta['build'], meta['mc_version'] = impl.group(1), impl.group(2), impl.group(3)
+    elif manifest.get('Implementation-Title') in ('Velocity', 'Waterfall', 'BungeeCord'):
+        meta['software'] = manifest['Implementation-Title']
+        meta['build'] = manifest.get('Implementation-Version')
+
+    if version_raw and not meta['mc_version']:
+        try:
+            version_info = json.loads(version_raw)
+            meta['mc_version'] = version_info.get('id') or version_info.get('name')
+        except ValueError:
+            pass
+    if versions_list and not meta['mc_version']:
+        # Zeilen "<sha256>\t<id>\t<pfad>", z.B. "...\t1.20.4\t1.20.4/server-1.20.4.jar"
+        for line in versions_list.decode('utf-8', 'replace').splitlines():
+            parts = line.split('\t')
+            if len(parts) >= 2:
+                match = MC_VERSION_PATTERN.search(parts[1])
+                if match:
+                    meta['mc_version'] = match.group(1)
+                    break
+    if install_props and not meta['mc_version']: # Fabric-Server-Launcher
+        for line in install_props.decode('utf-8', 'replace').splitlines():
+            key, _, value = line.partition('=')
+            if key.strip() == 'game-version':
+                meta['mc_version'] = value.strip()
+            elif key.strip() == 'fabric-loader-version' and not meta['build']:
+                meta['build'] = value.strip()
+    return meta
+
+
+def complete_from_filename(meta, filename):
+    """Ergänzt fehlende Angaben aus dem Dateinamen (z.B. purpur-1.21-2250.jar)."""
+    lowered = filename.lower()
+    for needle, software in NAME_SOFTWARE:
+        if needle in lowered:
+            # Paperclip-Forks (Purpur, Folia, ...) haben dieselbe Main-Class wie Paper
+            if meta.get('software') in (None, 'Paper'):
+                meta['software'] = software
+            break
+    version_match = MC_VERSION_PATTERN.search(filename)
+    if version_match and not meta.get('mc_version'):
+        meta['mc_version'] = version_match.group(1)
+    if not meta.get('build'):
+        match = FILENAME_BUILD_PATTERN.search(filename)
+        # Nicht die letzte Stelle der Version (paper-1.20.4.jar) als Build deuten
+        if match and (version_match is None or match.start() >= version_match.end()):
+            meta['build'] = match.group(1)
+    return meta
@@ -0,0 +1,198 @@
+# mc_panel/managers/job_manager.py
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """Ein Hintergrundauftrag (z.B. Server starten) mit Status und Meldung."""
+
+    def __init__(self, action, server_name, fn, args, kwargs):
+        self.id = uuid.uuid4().hex[:12]
+        self.action = action
+        self.server_name = server_name
+        self.state = 'queued' # queued | running | done | failed
+        self.message = 'Wartet auf Ausführung.'
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+        self._dedicated = False # Eigener Thread statt Pool (Aufträge, die lange warten können)
+
+    def set_message(self, message):
+        """Zwischenstand für laufende Aufträge (wird im UI angezeigt)."""
+        self.message = message
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'failed')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'action': self.action,
+            'server_name': self.server_name,
+            'state': self.state,
+            'message': self.message,
+            'result': self.result,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Führt Lifecycle-Aufträge in einem Thread-Pool aus, damit HTTP-Worker nie
+    auf stop/delete warten müssen.
+
+    Aufträge desselben Servers laufen strikt nacheinander (FIFO): solange ein
+    Auftrag für einen Server aktiv ist, warten weitere in einer Warteschlange
+    pro Server, ohne einen Pool-Thread zu blockieren.
+    """
+
+    def __init__(self, max_workers=4, history_limit=200):
+        self.history_limit = max(10, int(history_limit))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix='job')
+        self._jobs = OrderedDict() # job_id -> Job, älteste zuerst
+        self._current = {} # server_name -> Job, der gerade für diesen Server läuft
+        self._pending = {} # server_name -> deque[Job]
+        self._lock = threading.Lock()
+        self._job_finished = threading.Condition(self._lock)
+
+    def submit(self, action, server_name, fn, *args, **kwargs):
+        """
+        Reiht einen Auftrag ein. fn wird als fn(job, *args, **kwargs) aufgerufen und
+        muss (success, message) zurückgeben. server_name=None bedeutet: keine
+        Serialisierung pro Server.
+        :return: Job
+        """
+        return self._enqueue(Job(action, server_name, fn, args, kwargs))
+
+    def submit_blocking(self, action, server_name, fn, *args, **kwargs):
+        """
+        Wie submit() (seriell pro Server), aber in einem eigenen Thread statt im
+        Pool: für Aufträge, die lange auf etwas warten können (z.B. ein Start,
+        der auf freien Speicher wartet) und sonst Pool-Threads für die
+        Aufträge blockieren würden, auf die sie warten (z.B. Stopps).
+        """
+        job = Job(action, server_name, fn, args, kwargs)
+        job._dedicated = True
+        return self._enqueue(job)
+
+    def _enqueue(self, job):
+        server_name = job.server_name
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim_history()
+            if server_name is not None and server_name in self._current:
+                self._pending.setdefault(server_name, deque()).append(job)
+                job.message = 'Wartet auf vorherigen Auftrag für diesen Server.'
+                return job
+            if server_name is not None:
+                self._current[server_name] = job
+        self._launch(job)
+        return job
+
+    def _launch(self, job):
+        if job._dedicated:
+            threading.Thread(target=self._run, args=(job,), name=f'job-{job.action}', daemon=True).start()
+        else:
+            self._executor.submit(self._run, job)
+
+    def submit_dedicated(self, action, fn, *args, **kwargs):
+        """
+        Wie submit(), aber in einem eigenen Thread statt im Pool. Für lang laufende
+        Orchestrierungsaufträge (z.B. Massenstart), die selbst auf andere
+        Aufträge warten und sonst Pool-Threads blockieren würden.
+        """
+        job = Job(action, None, fn, args, kwargs)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim_history()
+        threading.Thread(target=self._run, args=(job,), name=f'job-{action}', daemon=True).start()
+        return job
+
+    def _trim_history(self):
+        if len(self._jobs) <= self.history_limit:
+            return
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.history_limit:
+                break
+            if self._jobs[job_id].finished: # Laufende/wartende Aufträge nie verwerfen
+                del self._jobs[job_id]
+
+    def _run(self, job):
+        job.state = 'running'
+        job.started_at = time.time()
+        job.message = 'Wird ausgeführt...'
+        try:
+            outcome = job._fn(job, *job._args, **job._kwargs)
+            success, message = outcome[0], outcome[1]
+            if len(outcome) > 2:
+                job.result = outcome[2]
+            job.state = 'done' if success else 'failed'
+            job.message = message
+        except Exception as e:
+            job.state = 'failed'
+            job.message = f"Unerwarteter Fehler: {e}"
+            print(f"FEHLER: Auftrag {job.action} für '{job.server_name}' fehlgeschlagen: {e}")
+        finally:
+            job.finished_at = time.time()
+            self._dispatch_next(job.server_name)
+
+    def _dispatch_next(self, server_name):
+        next_job = None
+        with self._lock:
+            if server_name is not None:
+                pending = self._pending.get(server_name)
+                if pending:
+                    next_job = pending.popleft()
+                    self._current[server_name] = next_job
+                else:
+                    self._pending.pop(server_name, None)
+                    self._current.pop(server_name, None)
+            self._job_finished.notify_all()
+        if next_job is not None:
+            self._launch(next_job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def list(self, server_name=None, limit=50):
+        """Die neuesten Aufträge (optional nur eines Servers), neueste zuerst."""
+        with self._lock:
+            jobs = [j for j in reversed(self._jobs.values()) if server_name is None or j.server_name == server_name]
+        return [j.to_dict() for j in jobs[:limit]]
+
+    def active_job(self, server_name):
+        """Der aktuelle Auftrag eines Servers (oder None)."""
+        with self._lock:
+            job = self._current.get(server_name)
+        return job.to_dict() if job else None
+
+    def active_count(self):
+        """Anzahl laufender oder wartender Aufträge."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def wait(self, job_id, timeout=None):
+        """Blockiert, bis der Auftrag fertig ist. :return: Job-Dict oder None"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job.finished:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._job_finished.wait(remaining)
+        return job.to_dict() if job else None
@@ -0,0 +1,197 @@
+# mc_panel/managers/jvm_profiles.py
+import os
+import re
+import subprocess
+import threading
+
+# Auswählbare Profile (Schlüssel -> Anzeigename)
+PROFILES = {
+    'none': 'Keins (JVM-Standard)',
+    'auto': 'Automatisch',
+    'aikar': "G1 (Aikar's Flags)",
+    'zgc': 'ZGC (große Heaps)',
+    'low_memory': 'Wenig Speicher',
+}
+DEFAULT_PROFILE = 'none' # Bestehende Instanzen starten weiter wie bisher
+
+GIB = 1024 ** 3
+MIB = 1024 ** 2
+SIZE_PATTERN = re.compile(r'^\s*(\d+)\s*([KMGT]?)B?\s*$', re.IGNORECASE)
+# 'openjdk version "21.0.2" 2024-01-16' bzw. 'java version "1.8.0_392"'
+JAVA_VERSION_PATTERN = re.compile(r'version "(\d+)(?:\.(\d+))?[^"]*"')
+
+# Aikar's Flags (https://docs.papermc.io/paper/aikars-flags), ohne die Werte, die von der Heapgröße abhängen
+AIKAR_FLAGS = (
+    '-XX:+UseG1GC', '-XX:+ParallelRefProcEnabled', '-XX:MaxGCPauseMillis=200',
+    '-XX:+UnlockExperimentalVMOptions', '-XX:+DisableExplicitGC', '-XX:G1HeapWastePercent=5',
+    '-XX:G1MixedGCCountTarget=4', '-XX:G1MixedGCLiveThresholdPercent=90', '-XX:SurvivorRatio=32',
+    '-XX:+PerfDisableSharedMem', '-XX:MaxTenuringThreshold=1',
+    '-Dusing.aikars.flags=https://mcflags.emc.gs', '-Daikars.new.flags=true',
+)
+
+
+def parse_memory_size(value):
+    """'2G', '512M', '1024' (Bytes) -> Bytes; ungültige Angaben -> None"""
+    match = SIZE_PATTERN.match(str(value or ''))
+    if not match:
+        return None
+    factor = {'': 1, 'K': 1024, 'M': MIB, 'G': GIB, 'T': 1024 * GIB}[match.group(2).upper()]
+    return int(match.group(1)) * factor
+
+
+_java_versions = {}
+_java_versions_lock = threading.Lock()
+
+
+def java_major_version(java='java', refresh=False):
+    """Hauptversion des JDK ("1.8" -> 8, "21.0.2" -> 21) oder None; das Ergebnis wird pro Programm gemerkt."""
+    with _java_versions_lock:
+        if not refresh and java in _java_versions:
+            return _java_versions[java]
+    version = None
+    try:
+        result = subprocess.run([java, '-version'], capture_output=True, text=True, timeout=15)
+        match = JAVA_VERSION_PATTERN.search(result.stderr + result.stdout)
+        if match:
+            major = int(match.group(1))
+            version = int(match.group(2) or 0) if major == 1 else major
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"WARNUNG: Java-Version von '{java}' konnte nicht ermittelt werden: {e}")
+    with _java_versions_lock:
+        _java_versions[java] = version
+    return version
+
+
+def _read_text(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _meminfo():
+    values = {}
+    for line in (_read_text('/proc/meminfo') or '').splitlines():
+        key, _, rest = line.partition(':')
+        parts = rest.split()
+        if parts and parts[0].isdigit():
+            values[key] = int(parts[0]) * (1024 if parts[1:] == ['kB'] else 1)
+    return values
+
+
+def host_facts():
+    """
+    Eckdaten des Hosts für die Profilauflösung.
+    :return: dict mit 'cpu_count' (für diesen Prozess nutzbare Kerne), 'memory_bytes',
+             'hugepages_free_bytes' (reservierte, freie Huge Pages) und 'thp' (Modus der
+             Transparent Huge Pages: 'always', 'madvise', 'never' oder None)
+    """
+    try:
+        cpu_count = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpu_count = os.cpu_count() or 1
+    meminfo = _meminfo()
+    memory_bytes = meminfo.get('MemTotal')
+    if memory_bytes is None:
+        try:
+            memory_bytes = os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (AttributeError, ValueError, OSError):
+            memory_bytes = None
+    thp_match = re.search(r'\[(\w+)\]', _read_text('/sys/kernel/mm/transparent_hugepage/enabled') or '')
+    return {
+        'cpu_count': cpu_count,
+        'memory_bytes': memory_bytes,
+        'hugepages_free_bytes': meminfo.get('HugePages_Free', 0) * meminfo.get('Hugepagesize', 0),
+        'thp': thp_match.group(1) if thp_match else None,
+    }
+
+
+def _g1_region_size_mb(heap_bytes, minimum_mb):
+    """Mindestens minimum_mb, höchstens 32 MB, aber groß genug für höchstens ~2048 Regionen."""
+    target = max(minimum_mb, heap_bytes / 2048 / MIB)
+    size = 1
+    while size < target:
+        size *= 2
+    return min(size, 32)
+
+
+def choose_profile(heap_bytes, java_version, cpu_count):
+    """Profil für 'auto': ZGC für große Heaps auf vielen Kernen, wenig Speicher für kleine Heaps, sonst G1."""
+    if heap_bytes < 2 * GIB:
+        return 'low_memory'
+    if heap_bytes >= 16 * GIB and (java_version or 0) >= 21 and cpu_count >= 4:
+        return 'zgc'
+    return 'aikar'
+
+
+def resolve_jvm_args(profile, ram_min, ram_max, java_version=None, host=None):
+    """
+    Übersetzt ein Profil in JVM-Argumente für diesen Host und dieses JDK.
+    :param java_version: Hauptversion des JDK oder None (unbekannt)
+    :param host: host_facts() oder None (wird dann ermittelt)
+    :return: dict mit 'profile' (aufgelöst, z.B. bei 'auto'), 'args' (ohne -Xms/-Xmx),
+             'ram_min', 'ram_max' und 'notes' (Begründungen und Warnungen)
+    """
+    if profile not in PROFILES:
+        profile = DEFAULT_PROFILE
+    host = host or host_facts()
+    heap_bytes = parse_memory_size(ram_max) or 2 * GIB
+    cpu_count = host['cpu_count']
+    notes = []
+    if profile == 'auto':
+        profile = choose_profile(heap_bytes, java_version, cpu_count)
+        notes.append(f"Automatisch gewählt: {PROFILES[profile]}.")
+    if profile == 'zgc' and (java_version or 0) < 15:
+        notes.append(f"ZGC braucht JDK 15 oder neuer (gefunden: {java_version or 'unbekannt'}), verwende G1.")
+        profile = 'aikar'
+
+    result = {'profile': profile, 'args': [], 'ram_min': ram_min, 'ram_max': ram_max, 'notes': notes}
+    if profile == 'none':
+        return result
+
+    args = result['args']
+    pretouch = True
+    if profile == 'aikar':
+        large_heap = heap_bytes >= 12 * GIB
+        args.extend(AIKAR_FLAGS)
+        args.extend([
+            f"-XX:G1NewSizePercent={40 if large_heap else 30}",
+            f"-XX:G1MaxNewSizePercent={50 if large_heap else 40}",
+            f"-XX:G1HeapRegionSize={_g1_region_size_mb(heap_bytes, 16 if large_heap else 8)}M",
+            f"-XX:G1ReservePercent={15 if large_heap else 20}",
+            f"-XX:InitiatingHeapOccupancyPercent={20 if large_heap else 15}",
+        ])
+        if java_version is not None and java_version < 20: # Ab JDK 20 entfernt, nur noch Warnung
+            args.append('-XX:G1RSetUpdatingPauseTimePercent=5')
+    elif profile == 'zgc':
+        args.extend(['-XX:+UseZGC', '-XX:+DisableExplicitGC', '-XX:+PerfDisableSharedMem'])
+        if 21 <= java_version < 23: # Generational ZGC ist ab JDK 23 Standard, vorher optional
+            args.append('-XX:+ZGenerational')
+        args.append(f"-XX:ConcGCThreads={max(1, cpu_count // 4)}")
+        if heap_bytes < 8 * GIB:
+            notes.append("ZGC lohnt sich erst bei großen Heaps; unter 8 GB ist G1 meist sparsamer.")
+        if cpu_count < 4:
+            notes.append(f"Nur {cpu_count} Kern(e): ZGC arbeitet nebenläufig und konkurriert mit dem Server-Thread.")
+    elif profile == 'low_memory':
+        # Kleine Heaps: weniger Overhead statt kurzer Pausen, Heap darf schrumpfen, kein Pre-Touch
+        pretouch = False
+        if cpu_count < 2:
+            args.append('-XX:+UseSerialGC')
+        else:
+            args.extend(['-XX:+UseG1GC', '-XX:MaxGCPauseMillis=100', '-XX:+UseStringDeduplication'])
+        args.extend(['-XX:+DisableExplicitGC', '-XX:ReservedCodeCacheSize=64m', '-XX:+PerfDisableSharedMem'])
+
+    if pretouch:
+        # Heap sofort vollständig belegen: keine Seitenfehler und keine Heap-Vergrößerung im laufenden Spiel
+        args.append('-XX:+AlwaysPreTouch')
+        result['ram_min'] = ram_max
+        if host['memory_bytes'] and heap_bytes > host['memory_bytes'] * 0.9:
+            notes.append("Heap ist fast so groß wie der Arbeitsspeicher des Hosts; mit Pre-Touch droht der OOM-Killer.")
+
+    if host['hugepages_free_bytes'] >= heap_bytes:
+        args.append('-XX:+UseLargePages')
+        notes.append("Reservierte Huge Pages reichen für den Heap: -XX:+UseLargePages.")
+    elif host['thp'] in ('always', 'madvise') and (java_version or 0) >= 11:
+        args.append('-XX:+UseTransparentHugePages')
+    return result
@@ -0,0 +1,222 @@
+# mc_panel/managers/metrics_history.py
+import json
+import math
+import os
+import sys
+import threading
+from array import array
+
+# Erfasste Größen pro Server, in dieser Reihenfolge gespeichert
+METRICS = ('tps', 'mspt', 'players', 'cpu', 'rss_mb')
+
+# (Name, Schrittweite in Sekunden, Anzahl Punkte): 15 Minuten, 24 Stunden, 30 Tage
+RESOLUTIONS = (('1s', 1, 900), ('1m', 60, 1440), ('1h', 3600, 720))
+
+FILE_FORMAT_VERSION = 1
+NAN = float('nan')
+
+
+class RingSeries:
+    """
+    Ringpuffer fester Größe für eine Auflösung: ein array('d') für die
+    Zeitstempel und eines pro Metrik. Fehlende Werte sind NaN. Speicherbedarf
+    und Schreibaufwand sind unabhängig davon, wie lange der Server läuft.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.head = 0 # Nächste Schreibposition
+        self.count = 0
+        self.timestamps = array('d', [NAN]) * size
+        self.values = {metric: array('d', [NAN]) * size for metric in METRICS}
+
+    def append(self, timestamp, values):
+        index = self.head
+        self.timestamps[index] = timestamp
+        for metric in METRICS:
+            value = values.get(metric)
+            self.values[metric][index] = NAN if value is None else value
+        self.head = (index + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    def last_timestamp(self):
+        return self.timestamps[(self.head - 1) % self.size] if self.count else None
+
+    def export(self, since=None):
+        """:return: dict mit 't' und einer Liste pro Metrik (älteste zuerst, NaN als None)"""
+        start = (self.head - self.count) % self.size
+        order = [(start + i) % self.size for i in range(self.count)]
+        if since is not None:
+            order = [i for i in order if self.timestamps[i] > since]
+        result = {'t': [self.timestamps[i] for i in order]}
+        for metric in METRICS:
+            column = self.values[metric]
+            result[metric] = [None if math.isnan(column[i]) else round(column[i], 3) for i in order]
+        return result
+
+    def arrays(self):
+        yield self.timestamps
+        for metric in METRICS:
+            yield self.values[metric]
+
+
+class _Accumulator:
+    """Summen und Anzahlen für den gerade laufenden Rollup-Zeitraum."""
+
+    def __init__(self):
+        self.bucket = None
+        self.sums = dict.fromkeys(METRICS, 0.0)
+        self.counts = dict.fromkeys(METRICS, 0)
+
+    def add(self, values):
+        for metric in METRICS:
+            value = values.get(metric)
+            if value is not None and not math.isnan(value):
+                self.sums[metric] += value
+                self.counts[metric] += 1
+
+    def means(self):
+        return {m: (self.sums[m] / self.counts[m]) if self.counts[m] else None for m in METRICS}
+
+    def reset(self, bucket):
+        self.bucket = bucket
+        self.sums = dict.fromkeys(METRICS, 0.0)
+        self.counts = dict.fromkeys(METRICS, 0)
+
+    def to_dict(self):
+        return {'bucket': self.bucket, 'sums': self.sums, 'counts': self.counts}
+
+    def load(self, data):
+        self.bucket = data.get('bucket')
+        self.sums.update({m: float(v) for m, v in data.get('sums', {}).items() if m in self.sums})
+        self.counts.update({m: int(v) for m, v in data.get('counts', {}).items() if m in self.counts})
+
+
+class ServerHistory:
+    """
+    Zeitreihen eines Servers in drei Auflösungen. Jeder Messpunkt landet im
+    Sekunden-Ring; Minuten- und Stundenwerte sind Mittelwerte, die beim
+    Wechsel in den nächsten Zeitraum abgeschlossen werden.
+    """
+
+    def __init__(self):
+        self.rings = {name: RingSeries(size) for name, _, size in RESOLUTIONS}
+        self._accumulators = {name: _Accumulator() for name, _, _ in RESOLUTIONS[1:]}
+
+    def add(self, timestamp, values):
+        self.rings[RESOLUTIONS[0][0]].append(timestamp, values)
+        carry = values
+        for name, step, _ in RESOLUTIONS[1:]:
+            accumulator = self._accumulators[name]
+            bucket = int(timestamp // step) * step
+            finished = None
+            if accumulator.bucket is not None and bucket != accumulator.bucket:
+                finished = (accumulator.bucket, accumulator.means())
+                self.rings[name].append(*finished)
+                accumulator.reset(bucket)
+            elif accumulator.bucket is None:
+                accumulator.reset(bucket)
+            accumulator.add(carry)
+            if finished is None:
+                break # Gröbere Auflösungen ändern sich erst, wenn diese einen Zeitraum abschließt
+            timestamp, carry = finished # Der abgeschlossene Zeitraum zählt zu seiner eigenen Stunde
+
+    def export(self, resolution, since=None):
+        return self.rings[resolution].export(since)
+
+    def save(self, path):
+        header = {
+            'version': FILE_FORMAT_VERSION,
+            'metrics': list(METRICS),
+            'byteorder': sys.byteorder,
+            'rings': {name: {'size': ring.size, 'head': ring.head, 'count': ring.count}
+                      for name, ring in self.rings.items()},
+            'accumulators': {name: acc.to_dict() for name, acc in self._accumulators.items()},
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for name, _, _ in RESOLUTIONS:
+                for column in self.rings[name].arrays():
+                    column.tofile(f)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """Lädt eine gespeicherte Historie; passt das Format nicht, bleibt sie leer. :return: bool"""
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                if (header.get('version') != FILE_FORMAT_VERSION or header.get('metrics') != list(METRICS)
+                        or header.get('byteorder') != sys.byteorder):
+                    return False
+                rings = {}
+                for name, _, size in RESOLUTIONS:
+                    meta = header['rings'].get(name)
+                    if not meta or meta['size'] != size:
+                        return False
+                    ring = RingSeries(size)
+                    for column in ring.arrays():
+                        loaded = array('d')
+                        loaded.fromfile(f, size)
+                        column[:] = loaded
+                    ring.head, ring.count = int(meta['head']) % size, min(int(meta['count']), size)
+                    rings[name] = ring
+            for name, data in header.get('accumulators', {}).items():
+                if name in self._accumulators:
+                    self._accumulators[name].load(data)
+        except (OSError, ValueError, KeyError, EOFError):
+            return False
+        self.rings = rings
+        return True
+
+
+class MetricsHistory:
+    """
+    Verwaltet die ServerHistory aller Server und speichert sie als
+    <instanz>/.panel/history.bin (JSON-Kopfzeile plus rohe Arrays).
+    """
+
+    def __init__(self, path_for):
+        """:param path_for: Callable(server_name) -> Pfad der Historiendatei"""
+        self.path_for = path_for
+        self._histories = {}
+        self._lock = threading.Lock()
+
+    def _get(self, server_name, create=True):
+        history = self._histories.get(server_name)
+        if history is None and create:
+            history = ServerHistory()
+            try:
+                history.load(self.path_for(server_name))
+            except ValueError: # Ungültiger Servername
+                pass
+            self._histories[server_name] = history
+        return history
+
+    def add(self, server_name, timestamp, values):
+        with self._lock:
+            self._get(server_name).add(timestamp, values)
+
+    def export(self, server_names, resolution, since=None):
+        """:return: {server_name: {'t': [...], 'tps': [...], ...}}"""
+        result = {}
+        with self._lock:
+            for name in server_names:
+                history = self._get(name)
+                result[name] = history.export(resolution, since)
+        return result
+
+    def forget(self, server_name):
+        with self._lock:
+            self._histories.pop(server_name, None)
+
+    def save_all(self):
+        with self._lock:
+            items = list(self._histories.items())
+            for name, history in items:
+                try:
+                    path = self.path_for(name)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    history.save(path)
+                except (OSError, ValueError) as e:
+                    print(f"WARNUNG: Verlauf von '{name}' konnte nicht gespeichert werden: {e}")
@@ -0,0 +1,166 @@
+# mc_panel/managers/output_multiplexer.py
+import os
+import selectors
+import threading
+from collections import deque
+
+
+class OutputMultiplexer:
+    """
+    Ein einziger I/O-Thread für die Ausgabe aller Serverprozesse.
+
+    Alle stdout-Pipes werden im binären, nicht-blockierenden Modus bei einem
+    Selector (epoll unter Linux) registriert. Pro Lesevorgang werden bis zu
+    read_size Bytes gelesen, in einem Schritt dekodiert und in Zeilen zerlegt,
+    sodass Thread-Anzahl und CPU-Last nicht mit der Zahl der Server wachsen.
+    Außerdem überwacht der Thread beendete Prozesse (watch_exit), damit auch
+    dafür kein eigener Thread pro Server nötig ist.
+    """
+
+    def __init__(self, read_size=64 * 1024, max_line_bytes=1024 * 1024, exit_poll_interval=0.5):
+        self.read_size = read_size
+        self.max_line_bytes = max_line_bytes
+        self.exit_poll_interval = exit_poll_interval
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        os.set_blocking(self._wakeup_w, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._ops = deque() # Registrierungen aus anderen Threads, ausgeführt im I/O-Thread
+        self._partials = {} # fd -> unvollständige letzte Zeile (bytes)
+        self._exit_watches = [] # (process, callback)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='output-mux', daemon=True)
+        self._thread.start()
+
+    # --- API für andere Threads ---
+
+    def register(self, fileobj, server_name, on_lines, on_eof):
+        """
+        Überwacht fileobj (Pipe oder Socket) und ruft on_lines(server_name, [str, ...])
+        für jede Gruppe vollständiger Zeilen auf, bei EOF einmalig on_eof(server_name).
+        Beide Callbacks laufen im I/O-Thread und dürfen nicht blockieren.
+        """
+        fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+        os.set_blocking(fd, False)
+        self._submit(('register', fd, (server_name, on_lines, on_eof)))
+
+    def watch_exit(self, process, callback):
+        """Ruft callback() im I/O-Thread auf, sobald process.poll() nicht mehr None ist."""
+        with self._lock:
+            self._exit_watches.append((process, callback))
+        self._wake()
+
+    @property
+    def registered_count(self):
+        return max(0, len(self._selector.get_map()) - 1)
+
+    @property
+    def backlog_bytes(self):
+        """Bytes unvollständiger Zeilen, die noch auf ihren Zeilenumbruch warten."""
+        return sum(len(p) for p in list(self._partials.values()))
+
+    def _submit(self, op):
+        with self._lock:
+            self._ops.append(op)
+        self._wake()
+
+    def _wake(self):
+        try:
+            os.write(self._wakeup_w, b'\0')
+        except BlockingIOError: # Pipe voll: der I/O-Thread wird ohnehin geweckt
+            pass
+
+    # --- I/O-Thread ---
+
+    def _run(self):
+        while True:
+            try:
+                events = self._selector.select(timeout=self.exit_poll_interval)
+                self._apply_ops()
+                for key, _ in events:
+                    if key.fd == self._wakeup_r:
+                        self._drain_wakeup()
+                    else:
+                        self._read(key)
+                self._check_exits()
+            except Exception as e: # Der I/O-Thread darf nie sterben, sonst verstummen alle Konsolen
+                print(f"FEHLER: Ausgabe-Multiplexer: {e}")
+
+    def _apply_ops(self):
+        while True:
+            with self._lock:
+                if not self._ops:
+                    return
+                action, fd, data = self._ops.popleft()
+            if action == 'register':
+                try:
+                    self._selector.register(fd, selectors.EVENT_READ, data)
+                    self._partials[fd] = b''
+                except (ValueError, KeyError, OSError) as e:
+                    print(f"WARNUNG: Konnte Ausgabe von '{data[0]}' nicht überwachen: {e}")
+
+    def _drain_wakeup(self):
+        try:
+            while os.read(self._wakeup_r, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _read(self, key):
+        server_name, on_lines, on_eof = key.data
+        try:
+            data = os.read(key.fd, self.read_size)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+
+        if not data: # EOF: Rest ausliefern, abmelden
+            rest = self._partials.pop(key.fd, b'')
+            self._selector.unregister(key.fd)
+            if rest:
+                self._dispatch(server_name, on_lines, rest + b'\n')
+            try:
+                on_eof(server_name)
+            except Exception as e:
+                print(f"FEHLER: EOF-Verarbeitung für '{server_name}': {e}")
+            return
+
+        buffered = self._partials.get(key.fd, b'') + data
+        cut = buffered.rfind(b'\n') + 1
+        if cut == 0 and len(buffered) > self.max_line_bytes: # Überlange Zeile ohne Umbruch zwangsweise ausgeben
+            cut = len(buffered)
+        self._partials[key.fd] = buffered[cut:]
+        if cut:
+            self._dispatch(server_name, on_lines, buffered[:cut])
+
+    @staticmethod
+    def _dispatch(server_name, on_lines, chunk):
+        # Ein decode() für den ganzen Block statt einmal pro Zeile
+        lines = [line.strip() for line in chunk.decode('utf-8', 'replace').split('\n')]
+        lines = [line for line in lines if line]
+        if lines:
+            try:
+                on_lines(server_name, lines)
+            except Exception as e:
+                print(f"FEHLER: Verarbeitung der Ausgabe von '{server_name}': {e}")
+
+    def _check_exits(self):
+        with self._lock:
+            if not self._exit_watches:
+                return
+            watches = self._exit_watches
+            self._exit_watches = []
+        remaining = []
+        for process, callback in watches:
+            if process.poll() is None:
+                remaining.append((process, callback))
+                continue
+            try:
+                callback()
+            except Exception as e:
+                print(f"FEHLER: Prozessende-Verarbeitung: {e}")
+        if remaining:
+            with self._lock:
+                self._exit_watches.extend(remaining)
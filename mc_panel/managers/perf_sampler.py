@@ -0,0 +1,232 @@
+# mc_panel/managers/perf_sampler.py
+import atexit
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+COLOR_CODE_PATTERN = re.compile(r'§.')
+# Vanilla: "There are 3 of a max of 20 players online: ...", Paper: "There are 3 out of maximum 20 players online."
+LIST_PATTERN = re.compile(r'There are (\d+)\D+?(\d+) players online')
+# Paper: "TPS from last 1m, 5m, 15m: 20.0, 19.98, *20.0"
+PAPER_TPS_PATTERN = re.compile(r'TPS from last[^:]*:\s*\*?([\d.]+)')
+# Paper: "Server tick times (avg/min/max) from last 5s, 10s, 1m: ◴ 2.3/1.1/5.6, ..."
+PAPER_MSPT_PATTERN = re.compile(r'([\d.]+)/[\d.]+/[\d.]+')
+# Vanilla ab 1.20.3 ("tick query"): "Target tick rate: 20.0 per second." / "Average time per tick: 3.4ms"
+TICK_RATE_PATTERN = re.compile(r'Target tick rate:\s*([\d.]+)')
+TICK_TIME_PATTERN = re.compile(r'Average time per tick:\s*([\d.]+)\s*ms')
+# "Can't keep up! Is the server overloaded? Running 2345ms or 46 ticks behind"
+CANT_KEEP_UP_PATTERN = re.compile(r"Can't keep up!.*?(\d+)\s*ticks behind")
+JOIN_PATTERN = re.compile(r'\]: (\S+) joined the game')
+LEAVE_PATTERN = re.compile(r'\]: (\S+) left the game')
+
+TARGET_TPS = 20.0
+LAG_WARNING_MIN_WINDOW = 15.0 # Minecraft meldet "Can't keep up!" höchstens alle 15 Sekunden
+
+
+def _clean(text):
+    return COLOR_CODE_PATTERN.sub('', text or '')
+
+
+def parse_player_list(text):
+    match = LIST_PATTERN.search(_clean(text))
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def parse_paper_tps(text):
+    match = PAPER_TPS_PATTERN.search(_clean(text))
+    return float(match.group(1)) if match else None
+
+
+def parse_paper_mspt(text):
+    match = PAPER_MSPT_PATTERN.search(_clean(text))
+    return float(match.group(1)) if match else None
+
+
+def parse_tick_query(text):
+    """:return: (tps, mspt) aus der Ausgabe von "tick query" oder None"""
+    text = _clean(text)
+    mspt_match = TICK_TIME_PATTERN.search(text)
+    if not mspt_match:
+        return None
+    mspt = float(mspt_match.group(1))
+    rate_match = TICK_RATE_PATTERN.search(text)
+    target = float(rate_match.group(1)) if rate_match else TARGET_TPS
+    return (min(target, 1000.0 / mspt) if mspt > 0 else target), mspt
+
+
+class PerformanceSampler:
+    """
+    Erfasst TPS, mittlere Tickdauer (MSPT) und Spielerzahl aller laufenden
+    Server und schreibt sie zusammen mit CPU/RAM aus dem Ressourcen-Cache
+    jede Sekunde in die MetricsHistory.
+
+    Abgefragt wird per RCON: einmal pro Server wird ermittelt, ob "tps"/"mspt"
+    (Paper und Forks) oder "tick query" (Vanilla ab 1.20.3) funktioniert, danach
+    nur noch der passende Befehl plus "list" in einer Pipeline. Ohne RCON werden
+    "Can't keep up!"- sowie Join/Leave-Zeilen der Konsole ausgewertet.
+    """
+
+    def __init__(self, running_source, rcon_query, resource_source, history,
+                 interval=1.0, poll_interval=5.0, persist_interval=60.0, poll_workers=4):
+        """
+        :param running_source: Callable -> {server_name: bereit (bool)} aller laufenden Server
+        :param rcon_query: Callable(server_name, [Befehle]) -> [Antworten] oder None ohne RCON
+        :param resource_source: Callable(server_name) -> letzter Sampler-Snapshot oder None
+        :param history: MetricsHistory
+        """
+        self.running_source = running_source
+        self.rcon_query = rcon_query
+        self.resource_source = resource_source
+        self.history = history
+        self.interval = max(0.2, float(interval))
+        self.poll_interval = max(self.interval, float(poll_interval))
+        self.persist_interval = float(persist_interval)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(poll_workers)), thread_name_prefix='perf-poll')
+        self._lock = threading.Lock()
+        self._modes = {} # server_name -> 'paper' | 'vanilla' | 'list'
+        self._polled = {} # server_name -> {'tps', 'mspt', 'players', 'max_players', 'at'}
+        self._in_flight = set()
+        self._console = {} # server_name -> Zustand der Konsolen-Auswertung
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='perf-sampler', daemon=True)
+        self._thread.start()
+        atexit.register(self.history.save_all)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def reset(self, server_name):
+        """Nach einem (Neu-)Start: Befehlsart neu ermitteln, Konsolenzustand verwerfen."""
+        with self._lock:
+            self._modes.pop(server_name, None)
+            self._polled.pop(server_name, None)
+            self._console.pop(server_name, None)
+
+    def get_current(self, server_name):
+        """Letzte bekannte Werte {'tps', 'mspt', 'players', 'max_players', 'source'} (ggf. None)."""
+        return self._current_values(server_name, time.time())
+
+    # --- Konsole (läuft im I/O-Thread, muss billig bleiben) ---
+
+    def observe_line(self, server_name, line):
+        if "Can't keep up!" in line:
+            match = CANT_KEEP_UP_PATTERN.search(line)
+            if match:
+                now = time.time()
+                with self._lock:
+                    state = self._console_state(server_name)
+                    since_last = now - state['lag_at'] if state['lag_at'] else 0.0
+                    window = max(LAG_WARNING_MIN_WINDOW, since_last)
+                    state['lag_tps'] = max(0.0, TARGET_TPS - int(match.group(1)) / window)
+                    state['lag_at'] = now
+        elif ' joined the game' in line:
+            match = JOIN_PATTERN.search(line)
+            if match:
+                with self._lock:
+                    self._console_state(server_name)['players'].add(match.group(1))
+        elif ' left the game' in line:
+            match = LEAVE_PATTERN.search(line)
+            if match:
+                with self._lock:
+                    self._console_state(server_name)['players'].discard(match.group(1))
+
+    def _console_state(self, server_name):
+        state = self._console.get(server_name)
+        if state is None:
+            state = self._console[server_name] = {'lag_tps': None, 'lag_at': None, 'players': set()}
+        return state
+
+    # --- Hintergrund-Thread ---
+
+    def _run(self):
+        last_poll = 0.0
+        last_persist = time.monotonic()
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                running = dict(self.running_source())
+                if started - last_poll >= self.poll_interval:
+                    last_poll = started
+                    for name, ready in running.items():
+                        if ready:
+                            self._schedule_poll(name)
+                self._record(running)
+                if started - last_persist >= self.persist_interval:
+                    last_persist = started
+                    self.history.save_all()
+            except Exception as e: # Der Sampler darf niemals sterben
+                print(f"FEHLER: Leistungs-Sampler: {e}")
+            self._stop_event.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _record(self, running):
+        now = time.time()
+        for name in running:
+            values = self._current_values(name, now)
+            snapshot = self.resource_source(name)
+            if snapshot and not snapshot.get('error'):
+                values['cpu'] = snapshot.get('cpu_usage')
+                values['rss_mb'] = snapshot.get('ram_usage_rss_mb')
+            self.history.add(name, now, values)
+
+    def _current_values(self, server_name, now):
+        with self._lock:
+            polled = self._polled.get(server_name)
+            console = self._console.get(server_name)
+            values = {'tps': None, 'mspt': None, 'players': None, 'max_players': None, 'source': None}
+            if polled and now - polled['at'] <= 3 * self.poll_interval:
+                values.update({k: polled[k] for k in ('tps', 'mspt', 'players', 'max_players')})
+                values['source'] = 'rcon'
+            if console:
+                if values['tps'] is None and self._modes.get(server_name) in (None, 'list'):
+                    lagging = console['lag_at'] is not None and now - console['lag_at'] <= LAG_WARNING_MIN_WINDOW
+                    values['tps'] = console['lag_tps'] if lagging else TARGET_TPS
+                    values['source'] = values['source'] or 'console'
+                if values['players'] is None:
+                    values['players'] = len(console['players'])
+            return values
+
+    def _schedule_poll(self, server_name):
+        with self._lock:
+            if server_name in self._in_flight: # Ein hängender Server blockiert nur sich selbst
+                return
+            self._in_flight.add(server_name)
+        self._executor.submit(self._poll, server_name)
+
+    def _poll(self, server_name):
+        try:
+            mode = self._modes.get(server_name)
+            commands = {'paper': ['list', 'tps', 'mspt'], 'vanilla': ['list', 'tick query'],
+                        'list': ['list']}.get(mode, ['list', 'tps', 'mspt', 'tick query'])
+            responses = self.rcon_query(server_name, commands)
+            if responses is None:
+                return
+            answers = dict(zip(commands, responses))
+            result = {'tps': None, 'mspt': None, 'players': None, 'max_players': None, 'at': time.time()}
+            players = parse_player_list(answers.get('list'))
+            if players:
+                result['players'], result['max_players'] = players
+            if 'tps' in answers:
+                result['tps'] = parse_paper_tps(answers['tps'])
+                result['mspt'] = parse_paper_mspt(answers.get('mspt'))
+            if result['tps'] is None and 'tick query' in answers:
+                parsed = parse_tick_query(answers['tick query'])
+                if parsed:
+                    result['tps'], result['mspt'] = parsed
+            if mode is None:
+                mode = 'paper' if parse_paper_tps(answers.get('tps')) is not None else (
+                    'vanilla' if parse_tick_query(answers.get('tick query')) else 'list')
+            with self._lock:
+                self._modes[server_name] = mode
+                self._polled[server_name] = result
+        except Exception as e:
+            print(f"WARNUNG: Leistungsabfrage für '{server_name}' fehlgeschlagen: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(server_name)
@@ -0,0 +1,103 @@
+# mc_panel/managers/port_allocator.py
+import socket
+import threading
+
+PORT_MIN = 1024
+PORT_MAX = 65535
+
+
+def port_bindable(port, host=''):
+    """True, wenn gerade kein anderes Programm auf dem TCP-Port lauscht."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        if hasattr(socket, 'SO_EXCLUSIVEADDRUSE'): # Windows: sonst gelingt bind trotz belegtem Port
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+        else: # Wie der Java-Server: Ports in TIME_WAIT eines gerade gestoppten Servers gelten als frei
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+class PortAllocator:
+    """
+    Index aller Spiel- und RCON-Ports der konfigurierten Server (Port ->
+    (Server, Art)). Konfliktprüfung und automatische Vergabe schlagen im
+    Index nach, statt bei jedem Kandidaten alle Servereinträge zu durchsuchen.
+    """
+
+    KINDS = ('port', 'rcon_port')
+
+    def __init__(self):
+        self._owners = {} # Port -> (server_name, Art)
+        self._lock = threading.Lock()
+
+    def rebuild(self, servers):
+        with self._lock:
+            self._owners = {}
+            for name, details in servers.items():
+                if isinstance(details, dict):
+                    self._index(name, details)
+
+    def _index(self, server_name, details):
+        for kind in self.KINDS:
+            try:
+                port = int(details.get(kind))
+            except (TypeError, ValueError):
+                continue
+            self._owners.setdefault(port, (server_name, kind))
+
+    def update(self, server_name, details):
+        """Übernimmt die aktuellen Ports eines Servers (nach Anlegen oder Änderung)."""
+        with self._lock:
+            self._drop(server_name)
+            self._index(server_name, details)
+
+    def _drop(self, server_name):
+        for port in [p for p, (owner, _) in self._owners.items() if owner == server_name]:
+            del self._owners[port]
+
+    def release(self, server_name):
+        with self._lock:
+            self._drop(server_name)
+
+    def owner(self, port):
+        """:return: (server_name, Art) oder None"""
+        try:
+            return self._owners.get(int(port))
+        except (TypeError, ValueError):
+            return None
+
+    def claim(self, port, server_name, kind='port'):
+        """
+        Reserviert einen bestimmten Port.
+        :return: (True, None) oder (False, Grund)
+        """
+        port = int(port)
+        with self._lock:
+            owner = self._owners.get(port)
+            if owner and owner[0] != server_name:
+                label = 'Spielport' if owner[1] == 'port' else 'RCON-Port'
+                return False, f"Port {port} ist bereits als {label} von '{owner[0]}' vergeben."
+            self._owners[port] = (server_name, kind)
+            return True, None
+
+    def allocate(self, server_name, kind, start, check_bindable=True):
+        """
+        Vergibt den ersten freien Port ab start und trägt ihn sofort ein, damit
+        gleichzeitige Anfragen nicht denselben Port bekommen. Mit check_bindable
+        werden auch Ports übersprungen, auf denen fremde Programme lauschen.
+        :return: Port
+        :raises ValueError: wenn bis 65535 kein Port frei ist
+        """
+        with self._lock:
+            port = max(PORT_MIN, int(start))
+            while port <= PORT_MAX:
+                if port not in self._owners and (not check_bindable or port_bindable(port)):
+                    self._owners[port] = (server_name, kind)
+                    return port
+                port += 1
+        raise ValueError(f"Kein freier Port ab {start} mehr verfügbar.")
@@ -0,0 +1,338 @@
+# mc_panel/managers/region_file.py
+import gzip
+import mmap
+import os
+import statistics
+import struct
+import time
+import zlib
+
+# Aufbau einer Region-Datei (.mca, auch für entities/ und poi/):
+# 4 KiB Offsettabelle (je Chunk 3 Byte Sektor-Offset + 1 Byte Sektoranzahl),
+# 4 KiB Zeitstempel (letzte Änderung je Chunk), danach die Chunks in 4-KiB-Sektoren,
+# jeweils mit 4 Byte Länge und 1 Byte Kompressionsart vor den Daten.
+SECTOR_SIZE = 4096
+REGION_HEADER_SIZE = 2 * SECTOR_SIZE
+CHUNKS_PER_REGION = 1024
+EXTERNAL_CHUNK_FLAG = 0x80 # Chunk liegt in einer eigenen c.<x>.<z>.mcc-Datei
+
+COMPRESSION_GZIP = 1
+COMPRESSION_ZLIB = 2
+COMPRESSION_NONE = 3
+
+# TAG_Long "InhabitedTime": Ticks, die sich Spieler im Chunk aufgehalten haben
+_INHABITED_TAG = b'\x04\x00\x0dInhabitedTime'
+TICKS_PER_SECOND = 20
+
+
+def read_locations(mm):
+    """:return: Liste von (Chunk-Index, Sektor-Offset, Sektoranzahl) aller belegten Einträge"""
+    locations = []
+    for index in range(CHUNKS_PER_REGION):
+        entry = struct.unpack_from('>I', mm, index * 4)[0]
+        if entry:
+            locations.append((index, entry >> 8, entry & 0xFF))
+    return locations
+
+
+def parse_region(mm):
+    """
+    Liest die Offsettabelle einer Region-Datei.
+    :return: Liste von (Chunk-Index, Start, Länge inkl. 5-Byte-Chunk-Header) oder None bei kaputtem Header
+    """
+    size = len(mm)
+    if size < REGION_HEADER_SIZE:
+        return None
+    chunks = []
+    for index, offset, _ in read_locations(mm):
+        start = offset * SECTOR_SIZE
+        if offset < 2 or start + 5 > size:
+            return None
+        length = struct.unpack_from('>I', mm, start)[0] # Zählt das Kompressionsbyte mit
+        if length < 1 or start + 4 + length > size:
+            return None
+        chunks.append((index, start, 4 + length))
+    return chunks
+
+
+def chunk_inhabited_ticks(mm, start, length):
+    """
+    Liest InhabitedTime eines Chunks, ohne das ganze NBT zu parsen.
+    :return: Ticks oder None (externer Chunk, unbekannte Kompression, Tag fehlt)
+    """
+    compression = mm[start + 4]
+    payload = mm[start + 5:start + length]
+    try:
+        if compression == COMPRESSION_ZLIB:
+            data = zlib.decompress(payload)
+        elif compression == COMPRESSION_GZIP:
+            data = gzip.decompress(payload)
+        elif compression == COMPRESSION_NONE:
+            data = payload
+        else: # LZ4 (1.20.5+) oder externer Chunk
+            return None
+    except (zlib.error, OSError, EOFError):
+        return None
+    pos = data.find(_INHABITED_TAG)
+    if pos == -1 or pos + len(_INHABITED_TAG) + 8 > len(data):
+        return None
+    return struct.unpack_from('>q', data, pos + len(_INHABITED_TAG))[0]
+
+
+def analyze_region(path, with_inhabited=False):
+    """
+    Wertet eine Region-Datei per mmap aus.
+    :return: dict mit Chunkanzahl, Datei-/Nutzbytes, toten Bytes, Fragmentierung,
+             Zeitstempeln und optional InhabitedTime-Statistik (Sekunden)
+    """
+    file_bytes = os.path.getsize(path)
+    report = {'chunks': 0, 'file_bytes': file_bytes, 'used_bytes': 0, 'dead_bytes': 0,
+              'fragmentation': 0.0, 'oldest_modified': None, 'newest_modified': None, 'error': None}
+    if file_bytes < REGION_HEADER_SIZE:
+        report['error'] = 'Datei kleiner als der Region-Header'
+        report['dead_bytes'] = file_bytes
+        return report
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        locations = read_locations(mm)
+        used_sectors = 0
+        timestamps = []
+        inhabited = []
+        unknown = 0
+        for index, offset, sectors in locations:
+            start = offset * SECTOR_SIZE
+            if offset < 2 or start + 5 > file_bytes:
+                report['error'] = f'Chunk {index} zeigt hinter das Dateiende'
+                continue
+            used_sectors += sectors
+            modified = struct.unpack_from('>I', mm, SECTOR_SIZE + index * 4)[0]
+            if modified:
+                timestamps.append(modified)
+            if with_inhabited:
+                length = 4 + struct.unpack_from('>I', mm, start)[0]
+                ticks = chunk_inhabited_ticks(mm, start, min(length, file_bytes - start))
+                if ticks is None:
+                    unknown += 1
+                else:
+                    inhabited.append(ticks / TICKS_PER_SECOND)
+        report['chunks'] = len(locations)
+        report['used_bytes'] = REGION_HEADER_SIZE + used_sectors * SECTOR_SIZE
+        report['dead_bytes'] = max(0, file_bytes - report['used_bytes'])
+        report['fragmentation'] = round(report['dead_bytes'] / file_bytes, 4) if file_bytes else 0.0
+        if timestamps:
+            report['oldest_modified'] = min(timestamps)
+            report['newest_modified'] = max(timestamps)
+        if with_inhabited:
+            report['inhabited'] = {
+                'min_s': min(inhabited) if inhabited else None,
+                'median_s': statistics.median(inhabited) if inhabited else None,
+                'max_s': max(inhabited) if inhabited else None,
+                'under_60s': sum(1 for s in inhabited if s < 60),
+                'unknown': unknown,
+            }
+    return report
+
+
+def chunks_matching_policy(path, max_inhabited_seconds=None, older_than_days=None):
+    """
+    Chunks, die gelöscht werden dürfen: InhabitedTime unter max_inhabited_seconds
+    und (falls angegeben) seit older_than_days nicht mehr geändert. Chunks mit
+    unbekannter InhabitedTime bleiben immer erhalten.
+    :return: Menge von Chunk-Indizes
+    """
+    if max_inhabited_seconds is None:
+        return set()
+    cutoff = time.time() - older_than_days * 86400 if older_than_days else None
+    selected = set()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        chunks = parse_region(mm)
+        if chunks is None:
+            return set()
+        for index, start, length in chunks:
+            if cutoff is not None:
+                modified = struct.unpack_from('>I', mm, SECTOR_SIZE + index * 4)[0]
+                if not modified or modified > cutoff:
+                    continue
+            ticks = chunk_inhabited_ticks(mm, start, length)
+            if ticks is not None and ticks < max_inhabited_seconds * TICKS_PER_SECOND:
+                selected.add(index)
+    return selected
+
+
+def external_chunk_path(region_path, index):
+    """
+    c.<x>.<z>.mcc eines ausgelagerten Chunks (Chunk-Koordinaten aus r.<x>.<z>.mca und Index).
+    :return: Pfad oder None bei unbekanntem Dateinamen
+    """
+    directory, name = os.path.split(region_path)
+    parts = name.split('.')
+    if len(parts) != 4 or parts[0] != 'r':
+        return None
+    try:
+        region_x, region_z = int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+    return os.path.join(directory, f"c.{region_x * 32 + index % 32}.{region_z * 32 + index // 32}.mcc")
+
+
+def rewrite_region(path, drop=()):
+    """
+    Schreibt eine Region-Datei lückenlos neu (ohne tote Sektoren) und lässt dabei
+    die Chunks in drop weg. Ersetzt die Datei atomar; bleibt kein Chunk übrig,
+    wird sie gelöscht. Ausgelagerte Daten (.mcc) entfernter Chunks werden mit gelöscht.
+    :return: (Bytes vorher, Bytes nachher, entfernte Chunks) oder None bei kaputtem Header
+    """
+    drop = set(drop)
+    before = os.path.getsize(path)
+    tmp_path = path + '.compact.tmp'
+    try:
+        with open(path, 'rb') as f:
+            if before < REGION_HEADER_SIZE:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                chunks = parse_region(mm)
+                if chunks is None:
+                    return None
+                locations = bytearray(SECTOR_SIZE)
+                timestamps = bytearray(mm[SECTOR_SIZE:REGION_HEADER_SIZE])
+                kept = [c for c in chunks if c[0] not in drop]
+                dropped = [c for c in chunks if c[0] in drop]
+                external = [index for index, start, _ in dropped if mm[start + 4] & EXTERNAL_CHUNK_FLAG]
+                for index, _, _ in dropped:
+                    struct.pack_into('>I', timestamps, index * 4, 0)
+                if kept:
+                    with open(tmp_path, 'wb') as out:
+                        out.write(b'\0' * REGION_HEADER_SIZE)
+                        sector = 2
+                        for index, start, length in sorted(kept, key=lambda c: c[1]): # Reihenfolge der Datei beibehalten
+                            sectors = -(-length // SECTOR_SIZE)
+                            out.write(mm[start:start + length])
+                            out.write(b'\0' * (sectors * SECTOR_SIZE - length))
+                            struct.pack_into('>I', locations, index * 4, (sector << 8) | sectors)
+                            sector += sectors
+                        out.seek(0)
+                        out.write(locations)
+                        out.write(timestamps)
+        if kept:
+            os.replace(tmp_path, path)
+        else:
+            os.remove(path)
+    finally:
+        try: # Nach einem Fehler beim Schreiben keine halbe Kopie liegen lassen
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+    for index in external: # Erst nach dem Ersetzen: vorher verweist die alte Datei noch darauf
+        mcc_path = external_chunk_path(path, index)
+        if mcc_path:
+            try:
+                os.remove(mcc_path)
+            except FileNotFoundError:
+                pass
+    return before, os.path.getsize(path) if kept else 0, len(dropped)
+
+
+# --- Ganze Welten ---
+
+REGION_DIR_NAMES = ('region', 'entities', 'poi') # Alle drei nutzen das .mca-Format
+
+
+def find_region_dirs(world_dirs):
+    """
+    Sucht alle Dimensionsordner (mit region/, entities/ bzw. poi/) unterhalb der Weltordner.
+    :return: Liste von (Dimensionsordner, [vorhandene Unterordner])
+    """
+    found = []
+    for world_dir in world_dirs:
+        for current, dirs, _ in os.walk(world_dir):
+            present = [name for name in REGION_DIR_NAMES if name in dirs]
+            if present:
+                found.append((current, present))
+            dirs[:] = [d for d in dirs if d not in REGION_DIR_NAMES] # Nicht in die Regionsordner absteigen
+    return found
+
+
+def _region_files(directory):
+    try:
+        return sorted(name for name in os.listdir(directory) if name.endswith('.mca'))
+    except OSError:
+        return []
+
+
+def analyze_world(world_dirs, base_dir, with_inhabited=False, progress=None, top=200):
+    """
+    Analysiert alle Region-Dateien der Welt.
+    :return: dict mit 'totals', 'dimensions' (Summen je Ordner) und 'regions'
+             (die top Dateien mit den meisten toten Bytes)
+    """
+    keys = ('files', 'chunks', 'file_bytes', 'used_bytes', 'dead_bytes')
+    totals = dict.fromkeys(keys, 0)
+    dimensions = {}
+    regions = []
+    inhabited_medians = []
+    for dimension_dir, subdirs in find_region_dirs(world_dirs):
+        for subdir in subdirs:
+            directory = os.path.join(dimension_dir, subdir)
+            rel_dir = os.path.relpath(directory, base_dir)
+            sums = dimensions.setdefault(rel_dir, dict.fromkeys(keys, 0))
+            for name in _region_files(directory):
+                path = os.path.join(directory, name)
+                try:
+                    report = analyze_region(path, with_inhabited=with_inhabited and subdir == 'region')
+                except OSError as e:
+                    report = {'chunks': 0, 'file_bytes': 0, 'used_bytes': 0, 'dead_bytes': 0, 'error': str(e)}
+                report['path'] = os.path.join(rel_dir, name)
+                regions.append(report)
+                for target in (sums, totals):
+                    target['files'] += 1
+                    for key in keys[1:]:
+                        target[key] += report[key]
+                median = (report.get('inhabited') or {}).get('median_s')
+                if median is not None:
+                    inhabited_medians.append(median)
+                if progress and totals['files'] % 50 == 0:
+                    progress(f"{totals['files']} Region-Dateien analysiert...")
+    for sums in list(dimensions.values()) + [totals]:
+        sums['fragmentation'] = round(sums['dead_bytes'] / sums['file_bytes'], 4) if sums['file_bytes'] else 0.0
+    if with_inhabited and inhabited_medians:
+        totals['inhabited_median_of_regions_s'] = statistics.median(inhabited_medians)
+    regions.sort(key=lambda r: r['dead_bytes'], reverse=True)
+    return {'totals': totals, 'dimensions': dimensions, 'regions': regions[:top],
+            'regions_truncated': len(regions) > top, 'analyzed_at': time.time()}
+
+
+def compact_world(world_dirs, max_inhabited_seconds=None, older_than_days=None, progress=None):
+    """
+    Schreibt alle Region-Dateien ohne tote Sektoren neu. Mit max_inhabited_seconds
+    werden zusätzlich kaum besuchte Chunks entfernt, und zwar konsistent in
+    region/, entities/ und poi/ derselben Dimension.
+    :return: dict mit 'files', 'bytes_before', 'bytes_after', 'chunks_removed', 'skipped'
+    """
+    result = {'files': 0, 'bytes_before': 0, 'bytes_after': 0, 'chunks_removed': 0, 'skipped': []}
+    for dimension_dir, subdirs in find_region_dirs(world_dirs):
+        drop_by_file = {}
+        if max_inhabited_seconds is not None and 'region' in subdirs:
+            region_dir = os.path.join(dimension_dir, 'region')
+            for name in _region_files(region_dir):
+                drop_by_file[name] = chunks_matching_policy(
+                    os.path.join(region_dir, name), max_inhabited_seconds, older_than_days)
+        for subdir in subdirs:
+            directory = os.path.join(dimension_dir, subdir)
+            for name in _region_files(directory):
+                path = os.path.join(directory, name)
+                try:
+                    outcome = rewrite_region(path, drop_by_file.get(name, ()))
+                except OSError as e:
+                    outcome = None
+                    print(f"WARNUNG: Konnte '{path}' nicht kompaktieren: {e}")
+                if outcome is None:
+                    result['skipped'].append(path)
+                    continue
+                before, after, removed = outcome
+                result['files'] += 1
+                result['bytes_before'] += before
+                result['bytes_after'] += after
+                if subdir == 'region':
+                    result['chunks_removed'] += removed
+                if progress and result['files'] % 50 == 0:
+                    progress(f"{result['files']} Region-Dateien kompaktiert...")
+    return result
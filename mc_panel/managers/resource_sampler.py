@@ -0,0 +1,147 @@
+# mc_panel/managers/resource_sampler.py
+import threading
+import time
+
+try:
+    import psutil # Für CPU/RAM-Auslastung
+except ImportError:
+    psutil = None
+
+
+class ResourceSampler:
+    """
+    Hintergrund-Thread, der in einem festen Takt CPU, RSS, Thread-Anzahl,
+    offene Dateideskriptoren und IO-Zähler aller laufenden Serverprozesse erfasst.
+
+    Die psutil.Process-Handles werden pro Server gecacht, damit cpu_percent()
+    ohne Intervall (also ohne Blockieren) die Auslastung seit dem letzten Tick
+    liefert. Leser bekommen immer nur den zuletzt erfassten Snapshot.
+    """
+
+    def __init__(self, process_source, interval=2.0, line_count_source=None, limits_source=None):
+        """
+        :param process_source: Callable, das ein Dict {server_name: Popen} liefert.
+        :param interval: Abstand zwischen zwei Messungen in Sekunden.
+        :param line_count_source: Optionales Callable, das {server_name: Konsolenzeilen gesamt}
+                                  liefert; daraus wird die Zeilenrate pro Sekunde berechnet.
+        :param limits_source: Optionales Callable(server_name) -> dict mit wirksamen Limits und
+                              Drosselungszählern (cgroup) oder None; wird in den Snapshot übernommen.
+        """
+        self.process_source = process_source
+        self.line_count_source = line_count_source
+        self.limits_source = limits_source
+        self.interval = max(0.2, float(interval))
+        self._handles = {} # server_name -> psutil.Process
+        self._snapshots = {} # server_name -> dict
+        self._last_line_counts = {} # server_name -> (Zeilen gesamt, Zeitpunkt der Messung)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if psutil is None or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="resource-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def get_snapshot(self, server_name):
+        """Gibt den letzten Snapshot eines Servers zurück (oder None)."""
+        with self._lock:
+            return self._snapshots.get(server_name)
+
+    def get_all_snapshots(self):
+        with self._lock:
+            return dict(self._snapshots)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample_once()
+            except Exception as e: # Der Sampler darf niemals sterben
+                print(f"FEHLER: Ressourcen-Sampler: {e}")
+            self._stop_event.wait(self.interval)
+
+    def _get_handle(self, server_name, pid):
+        handle = self._handles.get(server_name)
+        if handle is not None and handle.pid == pid:
+            return handle
+        handle = psutil.Process(pid)
+        handle.cpu_percent(interval=None) # Erster Aufruf liefert immer 0.0, dient nur als Startwert
+        self._handles[server_name] = handle
+        return handle
+
+    def _line_rate(self, server_name, total, now):
+        """ Konsolenzeilen pro Sekunde seit der letzten Messung (None bei der ersten). """
+        if total is None:
+            return None
+        previous = self._last_line_counts.get(server_name)
+        self._last_line_counts[server_name] = (total, now)
+        if previous is None or now <= previous[1] or total < previous[0]:
+            return None
+        return round((total - previous[0]) / (now - previous[1]), 2)
+
+    def sample_once(self):
+        """Erfasst einmalig alle laufenden Prozesse und ersetzt den Snapshot."""
+        processes = dict(self.process_source())
+        line_counts = dict(self.line_count_source()) if self.line_count_source else {}
+        snapshots = {}
+        now = time.time()
+        for name, process_obj in processes.items():
+            if process_obj.poll() is not None or not hasattr(process_obj, 'pid'):
+                continue
+            try:
+                handle = self._get_handle(name, process_obj.pid)
+                with handle.oneshot():
+                    cpu = handle.cpu_percent(interval=None)
+                    cpu_times = handle.cpu_times()
+                    mem_info = handle.memory_info()
+                    num_threads = handle.num_threads()
+                    created_at = handle.create_time()
+                    try:
+                        io = handle.io_counters()
+                        io_read, io_write = io.read_bytes, io.write_bytes
+                    except (AttributeError, psutil.AccessDenied): # io_counters gibt es nicht auf jedem OS
+                        io_read, io_write = None, None
+                    try:
+                        num_fds = handle.num_fds()
+                    except (AttributeError, psutil.AccessDenied): # Nur unter POSIX
+                        num_fds = None
+                    try:
+                        cpu_affinity = handle.cpu_affinity()
+                    except (AttributeError, psutil.AccessDenied): # Nicht unter macOS
+                        cpu_affinity = None
+                snapshots[name] = {
+                    'cpu_usage': cpu,
+                    'cpu_seconds': cpu_times.user + cpu_times.system,
+                    'ram_usage_rss_mb': round(mem_info.rss / (1024 * 1024), 2),
+                    'rss_bytes': mem_info.rss,
+                    'num_threads': num_threads,
+                    'num_fds': num_fds,
+                    'io_read_bytes': io_read,
+                    'io_write_bytes': io_write,
+                    'started_at': created_at,
+                    'console_lines_per_second': self._line_rate(name, line_counts.get(name), now),
+                    'cpu_affinity': cpu_affinity,
+                    'sampled_at': now,
+                }
+                limits = self.limits_source(name) if self.limits_source else None
+                if limits:
+                    snapshots[name].update(limits)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                self._handles.pop(name, None)
+                snapshots[name] = {'error': 'process_disappeared_or_access_denied', 'sampled_at': now}
+
+        # Handles von Servern entfernen, die nicht mehr laufen
+        for name in list(self._handles):
+            if name not in snapshots:
+                del self._handles[name]
+        for name in list(self._last_line_counts):
+            if name not in snapshots:
+                del self._last_line_counts[name]
+
+        with self._lock:
+            self._snapshots = snapshots
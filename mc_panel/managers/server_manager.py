@@ -1,12 +1,39 @@
 # mc_panel/managers/server_manager.py
-import json
 import os
+import queue
+import re
+import secrets
+import shlex
 import subprocess
 import signal # Nicht direkt verwendet, aber oft nützlich für Prozessmanagement
 import threading
 import time
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
+from .resource_sampler import ResourceSampler
+from .console_buffer import ConsoleBuffer
+from .console_log import ConsoleLog
+from .state_store import StateStore
+from .job_manager import JobManager
+from .output_multiplexer import OutputMultiplexer
+from .trash_reaper import TrashReaper
+from .backup_manager import BackupManager
+from . import region_file
+from .metrics_history import MetricsHistory, RESOLUTIONS
+from .perf_sampler import PerformanceSampler
+from .status_poller import StatusPoller
+from . import jvm_profiles
+from .cgroup_limits import CgroupLimiter, normalize_limits, parse_cpu_set, place_process
+from .capacity import CapacityPlanner
+from .port_allocator import PortAllocator, port_bindable
+from .hibernation import Hibernator
+from . import supervised_process
+from .supervised_process import SupervisedProcess
+from ..utils.rcon import RconPool, RconError, RconUnavailable
+
+# Vanilla/Paper/Spigot melden den fertigen Start mit 'Done (12.345s)! For help, type "help"'
+DONE_LINE_PATTERN = re.compile(r'Done \([\d.,]+s\)!')
 
 try:
     import psutil # Für CPU/RAM-Auslastung
@@ -19,40 +46,137 @@ else:
     _psutil_available = True
 
 class ServerManager:
-    def __init__(self, config_file, instances_dir, jars_dir):
-        self.config_file = config_file
+    def __init__(self, config_file, instances_dir, jars_dir, resource_sample_interval=2.0,
+                 console_buffer_lines=1000, console_stream_queue_size=500, console_stream_heartbeat=15.0,
+                 console_log_max_bytes=50 * 1024 * 1024, console_log_backups=10, console_log_index_interval=64 * 1024,
+                 state_db=None, state_flush_delay=0.5, job_workers=4, job_history_limit=200,
+                 bulk_max_parallel=2, bulk_ready_timeout=300, jar_manager=None,
+                 trash_unlinks_per_second=2000, trash_reaper_nice=19, backup_dir=None, backup_workers=2,
+                 backup_compression_level=6, backup_exclude=('.panel', 'server.jar', 'cache', 'libraries', 'versions', 'logs'),
+                 backup_flush_timeout=120, rcon_enabled=True, rcon_port_base=35565, rcon_pool_size=2,
+                 rcon_timeout=5.0, perf_sample_interval=1.0, perf_poll_interval=5.0, history_persist_interval=60.0,
+                 slp_poll_interval=5.0, slp_timeout=3.0, slp_unresponsive_after=3, cgroup_enabled=True,
+                 cgroup_root=None, game_port_base=25565, capacity_host_memory=None, capacity_headroom='2G',
+                 capacity_overhead_ratio=0.25, capacity_overhead_min='512M', admission_queue_timeout=300,
+                 hibernate_check_interval=30.0, hibernate_bind_host='', hibernate_motd=None,
+                 supervisor_enabled=True, supervisor_buffer_bytes=1024 * 1024):
+        self.config_file = config_file # Alte servers.json, wird nur noch einmalig importiert
         self.instances_dir = instances_dir
         self.jars_dir = jars_dir
+        if jar_manager is None:
+            from .jar_manager import JarManager
+            jar_manager = JarManager(jars_dir)
+        self.jar_manager = jar_manager # Inhaltsadressierter JAR-Speicher, Instanzen bekommen Links statt Kopien
+        self.console_buffer_lines = console_buffer_lines
+        self.console_stream_queue_size = console_stream_queue_size
+        self.console_stream_heartbeat = console_stream_heartbeat
+        self.bulk_max_parallel = bulk_max_parallel
+        self.rcon_enabled = rcon_enabled
+        self.rcon_port_base = rcon_port_base
+        self.rcon_pool_size = rcon_pool_size
+        self.rcon_timeout = rcon_timeout
+        self.bulk_ready_timeout = bulk_ready_timeout
+        self.slp_unresponsive_after = max(1, int(slp_unresponsive_after))
+        self.game_port_base = game_port_base
+        self.admission_queue_timeout = admission_queue_timeout
+        # Server laufen unter einem losgelösten Aufpasser und überleben so Neustarts des Panels (nur Unix)
+        self.supervisor_enabled = supervisor_enabled and supervised_process.supported()
+        self.supervisor_buffer_bytes = supervisor_buffer_bytes
+        self.console_log_settings = {
+            'max_bytes': console_log_max_bytes,
+            'backups': console_log_backups,
+            'index_interval': console_log_index_interval,
+        }
+        if state_db is None:
+            state_db = os.path.join(os.path.dirname(os.path.abspath(config_file)), 'panel_state.db')
+        self.state_store = StateStore(state_db, lambda name: self.servers.get(name), flush_delay=state_flush_delay)
         self.servers = self._load_servers_config()
 
+        # Vor allen Hintergrund-Threads erzeugen: startet den Prozesspool für die Komprimierung per fork
+        if backup_dir is None:
+            backup_dir = os.path.join(os.path.dirname(os.path.abspath(instances_dir)), 'backups')
+        self.backups = BackupManager(backup_dir, workers=backup_workers, compression_level=backup_compression_level,
+                                     exclude=backup_exclude, flush_timeout=backup_flush_timeout)
+
         self.processes = {}
-        self.threads = {}
-        self.server_outputs = {}
+        self.threads = {} # Nur unter Windows: ein Lese-Thread pro Server (kein Selector für Pipes)
+        self.server_outputs = {} # server_name -> ConsoleBuffer
+        self.console_logs = {} # server_name -> ConsoleLog (persistente Historie)
+        self.ready_events = {} # server_name -> threading.Event, gesetzt sobald "Done (...)!" erscheint
+        self.console_line_counts = {} # server_name -> Konsolenzeilen seit Panel-Start (für Metriken)
+        self.start_counts = {} # server_name -> erfolgreiche Starts seit Panel-Start
+        self.rcon_pools = {} # server_name -> RconPool, angelegt beim ersten Befehl nach "Done"
+        self.launch_commands = {} # server_name -> Befehlszeile des letzten Starts
+        # CPU-Set, CPU-Quota, Speicherobergrenze und IO-Gewicht pro Server (cgroup v2, sonst nur Affinität)
+        self.cgroups = CgroupLimiter(cgroup_root) if cgroup_enabled else None
 
         self._initialize_server_statuses()
 
+        # Port-Index statt Durchsuchen aller Servereinträge; Speicherzusagen für Zulassung von Starts
+        self.ports = PortAllocator()
+        self.ports.rebuild(self.servers)
+        self.capacity = CapacityPlanner(capacity_host_memory, headroom=capacity_headroom,
+                                        overhead_ratio=capacity_overhead_ratio, overhead_min=capacity_overhead_min)
+
+        # Ein I/O-Thread liest die Ausgabe aller Server (unter Windows weiterhin ein Thread pro Server)
+        self.output_mux = OutputMultiplexer() if os.name != 'nt' else None
+
+        # Start/Stop/Löschen laufen als Hintergrundaufträge, seriell pro Server
+        self.jobs = JobManager(max_workers=job_workers, history_limit=job_history_limit)
+
+        # Gelöschte Instanzen landen im Papierkorb und werden im Hintergrund gedrosselt entfernt
+        self.trash = TrashReaper(os.path.join(instances_dir, '.trash'),
+                                 unlinks_per_second=trash_unlinks_per_second, nice=trash_reaper_nice)
+        self.trash.start()
+
+        # Ältere Instanzen mit kopierter server.jar einmalig auf Links umstellen
+        unmanaged = [n for n in self.servers if not self.jar_manager.is_managed(n)]
+        if unmanaged:
+            self.jobs.submit_dedicated('jar_dedupe', self._adopt_instance_jars, unmanaged)
+
+        # Ressourcen werden im Hintergrund erfasst, Requests lesen nur den letzten Snapshot
+        self.resource_sampler = ResourceSampler(lambda: self.processes, interval=resource_sample_interval,
+                                                line_count_source=lambda: self.console_line_counts,
+                                                limits_source=self.cgroups.read_stats if self.cgroups else None)
+        self.resource_sampler.start()
+
+        # TPS/MSPT/Spieler plus CPU/RAM als Zeitreihen (1 s / 1 min / 1 h) in <instanz>/.panel/history.bin
+        self.history = MetricsHistory(
+            lambda name: os.path.join(self.get_server_path(name), '.panel', 'history.bin'))
+        self.perf_sampler = PerformanceSampler(
+            self._running_readiness, self._query_rcon, self.resource_sampler.get_snapshot, self.history,
+            interval=perf_sample_interval, poll_interval=perf_poll_interval,
+            persist_interval=history_persist_interval)
+        self.perf_sampler.start()
+
+        # Server List Ping auf alle konfigurierten Ports: "bereit" heißt, der Server beantwortet Statusanfragen
+        self.status_poller = StatusPoller(self._configured_ports, interval=slp_poll_interval, timeout=slp_timeout)
+        self.status_poller.start()
+
+        # Nach einem Panel-Neustart: noch laufende Server wieder übernehmen statt sie zu verwaisen
+        if self.supervisor_enabled:
+            self._reattach_servers()
+
+        # Leere Server mit Ruhezeit werden gestoppt; ein Platzhalter auf ihrem Port weckt sie beim Login
+        hibernator_options = {'motd': hibernate_motd} if hibernate_motd else {}
+        self.hibernator = Hibernator(self._idle_timeouts, self._player_count, self._on_server_idle, self._on_wake_request,
+                                     check_interval=hibernate_check_interval, host=hibernate_bind_host,
+                                     **hibernator_options)
+        self.hibernator.start()
+        for name, details in list(self.servers.items()): # Schlafende Server schlafen auch nach einem Panel-Neustart weiter
+            if details.get('hibernating') and not self._is_running(name):
+                self._enter_sleep(name)
+
     def _load_servers_config(self):
-        if not os.path.exists(self.config_file):
-            return {}
         try:
-            with open(self.config_file, 'r') as f:
-                content = f.read()
-                if not content.strip():
-                    return {}
-                return json.loads(content)
-        except json.JSONDecodeError:
-            print(f"WARNUNG: {self.config_file} ist korrupt oder leer. Ein leeres Dictionary wird verwendet.")
-            return {}
-        except OSError as e:
-            print(f"WARNUNG: Konnte Serverkonfiguration nicht laden: {e}")
-            return {}
+            self.state_store.import_legacy_json(self.config_file)
+        except Exception as e:
+            print(f"WARNUNG: Import von {self.config_file} fehlgeschlagen: {e}")
+        return self.state_store.load_all()
 
-    def _save_servers_config(self):
-        try:
-            with open(self.config_file, 'w') as f:
-                json.dump(self.servers, f, indent=4)
-        except OSError as e:
-            print(f"FEHLER: Konnte Serverkonfiguration nicht speichern: {e}")
+    def _mark_server_changed(self, server_name):
+        """ Merkt eine Konfigurationsänderung vor; geschrieben wird gesammelt im Hintergrund. """
+        self.state_store.mark_dirty(server_name)
 
     def _initialize_server_statuses(self):
         changed = False
@@ -64,9 +188,7 @@ class ServerManager:
                 changed = True
                 continue
 
-            if details.get('status') == 'running':
-                details['status'] = 'stopped'
-                changed = True
+            details['status'] = 'stopped' # Laufzeitstatus wird nicht gespeichert
 
             details.setdefault('port', '25565')
             details.setdefault('ram_min', '1G')
@@ -82,12 +204,153 @@ class ServerManager:
             details.setdefault('max_players', 20)
             details.setdefault('online_mode', True)
             details.setdefault('custom_jvm_args', '')
+            details.setdefault('jvm_profile', jvm_profiles.DEFAULT_PROFILE)
+            details.setdefault('cpu_set', '')
+            details.setdefault('cpu_quota', None)
+            details.setdefault('memory_max', '')
+            details.setdefault('io_weight', None)
+            details.setdefault('start_priority', 0)
+            details.setdefault('idle_timeout', 0) # Minuten ohne Spieler bis zum Ruhezustand, 0 = nie
+            details.setdefault('hibernating', False)
 
         for name in server_names_to_remove:
             del self.servers[name]
+            self.state_store.mark_deleted(name)
         
         if changed:
-            self._save_servers_config()
+            self.state_store.flush()
+
+    def _adopt_instance_jars(self, job, server_names):
+        adopted = 0
+        for name in server_names:
+            try:
+                jar_path = os.path.join(self.get_server_path(name), 'server.jar')
+            except ValueError:
+                continue
+            if not os.path.isfile(jar_path):
+                continue
+            job.set_message(f"Übernehme server.jar von '{name}' in den JAR-Speicher...")
+            ok, msg = self.jar_manager.adopt_jar(name, jar_path)
+            if ok:
+                adopted += 1
+            else:
+                print(f"WARNUNG: {msg}")
+        return True, f"{adopted} server.jar-Dateien in den JAR-Speicher übernommen."
+
+    # --- Hintergrundaufträge ---
+
+    def _submit_lifecycle_job(self, action, server_name, method):
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        job = self.jobs.submit(action, server_name, lambda job: method(server_name))
+        return True, job.to_dict()
+
+    def submit_start(self, server_name):
+        """
+        Reiht einen Start ein. Passt der Server gerade nicht in den Speicher, wartet
+        der Auftrag bis zu admission_queue_timeout Sekunden (in einem eigenen
+        Thread, damit Stopps, die Speicher freigeben, weiter laufen können).
+        :return: (True, job_dict) oder (False, Fehlermeldung)
+        """
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        if not self.admission_queue_timeout:
+            return self._submit_lifecycle_job('start', server_name, self.start_server)
+        job = self.jobs.submit_blocking('start', server_name, lambda job: self.start_server(
+            server_name, wait_for_capacity=self.admission_queue_timeout, on_wait=job.set_message))
+        return True, job.to_dict()
+
+    def submit_stop(self, server_name):
+        return self._submit_lifecycle_job('stop', server_name, self.stop_server)
+
+    def submit_delete(self, server_name):
+        return self._submit_lifecycle_job('delete', server_name, self.delete_server)
+
+    def _resolve_bulk_targets(self, server_names):
+        if server_names in (None, 'all') or server_names == ['all']:
+            server_names = list(self.servers.keys())
+        unknown = [n for n in server_names if n not in self.servers]
+        targets = [n for n in dict.fromkeys(server_names) if n in self.servers]
+        # Niedrigere start_priority zuerst, bei Gleichstand alphabetisch
+        targets.sort(key=lambda n: (int(self.servers[n].get('start_priority', 0) or 0), n))
+        return targets, unknown
+
+    def submit_bulk(self, action, server_names=None, max_parallel=None):
+        """
+        Reiht einen Massenstart bzw. -stopp ein.
+        :param action: 'start' oder 'stop'
+        :param server_names: Liste von Servernamen oder 'all'/None für alle
+        :param max_parallel: Wie viele Server gleichzeitig hochfahren bzw. stoppen dürfen
+        :return: (True, job_dict) oder (False, Fehlermeldung)
+        """
+        if action not in ('start', 'stop'):
+            return False, f"Unbekannte Aktion '{action}'."
+        targets, unknown = self._resolve_bulk_targets(server_names)
+        if unknown:
+            return False, f"Unbekannte Server: {', '.join(unknown)}"
+        if not targets:
+            return False, "Keine Server ausgewählt."
+        try:
+            max_parallel = int(max_parallel) if max_parallel else self.bulk_max_parallel
+        except (TypeError, ValueError):
+            return False, "max_parallel muss eine Zahl sein."
+        max_parallel = max(1, min(max_parallel, len(targets)))
+        if action == 'stop':
+            targets.reverse() # In umgekehrter Startreihenfolge herunterfahren
+        job = self.jobs.submit_dedicated(f'bulk_{action}', self._run_bulk, action, targets, max_parallel)
+        return True, job.to_dict()
+
+    def _run_bulk(self, job, action, targets, max_parallel):
+        """
+        Führt einen Massenauftrag aus. Beim Start belegt ein Server seinen Slot,
+        bis er wirklich bereit ist ("Done (...)!" im Log), sodass nie mehr als
+        max_parallel JVMs gleichzeitig Klassen und Welten laden.
+        """
+        results = {}
+        progress_lock = threading.Lock()
+
+        def handle(name):
+            process = self.processes.get(name)
+            running = process is not None and process.poll() is None
+            if action == 'stop' and not running:
+                return True, f"Server '{name}' lief nicht."
+            if action == 'start' and running: # Schon gestartet: trotzdem auf Bereitschaft warten
+                return self.wait_until_ready(name, self.bulk_ready_timeout)
+            submit = self.submit_start if action == 'start' else self.submit_stop
+            ok, sub_job = submit(name)
+            if not ok:
+                return False, sub_job
+            finished = self.jobs.wait(sub_job['id'])
+            if finished['state'] != 'done':
+                return False, finished['message']
+            if action == 'start':
+                return self.wait_until_ready(name, self.bulk_ready_timeout)
+            return True, finished['message']
+
+        def run_one(name):
+            try:
+                outcome = handle(name)
+            except Exception as e:
+                outcome = (False, f"Fehler: {e}")
+            with progress_lock:
+                results[name] = {'success': outcome[0], 'message': outcome[1]}
+                job.set_message(f"{len(results)}/{len(targets)} Server abgearbeitet ({action}).")
+
+        job.set_message(f"0/{len(targets)} Server abgearbeitet ({action}), max. {max_parallel} parallel.")
+        with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix=f'bulk-{action}') as pool:
+            list(pool.map(run_one, targets)) # map startet in Prioritätsreihenfolge
+
+        failed = [n for n, r in results.items() if not r['success']]
+        verb = 'gestartet' if action == 'start' else 'gestoppt'
+        if failed:
+            return False, f"{len(targets) - len(failed)}/{len(targets)} Server {verb}. Fehlgeschlagen: {', '.join(failed)}", results
+        return True, f"Alle {len(targets)} Server {verb}.", results
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def list_jobs(self, server_name=None, limit=50):
+        return self.jobs.list(server_name=server_name, limit=limit)
 
     def get_all_servers_with_resources(self):
         servers_view = {}
@@ -98,32 +361,34 @@ class ServerManager:
             process_obj = self.processes.get(name)
             if process_obj and process_obj.poll() is None:
                 details['status'] = 'running'
-                if _psutil_available and hasattr(process_obj, 'pid'):
-                    try:
-                        p = psutil.Process(process_obj.pid)
-                        details['cpu_usage'] = p.cpu_percent(interval=0.1) 
-                        mem_info = p.memory_info()
-                        details['ram_usage_rss_mb'] = round(mem_info.rss / (1024 * 1024), 2)
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        details['cpu_usage'] = 'N/A (Err)'
-                        details['ram_usage_rss_mb'] = 'N/A (Err)'
-                else:
-                    details['cpu_usage'] = 'N/A (psutil)'
-                    details['ram_usage_rss_mb'] = 'N/A (psutil)'
-                if details_template.get('status') != 'running':
-                    self.servers[name]['status'] = 'running'
-                    self._save_servers_config()
+                details.update(self._resource_values_from_snapshot(name))
+                # Status lebt nur im Speicher, Lesepfade schreiben nichts mehr auf die Platte
+                self.servers[name]['status'] = 'running'
             else:
                 details['status'] = details_template.get('status', 'stopped')
                 if details['status'] == 'running': 
                      details['status'] = 'stopped'
                      self.servers[name]['status'] = 'stopped'
-                     self._save_servers_config()
                 details['cpu_usage'] = 0
                 details['ram_usage_rss_mb'] = 0
+            details['health'] = self.get_server_health(name, details['status'] == 'running')
+            details['ready'] = details['health'] == 'ready'
+            details['slp'] = self.status_poller.get(name)
+            details['active_job'] = self.jobs.active_job(name)
             servers_view[name] = details
         return servers_view
         
+    def _resource_values_from_snapshot(self, server_name):
+        """ Liefert cpu_usage/ram_usage_rss_mb eines laufenden Servers aus dem Sampler-Cache. """
+        if not _psutil_available:
+            return {'cpu_usage': 'N/A (psutil)', 'ram_usage_rss_mb': 'N/A (psutil)'}
+        snapshot = self.resource_sampler.get_snapshot(server_name)
+        if snapshot is None: # Prozess gerade erst gestartet, noch kein Tick gelaufen
+            return {'cpu_usage': 0, 'ram_usage_rss_mb': 0}
+        if snapshot.get('error'):
+            return {'cpu_usage': 'N/A (Err)', 'ram_usage_rss_mb': 'N/A (Err)'}
+        return {'cpu_usage': snapshot['cpu_usage'], 'ram_usage_rss_mb': snapshot['ram_usage_rss_mb']}
+
     def get_server_resource_usage(self, server_name):
         if not _psutil_available:
             return {'error': 'psutil_not_installed', 'cpu_usage': 'N/A', 'ram_usage_rss_mb': 'N/A', 'status': 'N/A'}
@@ -132,21 +397,135 @@ class ServerManager:
         server_config_details = self.servers.get(server_name, {})
         current_status_from_config = server_config_details.get('status', 'stopped')
 
-        if process_obj and process_obj.poll() is None and hasattr(process_obj, 'pid'):
-            try:
-                p = psutil.Process(process_obj.pid)
-                p.cpu_percent(interval=None) 
-                time.sleep(0.1) 
-                cpu = p.cpu_percent(interval=None)
-                mem_info = p.memory_info()
-                ram_rss_mb = round(mem_info.rss / (1024 * 1024), 2)
-                return {'cpu_usage': cpu, 'ram_usage_rss_mb': ram_rss_mb, 'status': 'running'}
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                return {'error': 'process_disappeared_or_access_denied', 'cpu_usage': 'N/A', 'ram_usage_rss_mb': 'N/A', 'status': 'stopped'}
-            except Exception as e:
-                print(f"Fehler beim Abfragen der Ressourcen für {server_name}: {e}")
-                return {'error': 'resource_query_error', 'cpu_usage': 'N/A', 'ram_usage_rss_mb': 'N/A', 'status': current_status_from_config}
-        return {'cpu_usage': 0, 'ram_usage_rss_mb': 0, 'status': current_status_from_config}
+        if process_obj and process_obj.poll() is None:
+            snapshot = self.resource_sampler.get_snapshot(server_name)
+            if snapshot is None:
+                return {'cpu_usage': 0, 'ram_usage_rss_mb': 0, 'status': 'running'}
+            if snapshot.get('error'):
+                return {'error': snapshot['error'], 'cpu_usage': 'N/A', 'ram_usage_rss_mb': 'N/A', 'status': 'stopped'}
+            result = dict(snapshot)
+            result['status'] = 'running'
+            result.update(self.perf_sampler.get_current(server_name))
+            result['health'] = self.get_server_health(server_name, True)
+            result['slp'] = self.status_poller.get(server_name)
+            result['idle_seconds'] = self.hibernator.idle_seconds(server_name)
+            return result
+        return {'cpu_usage': 0, 'ram_usage_rss_mb': 0, 'status': current_status_from_config,
+                'health': self.get_server_health(server_name, False)}
+
+    def _configured_ports(self):
+        """ {server_name: port} aller konfigurierten Server (für den SLP-Poller), ohne schlafende. """
+        return {name: details.get('port') for name, details in dict(self.servers).items()
+                if isinstance(details, dict) and details.get('port') and not details.get('hibernating')}
+
+    def get_server_health(self, server_name, running=None):
+        """
+        Zustand laut Server List Ping statt nur laut Prozessliste:
+        'stopped', 'sleeping' (gestoppt, Platzhalter wartet auf einen Login),
+        'starting' (noch keine Antwort seit dem Start), 'ready'
+        (beantwortet Statusanfragen) oder 'unresponsive' (hat geantwortet bzw.
+        "Done" gemeldet, beantwortet aber slp_unresponsive_after Abfragen in Folge nicht).
+        """
+        if running is None:
+            process = self.processes.get(server_name)
+            running = process is not None and process.poll() is None
+        if not running:
+            return 'sleeping' if self.hibernator.is_sleeping(server_name) else 'stopped'
+        slp = self.status_poller.get(server_name)
+        if slp and slp['online']:
+            return 'ready'
+        answered = bool(slp and slp.get('last_ok_at'))
+        if slp and slp['failures'] >= self.slp_unresponsive_after and (answered or self.is_server_ready(server_name)):
+            return 'unresponsive'
+        return 'ready' if answered else 'starting' # Einzelne Aussetzer zählen noch nicht
+
+    def _running_readiness(self):
+        """ {server_name: bereit} aller laufenden Server (für den Leistungs-Sampler). """
+        return {name: self.is_server_ready(name) for name, process in list(self.processes.items())
+                if process.poll() is None}
+
+    def get_history(self, server_names=None, resolution='1m', since=None):
+        """
+        Zeitreihen mehrerer Server in einer Abfrage.
+        :return: (True, {'resolution', 'step', 'servers': {name: {'t': [...], 'tps': [...], ...}}})
+                 oder (False, Fehlermeldung)
+        """
+        steps = {name: step for name, step, _ in RESOLUTIONS}
+        if resolution not in steps:
+            return False, f"Unbekannte Auflösung '{resolution}' (erlaubt: {', '.join(steps)})."
+        if server_names is None:
+            server_names = list(self.servers.keys())
+        names = [n for n in server_names if isinstance(self.servers.get(n), dict)]
+        return True, {'resolution': resolution, 'step': steps[resolution],
+                      'servers': self.history.export(names, resolution, since)}
+
+    def get_metrics_samples(self):
+        """
+        Alle Werte für /metrics aus den Caches (Sampler-Snapshot, Zähler); ruft kein psutil auf.
+        :return: {'servers': {name: {...}}, 'panel': {...}}
+        """
+        now = time.time()
+        snapshots = self.resource_sampler.get_all_snapshots()
+        servers = {}
+        for name, details in dict(self.servers).items():
+            if not isinstance(details, dict):
+                continue
+            process = self.processes.get(name)
+            running = process is not None and process.poll() is None
+            slp = self.status_poller.get(name)
+            sample = {
+                'up': running,
+                'ready': self.get_server_health(name, running) == 'ready',
+                'restarts': max(0, self.start_counts.get(name, 0) - 1),
+                'console_lines': self.console_line_counts.get(name, 0),
+            }
+            snapshot = snapshots.get(name)
+            if running and snapshot and not snapshot.get('error'):
+                for key in ('cpu_seconds', 'rss_bytes', 'num_threads', 'num_fds', 'io_read_bytes',
+                            'io_write_bytes', 'console_lines_per_second', 'cpu_periods', 'cpu_throttled_periods',
+                            'cpu_throttled_seconds', 'memory_max_bytes', 'memory_current_bytes',
+                            'memory_max_events', 'oom_kills', 'io_weight'):
+                    sample[key] = snapshot.get(key)
+                if snapshot.get('cpu_quota_percent') is not None:
+                    sample['cpu_quota_cores'] = snapshot['cpu_quota_percent'] / 100
+                if snapshot.get('cpu_affinity') is not None:
+                    sample['cpu_affinity_count'] = len(snapshot['cpu_affinity'])
+                sample['uptime_seconds'] = round(now - snapshot['started_at'], 3)
+                sample['sample_age_seconds'] = round(now - snapshot['sampled_at'], 3)
+            if running:
+                perf = self.perf_sampler.get_current(name)
+                sample.update({key: perf[key] for key in ('tps', 'mspt', 'players')})
+                if slp and slp['online']:
+                    sample['slp_status_seconds'] = round(slp['status_ms'] / 1000, 6)
+                    if slp['latency_ms'] is not None:
+                        sample['slp_latency_seconds'] = round(slp['latency_ms'] / 1000, 6)
+            servers[name] = sample
+        capacity = self.capacity.snapshot()
+        panel = {
+            'output_backlog_bytes': self.output_mux.backlog_bytes if self.output_mux else None,
+            'output_streams': self.output_mux.registered_count if self.output_mux else len(self.threads),
+            'state_commits': self.state_store.commit_count,
+            'state_rows_written': self.state_store.rows_written,
+            'jobs_active': self.jobs.active_count(),
+            'servers_configured': len(servers),
+            'servers_sleeping': len(self.hibernator.sleeping()),
+            'capacity_bytes': capacity['capacity_bytes'],
+            'capacity_committed_bytes': capacity['committed_bytes'],
+        }
+        return {'servers': servers, 'panel': panel}
+
+    def get_resource_usage_bulk(self, server_names=None):
+        """
+        Status, CPU und RAM für alle (oder die angegebenen) Server in einem Aufruf.
+        Unbekannte Servernamen werden ignoriert.
+        """
+        if server_names is None:
+            server_names = list(self.servers.keys())
+        return {name: self.get_server_resource_usage(name) for name in server_names if name in self.servers}
+
+    def server_exists(self, server_name):
+        """Schlanke Prüfung für heiße Pfade; im Client-Modus wird nur der Name übertragen."""
+        return server_name in self.servers
 
     def get_server_details(self, server_name):
         all_servers = self.get_all_servers_with_resources()
@@ -161,28 +540,127 @@ class ServerManager:
             safe_server_name = server_name
         return os.path.join(self.instances_dir, safe_server_name)
 
+    def _get_console_buffer(self, server_name):
+        buffer = self.server_outputs.get(server_name)
+        if buffer is None:
+            buffer = self.server_outputs.setdefault(server_name, ConsoleBuffer(self.console_buffer_lines))
+        return buffer
+
+    def _get_console_log(self, server_name):
+        console_log = self.console_logs.get(server_name)
+        if console_log is None:
+            log_dir = os.path.join(self.get_server_path(server_name, validate_name_for_path=False), '.panel', 'console')
+            console_log = self.console_logs.setdefault(server_name, ConsoleLog(log_dir, **self.console_log_settings))
+        return console_log
+
+    def _handle_console_line(self, server_name, line):
+        """ Verarbeitet eine einzelne Zeile der Serverausgabe. """
+        self.console_line_counts[server_name] = self.console_line_counts.get(server_name, 0) + 1
+        self._get_console_buffer(server_name).append(line)
+        self._get_console_log(server_name).append(line)
+        self.perf_sampler.observe_line(server_name, line)
+        ready_event = self.ready_events.get(server_name)
+        if ready_event is not None and not ready_event.is_set() and DONE_LINE_PATTERN.search(line):
+            ready_event.set()
+            self.capacity.settled(server_name)
+            process = self.processes.get(server_name)
+            if isinstance(process, SupervisedProcess):
+                process.mark_ready() # Bleibt für ein neu gestartetes Panel erhalten
+
+    def is_server_ready(self, server_name):
+        """ True, sobald der laufende Server seine "Done (...)!"-Zeile ausgegeben hat. """
+        event = self.ready_events.get(server_name)
+        process = self.processes.get(server_name)
+        return bool(event and event.is_set() and process and process.poll() is None)
+
+    def wait_until_ready(self, server_name, timeout):
+        """
+        Wartet, bis der Server bereit ist, beendet wurde oder das Timeout abläuft.
+        :return: (True, Meldung) wenn bereit, sonst (False, Grund)
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            event = self.ready_events.get(server_name)
+            if event is not None and event.wait(timeout=0.5):
+                return True, f"Server '{server_name}' ist bereit."
+            process = self.processes.get(server_name)
+            if process is None or process.poll() is not None:
+                return False, f"Server '{server_name}' wurde beendet, bevor er bereit war."
+            if time.monotonic() >= deadline:
+                return False, f"Server '{server_name}' war nach {timeout}s noch nicht bereit."
+
+    def search_console_log(self, server_name, start=None, end=None, query=None, regex=False,
+                           ignore_case=False, limit=500):
+        """
+        Durchsucht die persistente Konsolen-Historie eines Servers.
+        :return: (True, {'matches': [...], 'truncated': bool}) oder (False, Fehlermeldung)
+        """
+        if server_name not in self.servers:
+            return False, f"Server '{server_name}' nicht gefunden."
+        try:
+            result = self._get_console_log(server_name).search(
+                start=start, end=end, query=query, regex=regex, ignore_case=ignore_case, limit=limit)
+        except re.error as e:
+            return False, f"Ungültiger regulärer Ausdruck: {e}"
+        return True, result
+
+    def _handle_console_lines(self, server_name, lines):
+        """ Callback des Multiplexers: ein Block vollständiger Zeilen. """
+        for line in lines:
+            self._handle_console_line(server_name, line)
+
+    def _on_output_eof(self, process, server_name):
+        if server_name in self.console_logs:
+            self.console_logs[server_name].flush()
+        if process.stdout and not process.stdout.closed:
+            process.stdout.close()
+        self.output_mux.watch_exit(process, lambda: self._on_process_exit(process, server_name))
+
+    def _on_process_exit(self, process, server_name):
+        """ Räumt nach dem Ende eines Serverprozesses auf (nur wenn er noch der aktuelle ist). """
+        if self.processes.get(server_name) is not process:
+            return
+        if server_name in self.servers and isinstance(self.servers.get(server_name), dict):
+            self.servers[server_name]['status'] = 'stopped'
+        del self.processes[server_name]
+        self.threads.pop(server_name, None)
+        pool = self.rcon_pools.pop(server_name, None)
+        if pool is not None:
+            pool.close()
+        if self.cgroups is not None:
+            self.cgroups.remove(server_name)
+        self.capacity.release(server_name)
+
     def _read_output(self, process, server_name):
+        """ Fallback für Windows: blockierendes Lesen in einem eigenen Thread. """
         if process.stdout:
             try:
-                for line in iter(process.stdout.readline, ''):
-                    line_stripped = line.strip()
+                for line in iter(process.stdout.readline, b''):
+                    line_stripped = line.decode('utf-8', 'replace').strip()
                     if line_stripped: 
-                        self.server_outputs.setdefault(server_name, []).append(line_stripped)
-                        if len(self.server_outputs[server_name]) > 250: 
-                            self.server_outputs[server_name].pop(0)
+                        self._handle_console_line(server_name, line_stripped)
             except ValueError: 
                 print(f"INFO: Stdout-Stream für Server {server_name} wurde geschlossen.")
             finally:
                 if process.stdout and not process.stdout.closed:
                     process.stdout.close()
+                if server_name in self.console_logs:
+                    self.console_logs[server_name].flush()
         process.wait() 
-        if server_name in self.servers and isinstance(self.servers.get(server_name), dict):
-            self.servers[server_name]['status'] = 'stopped'
-            self._save_servers_config()
-        if server_name in self.processes: del self.processes[server_name]
-        if server_name in self.threads: del self.threads[server_name]
+        self._on_process_exit(process, server_name)
 
-    def start_server(self, server_name):
+    @staticmethod
+    def _write_stdin(process, text):
+        """ Schreibt eine Zeile auf stdin des (binär geöffneten) Prozesses. """
+        process.stdin.write((text + '\n').encode('utf-8'))
+        process.stdin.flush()
+
+    def start_server(self, server_name, wait_for_capacity=0, on_wait=None):
+        """
+        Startet einen Server, sofern der Host den Speicher dafür hat (siehe CapacityPlanner).
+        :param wait_for_capacity: Sekunden, die auf frei werdenden Speicher gewartet wird (0 = sofort ablehnen)
+        :param on_wait: Optionales Callable(Grund) für Zwischenstände, solange gewartet wird
+        """
         if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
             return False, f"Server '{server_name}' nicht gefunden oder Konfiguration fehlerhaft."
         server_info = self.servers[server_name]
@@ -196,19 +674,11 @@ class ServerManager:
         if server_name in self.processes and self.processes[server_name].poll() is None:
             return False, f"Server '{server_name}' läuft bereits."
 
-        ram_min = server_info.get('ram_min', '1G')
-        ram_max = server_info.get('ram_max', '2G')
-        velocity_secret = server_info.get('velocity_secret', '')
-        custom_jvm_args_str = server_info.get('custom_jvm_args', '')
-        custom_jvm_args_list = custom_jvm_args_str.split()
+        resolved = self.build_start_command(server_name)
+        command = resolved['command']
+        for note in resolved['notes']:
+            print(f"INFO: JVM-Profil von '{server_name}': {note}")
 
-        command = ['java']
-        # Velocity Secret und Custom Args kommen vor RAM und JAR
-        if velocity_secret:
-            command.append(f'-Dvelocity-forwarding-secret={velocity_secret}')
-        command.extend(custom_jvm_args_list)
-        command.extend([f'-Xms{ram_min}', f'-Xmx{ram_max}', '-jar', 'server.jar', 'nogui'])
-        
         eula_path = os.path.join(server_dir, 'eula.txt')
         eula_ok = False
         if os.path.exists(eula_path):
@@ -225,46 +695,110 @@ class ServerManager:
             else: return False, f"EULA nicht akzeptiert für {server_name} (in Panel oder eula.txt)."
         if not eula_ok: return False, f"EULA Problem für {server_name} trotz Versuchen."
 
+        if self.rcon_enabled:
+            # Ältere Instanzen bekommen RCON nachträglich, bestehende Einstellungen bleiben erhalten
+            rcon_ok, rcon_msg = self._update_server_properties(server_dir, self._rcon_properties(server_name))
+            if not rcon_ok:
+                print(f"WARNUNG: {rcon_msg} Befehle gehen weiter über stdin.")
+
+        admitted, reason = self.capacity.admit(server_name, self.capacity.footprint(server_info),
+                                               wait=wait_for_capacity, on_wait=on_wait)
+        if not admitted:
+            return False, f"Start von '{server_name}' abgelehnt: {reason}"
+        if server_name in self.processes and self.processes[server_name].poll() is None:
+            return False, f"Server '{server_name}' läuft bereits." # Während des Wartens anderweitig gestartet
+        self._leave_sleep(server_name) # Platzhalter gibt den Port frei
+
         try:
             startupinfo = None
             if os.name == 'nt':
                 startupinfo = subprocess.STARTUPINFO()
                 startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
                 startupinfo.wShowWindow = subprocess.SW_HIDE
+            cgroup_procs, cpus = self._prepare_resource_limits(server_name)
             print(f"Starte Server '{server_name}' mit Befehl: {' '.join(command)}")
-            process = subprocess.Popen(
-                command, cwd=server_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT, text=True, bufsize=1, universal_newlines=True,
-                startupinfo=startupinfo, creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-            )
+            if self.supervisor_enabled:
+                # Der Aufpasser wechselt vor dem Serverstart selbst in cgroup und CPU-Set, der Server erbt beides
+                process = SupervisedProcess.launch(
+                    command, server_dir, self._supervisor_dir(server_name), buffer_bytes=self.supervisor_buffer_bytes,
+                    cgroup_procs=cgroup_procs, cpus=cpus)
+            else:
+                process = subprocess.Popen(
+                    command, cwd=server_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT, bufsize=0, # Binär: Dekodieren übernimmt der Multiplexer blockweise
+                    startupinfo=startupinfo, creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+                )
+            self._apply_resource_limits(server_name, process, cgroup_procs, cpus,
+                                        placed=self.supervisor_enabled)
+            self.ready_events[server_name] = threading.Event()
+            self.perf_sampler.reset(server_name)
+            self.status_poller.forget(server_name) # Antworten des vorherigen Laufs zählen nicht
             self.processes[server_name] = process
-            self.server_outputs[server_name] = []
-            thread = threading.Thread(target=self._read_output, args=(process, server_name))
-            thread.daemon = True
-            thread.start()
-            self.threads[server_name] = thread
+            self.launch_commands[server_name] = command
+            self._watch_output(server_name, process)
             self.servers[server_name]['status'] = 'running'
-            self._save_servers_config()
+            self.start_counts[server_name] = self.start_counts.get(server_name, 0) + 1
             return True, f"Server '{server_name}' gestartet."
         except Exception as e:
+            self.capacity.release(server_name)
             if server_name in self.servers and isinstance(self.servers.get(server_name), dict):
                 self.servers[server_name]['status'] = 'stopped'
-                self._save_servers_config()
             if server_name in self.processes: del self.processes[server_name]
             return False, f"Fehler beim Starten von Server '{server_name}': {e}"
 
+    def _watch_output(self, server_name, process):
+        """ Hängt die Ausgabe eines (neuen oder wieder übernommenen) Serverprozesses an Konsole und Log. """
+        self._get_console_buffer(server_name) # Puffer bleibt über Neustarts erhalten, damit Cursor gültig bleiben
+        if self.output_mux is not None:
+            self.output_mux.register(process.stdout, server_name, self._handle_console_lines,
+                                     lambda name: self._on_output_eof(process, name))
+        else:
+            thread = threading.Thread(target=self._read_output, args=(process, server_name))
+            thread.daemon = True
+            thread.start()
+            self.threads[server_name] = thread
+
+    def _supervisor_dir(self, server_name):
+        """ PID-Datei, Konsolen-Socket und Bereit-Markierung des Aufpassers. """
+        return os.path.join(self.get_server_path(server_name), '.panel')
+
+    def _reattach_servers(self):
+        """ Übernimmt Server, deren Aufpasser noch läuft: Konsole, Befehle, Messungen und Speicherzusage. """
+        for server_name, details in list(self.servers.items()):
+            try:
+                process = SupervisedProcess.attach(self._supervisor_dir(server_name))
+            except ValueError: # Ungültiger Name
+                continue
+            if process is None:
+                continue
+            ready_event = threading.Event()
+            if process.ready:
+                ready_event.set()
+            self.ready_events[server_name] = ready_event
+            self.processes[server_name] = process
+            self.launch_commands[server_name] = process.command
+            self.capacity.record(server_name, self.capacity.footprint(details))
+            if ready_event.is_set():
+                self.capacity.settled(server_name)
+            self._watch_output(server_name, process)
+            details['status'] = 'running'
+            if details.get('hibernating'):
+                details['hibernating'] = False
+                self._mark_server_changed(server_name)
+            print(f"INFO: Laufenden Server '{server_name}' übernommen (PID {process.pid}, Aufpasser {process.supervisor_pid}).")
+
     def stop_server(self, server_name):
+        if self._leave_sleep(server_name):
+            return True, f"Ruhezustand von '{server_name}' beendet, der Server bleibt gestoppt."
         if server_name not in self.processes or self.processes[server_name].poll() is not None:
             if server_name in self.servers and isinstance(self.servers.get(server_name), dict) and self.servers[server_name]['status'] == 'running':
                 self.servers[server_name]['status'] = 'stopped'
-                self._save_servers_config()
             return False, f"Server '{server_name}' läuft nicht oder wurde bereits gestoppt."
         process = self.processes[server_name]
         msg = ""
         try:
             if process.stdin and not process.stdin.closed:
-                process.stdin.write("stop\n")
-                process.stdin.flush()
+                self._write_stdin(process, "stop")
             else: process.terminate()
             process.wait(timeout=30)
             msg = f"Server '{server_name}' gestoppt."
@@ -286,32 +820,182 @@ class ServerManager:
                     msg = f"Server '{server_name}' hart beendet nach Fehler."
             else: msg = f"Server '{server_name}' war bereits gestoppt. Fehler: {e}"
         finally:
-            if server_name in self.processes: del self.processes[server_name]
-            if server_name in self.threads: del self.threads[server_name]
-            self.server_outputs.pop(server_name, None) 
-            if server_name in self.servers and isinstance(self.servers.get(server_name), dict):
-                self.servers[server_name]['status'] = 'stopped'
-                self._save_servers_config()
+            self._on_process_exit(process, server_name)
         return True, msg
 
-    def get_console_output_with_resources(self, server_name):
-        output = self.server_outputs.get(server_name, ["Server nicht aktiv oder keine aktuelle Ausgabe."])
+    def get_console_output_with_resources(self, server_name, since=None):
+        """
+        Liefert die Konsolenzeilen ab dem Cursor 'since' (alle, falls None) plus
+        den nächsten Cursor und die aktuellen Ressourcenwerte.
+        """
+        buffer = self.server_outputs.get(server_name)
+        if buffer is None:
+            chunk = {'lines': [], 'next': 0, 'missed': 0, 'reset': bool(since)}
+            if since is None:
+                chunk['lines'] = ["Server nicht aktiv oder keine aktuelle Ausgabe."]
+        else:
+            chunk = buffer.since(since)
         resources = self.get_server_resource_usage(server_name)
-        return {'console': output, 'resources': resources}
+        return {'console': chunk['lines'], 'next': chunk['next'], 'missed': chunk['missed'],
+                'reset': chunk['reset'], 'resources': resources}
+
+    def stream_console(self, server_name, since=None):
+        """
+        Generator für Live-Konsolen-Events eines Servers (z.B. für SSE).
+        Liefert Dicts mit 'event' = 'lines' | 'resync' | 'heartbeat'. Alle Zuschauer
+        eines Servers hängen am selben ConsoleBuffer; jeder hat nur eine eigene,
+        begrenzte Queue. Läuft ein Client über, wird die Queue verworfen und der
+        Rückstand als 'resync' direkt aus dem Ringpuffer nachgeliefert.
+        """
+        buffer = self._get_console_buffer(server_name)
+        subscription, chunk = buffer.subscribe(since, self.console_stream_queue_size)
+        try:
+            cursor = chunk['next']
+            yield dict(chunk, event='resync' if chunk['reset'] or chunk['missed'] else 'lines')
+            while True:
+                if subscription.overflowed:
+                    chunk = subscription.resync(cursor)
+                    cursor = chunk['next']
+                    yield dict(chunk, event='resync')
+                    continue
+                try:
+                    batch = [subscription.queue.get(timeout=self.console_stream_heartbeat)]
+                except queue.Empty:
+                    yield {'event': 'heartbeat', 'next': cursor}
+                    continue
+                # Alles, was schon wartet, in einem Event zusammenfassen
+                while len(batch) < 500:
+                    try:
+                        batch.append(subscription.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                lines = [line for seq, line in batch if seq >= cursor]
+                cursor = max(cursor, batch[-1][0] + 1)
+                if lines:
+                    yield {'event': 'lines', 'lines': lines, 'next': cursor, 'missed': 0, 'reset': False}
+        finally:
+            subscription.close()
+
+    # --- RCON ---
+
+    def _allocate_rcon_port(self, server_name):
+        """ Erster freier RCON-Port ab rcon_port_base (laut Port-Index und Betriebssystem). """
+        return self.ports.allocate(server_name, 'rcon_port', self.rcon_port_base)
+
+    def _rcon_properties(self, server_name):
+        """ RCON-Einträge für server.properties; fehlende Port/Passwort-Angaben werden einmalig erzeugt. """
+        details = self.servers[server_name]
+        if not details.get('rcon_port') or not details.get('rcon_password'):
+            details.setdefault('rcon_password', secrets.token_urlsafe(24))
+            if not details.get('rcon_port'):
+                details['rcon_port'] = self._allocate_rcon_port(server_name)
+            self._mark_server_changed(server_name)
+        return {'enable-rcon': 'true', 'rcon.port': details['rcon_port'],
+                'rcon.password': details['rcon_password'], 'broadcast-rcon-to-ops': 'false'}
+
+    def _get_rcon_pool(self, server_name):
+        """ RCON-Pool eines bereiten Servers (oder None, solange der Server noch lädt bzw. RCON aus ist). """
+        if not self.rcon_enabled or not self.is_server_ready(server_name):
+            return None
+        pool = self.rcon_pools.get(server_name)
+        if pool is None:
+            details = self.servers.get(server_name) or {}
+            if not details.get('rcon_port') or not details.get('rcon_password'):
+                return None
+            pool = self.rcon_pools.setdefault(server_name, RconPool(
+                '127.0.0.1', details['rcon_port'], details['rcon_password'],
+                size=self.rcon_pool_size, timeout=self.rcon_timeout))
+        return pool
 
-    def send_command(self, server_name, command):
+    def _query_rcon(self, server_name, commands):
+        """ Für Hintergrundabfragen: Antworten per RCON oder None (kein stdin-Ersatz, da ohne Antwort nutzlos). """
+        pool = self._get_rcon_pool(server_name)
+        if pool is None:
+            return None
+        try:
+            return pool.execute_many(commands)
+        except RconError:
+            return None
+
+    def send_command(self, server_name, command, timeout=None):
+        """
+        Führt einen Konsolenbefehl aus, bevorzugt per RCON (mit Antwort des Servers).
+        Ist RCON nicht erreichbar, wird der Befehl auf stdin geschrieben.
+        :return: (True, {'message', 'response', 'via'}) oder (False, Fehlermeldung)
+        """
         if server_name not in self.processes or self.processes[server_name].poll() is not None:
             return False, "Server nicht gestartet oder bereits beendet."
         if not command: return False, "Kein Befehl erhalten."
+        ok, result = self.send_commands(server_name, [command], timeout=timeout)
+        if not ok:
+            return False, result
+        return True, result[0]
+
+    def send_commands(self, server_name, commands, timeout=None):
+        """
+        Mehrere Befehle in einem Rutsch (per RCON gepipelined).
+        :return: (True, [{'message', 'response', 'via'}, ...]) oder (False, Fehlermeldung)
+        """
+        if server_name not in self.processes or self.processes[server_name].poll() is not None:
+            return False, "Server nicht gestartet oder bereits beendet."
+        commands = [c for c in commands if c]
+        if not commands: return False, "Kein Befehl erhalten."
+        pool = self._get_rcon_pool(server_name)
+        if pool is not None:
+            quiet = pool.backing_off # Nur den ersten Fehlschlag melden, nicht jeden Befehl
+            try:
+                responses = pool.execute_many(commands, timeout)
+                return True, [{'message': response or "Befehl ausgeführt (keine Ausgabe).", 'response': response, 'via': 'rcon'}
+                              for response in responses]
+            except RconUnavailable as e:
+                if not quiet: print(f"WARNUNG: RCON für '{server_name}' nicht verfügbar ({e}), Befehl geht über stdin.")
+            except RconError as e:
+                # Der Befehl kann schon ausgeführt sein, daher kein zweiter Versuch über stdin
+                return False, f"Fehler bei der RCON-Ausführung: {e}"
         try:
             process = self.processes[server_name]
             if process.stdin and not process.stdin.closed:
-                process.stdin.write(command + '\n'); process.stdin.flush()
-                return True, "Befehl gesendet."
+                for command in commands:
+                    self._write_stdin(process, command)
+                return True, [{'message': "Befehl gesendet.", 'response': None, 'via': 'stdin'} for _ in commands]
             else: return False, "Server-Konsole (stdin) ist nicht beschreibbar."
         except BrokenPipeError: return False, "Fehler: Verbindung zur Server-Konsole unterbrochen."
         except Exception as e: return False, f"Fehler beim Senden des Befehls: {e}"
 
+    def _update_server_properties(self, server_dir, updates):
+        """ Setzt einzelne Schlüssel in server.properties; alle übrigen Zeilen bleiben unverändert. """
+        properties_path = os.path.join(server_dir, 'server.properties')
+        try:
+            with open(properties_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            lines = []
+        except OSError as e:
+            return False, f"Konnte server.properties nicht lesen: {e}"
+        pending = {key: str(value) for key, value in updates.items()}
+        changed = False
+        for i, line in enumerate(lines):
+            key, sep, value = line.partition('=')
+            key = key.strip()
+            if sep and not key.startswith('#') and key in pending:
+                new_value = pending.pop(key)
+                if value != new_value:
+                    lines[i] = f"{key}={new_value}"
+                    changed = True
+        for key, value in pending.items():
+            lines.append(f"{key}={value}")
+            changed = True
+        if not changed:
+            return True, "server.properties unverändert."
+        tmp_path = properties_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, properties_path)
+        except OSError as e:
+            return False, f"Fehler beim Schreiben der server.properties: {e}"
+        return True, "server.properties aktualisiert."
+
     # ***** NEU DEFINIERTE METHODE *****
     def _generate_server_properties(self, server_dir, server_data):
         """ Generiert eine server.properties Datei mit den gegebenen Daten. """
@@ -325,12 +1009,19 @@ class ServerManager:
             'difficulty': server_data.get('difficulty', 'easy'),
             'max-players': server_data.get('max_players', 20),
             'online-mode': str(server_data.get('online_mode', True)).lower(), # Muss 'true' oder 'false' sein
-            'enable-rcon': 'false', # Standardmäßig aus
+            'enable-rcon': 'false', # Nur mit Port und Passwort (siehe unten)
             'motd': f"A Minecraft Server - {server_data.get('server_name', 'My Server')}",
             # Velocity/Proxy spezifische Einstellungen
             'network-compression-threshold': 256, # Guter Standardwert
         }
 
+        if server_data.get('rcon_port') and server_data.get('rcon_password'):
+            # Nur lokal genutzt: send_command() verbindet sich über 127.0.0.1
+            props['enable-rcon'] = 'true'
+            props['rcon.port'] = server_data['rcon_port']
+            props['rcon.password'] = server_data['rcon_password']
+            props['broadcast-rcon-to-ops'] = 'false'
+
         # PaperMC spezifische Einstellungen für Velocity (falls Secret vorhanden ist)
         # Diese sollten nur geschrieben werden, wenn die JAR vermutlich Paper/Purpur etc. ist.
         # Für eine einfache Implementierung schreiben wir sie, wenn ein Secret da ist.
@@ -370,10 +1061,12 @@ class ServerManager:
         # Validierungen (gekürzt, da oben schon behandelt)
         if not all(c.isalnum() or c in ['_', '-'] for c in server_name):
              return False, "Servername darf nur Buchstaben, Zahlen, '_' und '-' enthalten."
-        try:
-            port_num = int(server_data.get('port'))
-            if not (1024 <= port_num <= 65535): raise ValueError()
-        except: return False, "Ungültiger Port."
+        auto_port = str(server_data.get('port') or '').strip().lower() in ('', 'auto')
+        if not auto_port:
+            try:
+                port_num = int(server_data.get('port'))
+                if not (1024 <= port_num <= 65535): raise ValueError()
+            except: return False, "Ungültiger Port."
         # Weitere Validierungen für RAM, max_players etc. sollten hier auch sein.
 
         try:
@@ -383,28 +1076,51 @@ class ServerManager:
         if server_name in self.servers:
             return False, f"Ein Server mit dem Namen '{server_name}' existiert bereits."
         
-        for s_info in self.servers.values():
-            if isinstance(s_info, dict) and str(s_info.get('port')) == str(server_data.get('port')):
-                return False, f"Port {server_data.get('port')} wird bereits verwendet."
-
         source_jar_path = os.path.join(self.jars_dir, os.path.basename(selected_jar_filename))
         if not os.path.exists(source_jar_path):
             return False, f"JAR-Datei '{os.path.basename(selected_jar_filename)}' nicht gefunden."
 
+        fits, reason = self.capacity.fits_at_all(self.capacity.footprint(server_data))
+        if not fits:
+            return False, f"Server '{server_name}' könnte nie starten: {reason}"
+
+        server_data = dict(server_data)
+        try:
+            if auto_port:
+                server_data['port'] = self.ports.allocate(server_name, 'port', self.game_port_base)
+            else:
+                claimed, reason = self.ports.claim(port_num, server_name, 'port')
+                if not claimed: return False, reason
+                server_data['port'] = port_num
+            if self.rcon_enabled:
+                server_data['rcon_port'] = self._allocate_rcon_port(server_name)
+                server_data['rcon_password'] = secrets.token_urlsafe(24)
+        except ValueError as e:
+            self.ports.release(server_name); return False, str(e)
+
+        success, message = self._provision_server(server_name, server_dir, server_data, selected_jar_filename)
+        if not success:
+            self.ports.release(server_name) # Reservierte Ports wieder freigeben
+        return success, message
+
+    def _provision_server(self, server_name, server_dir, server_data, selected_jar_filename):
+        """ Legt Verzeichnis, JAR, eula.txt und server.properties an und trägt den Server ein. """
         try: os.makedirs(server_dir, exist_ok=True)
         except OSError as e: return False, f"Fehler beim Erstellen des Verzeichnisses '{server_dir}': {e}"
 
+        # Reflink/Hardlink auf das Objekt im JAR-Speicher, Kopie nur als Fallback
         destination_jar_path = os.path.join(server_dir, 'server.jar')
-        try: shutil.copy(source_jar_path, destination_jar_path)
-        except Exception as e:
-            shutil.rmtree(server_dir, ignore_errors=True); return False, f"Fehler beim Kopieren der JAR: {e}"
+        link_ok, link_result = self.jar_manager.link_jar(server_name, os.path.basename(selected_jar_filename), destination_jar_path)
+        if not link_ok:
+            shutil.rmtree(server_dir, ignore_errors=True); return False, link_result
 
         if server_data.get('eula_accepted_in_panel', False):
             try:
                 with open(os.path.join(server_dir, 'eula.txt'), 'w') as f:
                     f.write("eula=true\n#Minecraft EULA accepted via WebPanel")
             except IOError as e:
-                shutil.rmtree(server_dir, ignore_errors=True); return False, f"Konnte eula.txt nicht schreiben: {e}"
+                shutil.rmtree(server_dir, ignore_errors=True); self.jar_manager.release_jar(server_name)
+                return False, f"Konnte eula.txt nicht schreiben: {e}"
         else: # EULA nicht akzeptiert, trotzdem Server erstellen, aber mit Hinweis
             print(f"INFO: EULA für Server {server_name} nicht im Panel akzeptiert. Muss manuell in eula.txt erfolgen.")
 
@@ -412,6 +1128,7 @@ class ServerManager:
         prop_success, prop_message = self._generate_server_properties(server_dir, server_data) # Aufruf hier
         if not prop_success:
             shutil.rmtree(server_dir, ignore_errors=True)
+            self.jar_manager.release_jar(server_name)
             return False, prop_message
 
         new_server_entry = {
@@ -428,10 +1145,17 @@ class ServerManager:
             'difficulty': server_data.get('difficulty', 'easy'),
             'max_players': int(server_data.get('max_players', 20)),
             'online_mode': server_data.get('online_mode', True),
-            'custom_jvm_args': server_data.get('custom_jvm_args', '')
+            'custom_jvm_args': server_data.get('custom_jvm_args', ''),
+            'jvm_profile': server_data.get('jvm_profile') if server_data.get('jvm_profile') in jvm_profiles.PROFILES else jvm_profiles.DEFAULT_PROFILE,
+            'cpu_set': '', 'cpu_quota': None, 'memory_max': '', 'io_weight': None,
+            'start_priority': int(server_data.get('start_priority', 0) or 0),
+            'idle_timeout': 0, 'hibernating': False,
+            'rcon_port': server_data.get('rcon_port'),
+            'rcon_password': server_data.get('rcon_password', '')
         }
         self.servers[server_name] = new_server_entry
-        self._save_servers_config()
+        self._mark_server_changed(server_name)
+        self.state_store.flush() # Neuer Server wird sofort committet
         eula_msg = " (EULA akzeptiert)" if new_server_entry['eula_accepted_in_panel'] else " (EULA muss manuell bestätigt werden)"
         return True, f"Server '{server_name}' erfolgreich erstellt. {prop_message}{eula_msg}"
 
@@ -442,11 +1166,424 @@ class ServerManager:
             return False, f"Server '{server_name}' läuft noch. Bitte zuerst stoppen."
         try: server_dir_path = self.get_server_path(server_name) 
         except ValueError: return False, f"Ungültiger Servername '{server_name}'."
-        if os.path.exists(server_dir_path):
-            try: shutil.rmtree(server_dir_path) 
-            except Exception as e: return False, f"Fehler beim Löschen Verzeichnis '{server_dir_path}': {e}"
-        del self.servers[server_name]; self._save_servers_config()
+        self._leave_sleep(server_name)
+        console_log = self.console_logs.pop(server_name, None)
+        if console_log: console_log.close() # Offene Logdatei vor dem Löschen schließen
+        # Nur umbenennen; die Dateien entfernt der TrashReaper im Hintergrund
+        moved, trash_result = self.trash.move_to_trash(server_dir_path, server_name)
+        if not moved:
+            return False, trash_result
+        del self.servers[server_name]
+        self.history.forget(server_name)
+        self.status_poller.forget(server_name)
+        self.ports.release(server_name)
+        self.jar_manager.release_jar(server_name)
+        self.state_store.mark_deleted(server_name); self.state_store.flush()
         if server_name in self.processes: del self.processes[server_name]
         if server_name in self.threads: del self.threads[server_name]
         self.server_outputs.pop(server_name, None) 
-        return True, f"Server '{server_name}' und Dateien gelöscht."
\ No newline at end of file
+        return True, f"Server '{server_name}' gelöscht. Die Dateien werden im Hintergrund entfernt."
+
+    # --- Backups ---
+
+    def _run_command_and_wait(self, server_name, command, pattern=None, timeout=None):
+        """
+        Sendet einen Konsolenbefehl und wartet optional, bis eine Ausgabezeile auf
+        pattern passt (z.B. "Saved the game" nach save-all flush).
+        :return: (success, passende Zeile bzw. Meldung)
+        """
+        if pattern is None:
+            ok, result = self.send_command(server_name, command)
+            return ok, result['message'] if ok else result
+        buffer = self._get_console_buffer(server_name)
+        # Vor dem Senden abonnieren, damit die Antwort nicht verpasst wird
+        subscription, chunk = buffer.subscribe(buffer.next_seq, self.console_stream_queue_size)
+        try:
+            ok, result = self.send_command(server_name, command, timeout=timeout)
+            if not ok:
+                return False, result
+            if result['response'] and pattern.search(result['response']): # Per RCON kommt die Bestätigung direkt zurück
+                return True, result['response']
+            cursor = chunk['next']
+            deadline = time.monotonic() + timeout
+            while True:
+                if subscription.overflowed:
+                    chunk = subscription.resync(cursor)
+                    cursor = chunk['next']
+                    lines = chunk['lines']
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False, f"Keine Bestätigung für '{command}' innerhalb von {timeout} s."
+                    try:
+                        seq, line = subscription.queue.get(timeout=min(remaining, 1.0))
+                    except queue.Empty:
+                        if not self._is_running(server_name):
+                            return False, "Server wurde beendet."
+                        continue
+                    cursor = seq + 1
+                    lines = [line]
+                for line in lines:
+                    if pattern.search(line):
+                        return True, line
+        finally:
+            subscription.close()
+
+    def _is_running(self, server_name):
+        process = self.processes.get(server_name)
+        return process is not None and process.poll() is None
+
+    def _create_backup(self, job, server_name, label):
+        try: server_dir = self.get_server_path(server_name)
+        except ValueError as e: return False, str(e)
+        run_command = None
+        if self._is_running(server_name):
+            run_command = lambda command, pattern, timeout: self._run_command_and_wait(server_name, command, pattern, timeout)
+        return self.backups.create_backup(job, server_name, server_dir, label=label, run_command=run_command)
+
+    def _restore_backup(self, job, server_name, snapshot_id):
+        if self._is_running(server_name):
+            return False, f"Server '{server_name}' läuft noch. Bitte vor dem Wiederherstellen stoppen."
+        try: server_dir = self.get_server_path(server_name)
+        except ValueError as e: return False, str(e)
+        console_log = self.console_logs.pop(server_name, None)
+        if console_log: console_log.close() # .panel wird in das wiederhergestellte Verzeichnis verschoben
+        return self.backups.restore_backup(job, server_name, snapshot_id, server_dir, self.trash)
+
+    def submit_backup(self, server_name, label=''):
+        """ Reiht ein Backup ein (läuft seriell mit Start/Stop desselben Servers). """
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        job = self.jobs.submit('backup', server_name, self._create_backup, server_name, label)
+        return True, job.to_dict()
+
+    def submit_restore(self, server_name, snapshot_id):
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        job = self.jobs.submit('restore', server_name, self._restore_backup, server_name, snapshot_id)
+        return True, job.to_dict()
+
+    def submit_prune_backups(self, server_name, keep_last, keep_daily):
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        try:
+            keep_last, keep_daily = int(keep_last), int(keep_daily)
+        except (TypeError, ValueError):
+            return False, "keep_last und keep_daily müssen Zahlen sein."
+        if keep_last < 1:
+            return False, "Mindestens ein Backup muss behalten werden."
+        job = self.jobs.submit('prune_backups', server_name, self.backups.prune_backups, server_name, keep_last, keep_daily)
+        return True, job.to_dict()
+
+    def list_backups(self, server_name):
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return [] # Kein Pfad aus einem beliebigen Namen (z.B. '..') bis zum BackupManager
+        return self.backups.list_backups(server_name)
+
+    # --- Weltwartung (Region-Dateien) ---
+
+    def _world_dirs(self, server_name):
+        """ Weltordner der Instanz: <level_name> sowie die Bukkit-Ordner _nether und _the_end. """
+        server_dir = self.get_server_path(server_name)
+        level_name = os.path.basename(self.servers[server_name].get('level_name') or 'world')
+        candidates = [level_name, f'{level_name}_nether', f'{level_name}_the_end']
+        return server_dir, [os.path.join(server_dir, d) for d in candidates if os.path.isdir(os.path.join(server_dir, d))]
+
+    def _analyze_world(self, job, server_name, with_inhabited):
+        try: server_dir, world_dirs = self._world_dirs(server_name)
+        except ValueError as e: return False, str(e)
+        if not world_dirs:
+            return False, f"Keine Welt für '{server_name}' gefunden."
+        report = region_file.analyze_world(world_dirs, server_dir, with_inhabited=with_inhabited, progress=job.set_message)
+        totals = report['totals']
+        return True, (f"{totals['files']} Region-Dateien, {totals['chunks']} Chunks, "
+                      f"{totals['dead_bytes'] / 1048576:.1f} MB ungenutzt ({totals['fragmentation']:.0%})."), report
+
+    def _compact_world(self, job, server_name, max_inhabited_seconds, older_than_days):
+        # Nur bei gestopptem Server: Minecraft hält die Region-Dateien offen und schreibt hinein
+        if self._is_running(server_name):
+            return False, f"Server '{server_name}' läuft noch. Bitte vor dem Kompaktieren stoppen."
+        try: server_dir, world_dirs = self._world_dirs(server_name)
+        except ValueError as e: return False, str(e)
+        if not world_dirs:
+            return False, f"Keine Welt für '{server_name}' gefunden."
+        result = region_file.compact_world(world_dirs, max_inhabited_seconds, older_than_days, progress=job.set_message)
+        saved = result['bytes_before'] - result['bytes_after']
+        message = (f"{result['files']} Region-Dateien kompaktiert, {saved / 1048576:.1f} MB freigegeben, "
+                   f"{result['chunks_removed']} Chunks entfernt.")
+        if result['skipped']:
+            message += f" {len(result['skipped'])} beschädigte Dateien übersprungen."
+        return True, message, result
+
+    def submit_analyze_world(self, server_name, with_inhabited=False):
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        job = self.jobs.submit('analyze_world', server_name, self._analyze_world, server_name, bool(with_inhabited))
+        return True, job.to_dict()
+
+    def submit_compact_world(self, server_name, max_inhabited_seconds=None, older_than_days=None):
+        """
+        Reiht das Kompaktieren ein. Mit max_inhabited_seconds werden zusätzlich Chunks
+        gelöscht, in denen sich Spieler kürzer aufgehalten haben (optional nur, wenn
+        sie seit older_than_days Tagen unverändert sind).
+        """
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        try:
+            max_inhabited_seconds = float(max_inhabited_seconds) if max_inhabited_seconds not in (None, '') else None
+            older_than_days = float(older_than_days) if older_than_days not in (None, '') else None
+        except (TypeError, ValueError):
+            return False, "Richtlinie muss aus Zahlen bestehen."
+        if self._is_running(server_name):
+            return False, f"Server '{server_name}' läuft noch. Bitte vor dem Kompaktieren stoppen."
+        job = self.jobs.submit('compact_world', server_name, self._compact_world, server_name,
+                               max_inhabited_seconds, older_than_days)
+        return True, job.to_dict()
+
+    def get_trash_status(self):
+        """ Fortschritt der Hintergrund-Löschung gelöschter Instanzen. """
+        return self.trash.status()
+
+    def get_capacity_status(self):
+        """ Vergebbarer und laufenden Servern zugesagter Speicher (siehe CapacityPlanner.snapshot). """
+        return self.capacity.snapshot()
+
+    def build_start_command(self, server_name):
+        """
+        Startbefehl mit aufgelöstem JVM-Profil. Eigene JVM-Argumente stehen hinter
+        den Profil-Flags und überschreiben sie damit.
+        :return: dict mit 'command' (Liste), 'profile' (aufgelöst) und 'notes'
+        """
+        server_info = self.servers[server_name]
+        profile = server_info.get('jvm_profile', jvm_profiles.DEFAULT_PROFILE)
+        java_version = jvm_profiles.java_major_version('java') if profile != 'none' else None
+        tuning = jvm_profiles.resolve_jvm_args(profile, server_info.get('ram_min', '1G'),
+                                               server_info.get('ram_max', '2G'), java_version)
+        command = ['java']
+        # Velocity Secret, Profil und Custom Args kommen vor RAM und JAR
+        velocity_secret = server_info.get('velocity_secret', '')
+        if velocity_secret:
+            command.append(f'-Dvelocity-forwarding-secret={velocity_secret}')
+        command.extend(tuning['args'])
+        command.extend(server_info.get('custom_jvm_args', '').split())
+        command.extend([f"-Xms{tuning['ram_min']}", f"-Xmx{tuning['ram_max']}", '-jar', 'server.jar', 'nogui'])
+        return {'command': command, 'profile': tuning['profile'], 'notes': tuning['notes'],
+                'java_version': java_version}
+
+    def get_start_command(self, server_name):
+        """
+        Vorschau des Startbefehls für die Oberfläche, bei laufendem Server auch
+        die tatsächlich verwendete Befehlszeile.
+        :return: (True, dict) oder (False, Fehlermeldung)
+        """
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        resolved = self.build_start_command(server_name)
+        process = self.processes.get(server_name)
+        running_command = self.launch_commands.get(server_name) if process and process.poll() is None else None
+        velocity_secret = self.servers[server_name].get('velocity_secret', '')
+        def display(command): # Secret nicht im Browser anzeigen
+            line = subprocess.list2cmdline(command) if os.name == 'nt' else shlex.join(command)
+            return line.replace(velocity_secret, '***') if velocity_secret else line
+        return True, {
+            'selected_profile': self.servers[server_name].get('jvm_profile', jvm_profiles.DEFAULT_PROFILE),
+            'profile': resolved['profile'],
+            'profiles': dict(jvm_profiles.PROFILES),
+            'java_version': resolved['java_version'],
+            'notes': resolved['notes'],
+            'command_line': display(resolved['command']),
+            'running_command_line': display(running_command) if running_command else None,
+        }
+
+    # --- Ruhezustand ---
+
+    def _idle_timeouts(self):
+        """ {server_name: Ruhezeit in Sekunden} aller bereiten Server mit Ruhezeit (für den Hibernator). """
+        timeouts = {}
+        for name, process in list(self.processes.items()):
+            minutes = (self.servers.get(name) or {}).get('idle_timeout') or 0
+            if minutes > 0 and process.poll() is None and self.get_server_health(name, True) == 'ready':
+                timeouts[name] = minutes * 60
+        return timeouts
+
+    def _player_count(self, server_name):
+        """ Spieler online laut Server List Ping, sonst laut Leistungs-Sampler (None = unbekannt). """
+        slp = self.status_poller.get(server_name)
+        if slp and slp['online'] and slp.get('players_online') is not None:
+            return slp['players_online']
+        return self.perf_sampler.get_current(server_name).get('players')
+
+    def _on_server_idle(self, server_name):
+        print(f"INFO: Server '{server_name}' ist seit {self.servers[server_name]['idle_timeout']} Minuten leer, wird schlafen gelegt.")
+        self.jobs.submit('hibernate', server_name, self._hibernate, server_name)
+
+    def _hibernate(self, job, server_name):
+        if not self._is_running(server_name):
+            return False, f"Server '{server_name}' läuft nicht."
+        if self._player_count(server_name): # Seit der letzten Prüfung ist jemand gekommen
+            self.hibernator.reset(server_name)
+            return False, f"Ruhezustand von '{server_name}' abgebrochen: Spieler online."
+        slp = self.status_poller.get(server_name) or {}
+        info = {'version': slp.get('version'), 'protocol': slp.get('protocol'),
+                'max_players': self.servers[server_name].get('max_players')}
+        job.set_message(f"Stoppe '{server_name}' für den Ruhezustand...")
+        stopped, message = self.stop_server(server_name)
+        if not stopped:
+            return False, message
+        return self._enter_sleep(server_name, info)
+
+    def _enter_sleep(self, server_name, info=None):
+        """ Legt den Platzhalter auf den Port des gestoppten Servers. """
+        details = self.servers[server_name]
+        if info is None:
+            info = {'max_players': details.get('max_players')}
+        slept, reason = self.hibernator.sleep(server_name, details['port'], info)
+        details['hibernating'] = slept
+        details['status'] = 'sleeping' if slept else 'stopped'
+        self._mark_server_changed(server_name)
+        if not slept:
+            print(f"WARNUNG: Ruhezustand für '{server_name}' nicht möglich: {reason}")
+            return False, f"Server '{server_name}' ist gestoppt, schläft aber nicht: {reason}"
+        return True, f"Server '{server_name}' schläft; ein Login auf Port {details['port']} weckt ihn."
+
+    def _leave_sleep(self, server_name):
+        """ Beendet den Platzhalter eines schlafenden Servers. :return: True, wenn er geschlafen hat """
+        details = self.servers.get(server_name)
+        woke = self.hibernator.wake(server_name)
+        if isinstance(details, dict) and details.get('hibernating'):
+            details['hibernating'] = False
+            if details.get('status') == 'sleeping':
+                details['status'] = 'stopped'
+            self._mark_server_changed(server_name)
+            woke = True
+        return woke
+
+    def _on_wake_request(self, server_name):
+        """ Login auf dem Platzhalter: Server starten (wartet wie ein eingereihter Start auf Speicher). """
+        if server_name in self.servers:
+            self.jobs.submit_blocking('wake', server_name, self._wake, server_name)
+
+    def _wake(self, job, server_name):
+        if self._is_running(server_name):
+            return True, f"Server '{server_name}' läuft bereits."
+        started, message = self.start_server(server_name, wait_for_capacity=self.admission_queue_timeout,
+                                             on_wait=job.set_message)
+        if not started and server_name in self.servers:
+            slept, _ = self._enter_sleep(server_name) # Nächster Login versucht es erneut
+            if slept:
+                message += " Server schläft weiter."
+        return started, message
+
+    def change_idle_timeout(self, server_name, minutes):
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        try:
+            minutes = int(str(minutes or '0').strip())
+            if minutes < 0: raise ValueError()
+        except ValueError:
+            return False, "Ruhezeit muss eine ganze Zahl an Minuten sein (0 = nie)."
+        self.servers[server_name]['idle_timeout'] = minutes
+        self._mark_server_changed(server_name)
+        self.hibernator.reset(server_name)
+        if not minutes:
+            return True, f"Server '{server_name}' geht nicht mehr in den Ruhezustand."
+        return True, f"Server '{server_name}' schläft nach {minutes} Minuten ohne Spieler."
+
+    def change_jvm_profile(self, server_name, profile):
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        if profile not in jvm_profiles.PROFILES:
+            return False, f"Unbekanntes JVM-Profil '{profile}'."
+        self.servers[server_name]['jvm_profile'] = profile
+        self._mark_server_changed(server_name)
+        running = server_name in self.processes and self.processes[server_name].poll() is None
+        hint = " Wird beim nächsten Neustart aktiv." if running else ""
+        return True, f"Server '{server_name}' nutzt jetzt das JVM-Profil '{jvm_profiles.PROFILES[profile]}'.{hint}"
+
+    def _prepare_resource_limits(self, server_name):
+        """
+        Richtet vor dem Start die cgroup des Servers ein.
+        :return: (Pfad der cgroup.procs oder None, Menge der CPUs oder None)
+        """
+        ok, limits = normalize_limits(self.servers[server_name])
+        if not ok: # Von Hand verbogene Konfiguration: lieber ohne Limits starten als gar nicht
+            print(f"WARNUNG: Ressourcen-Limits von '{server_name}' ignoriert: {limits}")
+            return None, None
+        cpus = parse_cpu_set(limits['cpu_set'])
+        needs_cgroup = limits['cpu_quota'] or limits['memory_max'] or limits['io_weight']
+        if not needs_cgroup or self.cgroups is None:
+            if needs_cgroup:
+                print(f"WARNUNG: cgroups sind abgeschaltet, CPU-Quota/Speicher/IO-Gewicht von '{server_name}' ohne Wirkung.")
+            return None, cpus
+        ok, result = self.cgroups.prepare(server_name, limits)
+        if not ok:
+            print(f"WARNUNG: {result}")
+            return None, cpus
+        return result, cpus
+
+    def _apply_resource_limits(self, server_name, process, cgroup_procs, cpus, placed):
+        """
+        Setzt cgroup und Affinität direkt nach dem Start vom Panel aus (placed=False,
+        ohne Aufpasser) und prüft danach, ob beides greift. Unter Windows per psutil.
+        """
+        if not placed and os.name != 'nt':
+            for error in place_process(process.pid, cgroup_procs, cpus):
+                print(f"WARNUNG: Limits von '{server_name}': {error}")
+        if cgroup_procs and not self.cgroups.contains(server_name, process.pid):
+            print(f"WARNUNG: '{server_name}' konnte nicht in seine cgroup verschoben werden, Limits ohne Wirkung.")
+        if not cpus:
+            return
+        if hasattr(os, 'sched_getaffinity'):
+            try:
+                if os.sched_getaffinity(process.pid) != set(cpus):
+                    print(f"WARNUNG: CPU-Set von '{server_name}' greift nicht, der Server läuft auf allen Kernen.")
+            except OSError:
+                pass # Schon wieder beendet
+            return
+        if not _psutil_available:
+            print(f"WARNUNG: CPU-Set von '{server_name}' braucht psutil auf diesem System.")
+            return
+        try:
+            psutil.Process(process.pid).cpu_affinity(sorted(cpus))
+        except (AttributeError, psutil.Error) as e:
+            print(f"WARNUNG: CPU-Affinität von '{server_name}' konnte nicht gesetzt werden: {e}")
+
+    def change_resource_limits(self, server_name, data):
+        """
+        Setzt CPU-Set, CPU-Quota (% eines Kerns), Speicherobergrenze und IO-Gewicht.
+        Leere Angaben heben das jeweilige Limit auf. Wirksam ab dem nächsten Start.
+        """
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        ok, limits = normalize_limits(data)
+        if not ok:
+            return False, limits
+        heap_bytes = jvm_profiles.parse_memory_size(self.servers[server_name].get('ram_max'))
+        memory_max = jvm_profiles.parse_memory_size(limits['memory_max'])
+        if memory_max and heap_bytes and memory_max <= heap_bytes:
+            return False, (f"Speicherobergrenze {limits['memory_max']} ist nicht größer als der Heap "
+                           f"({self.servers[server_name].get('ram_max')}); die JVM braucht zusätzlich Metaspace, Threads und Puffer.")
+        self.servers[server_name].update(limits)
+        self._mark_server_changed(server_name)
+        running = server_name in self.processes and self.processes[server_name].poll() is None
+        hint = " Wird beim nächsten Neustart aktiv." if running else ""
+        return True, f"Ressourcen-Limits von '{server_name}' gespeichert.{hint}"
+
+    def change_server_jar(self, server_name, jar_name):
+        """
+        Stellt einen Server auf eine andere JAR um (z.B. Paper-Update). Der Link wird
+        atomar ersetzt; ein laufender Server nutzt die neue JAR nach dem nächsten Neustart.
+        """
+        if server_name not in self.servers or not isinstance(self.servers.get(server_name), dict):
+            return False, f"Server '{server_name}' nicht gefunden."
+        try: server_dir = self.get_server_path(server_name)
+        except ValueError as e: return False, str(e)
+        jar_name = os.path.basename(jar_name or '')
+        ok, result = self.jar_manager.link_jar(server_name, jar_name, os.path.join(server_dir, 'server.jar'))
+        if not ok:
+            return False, result
+        self.servers[server_name]['jar'] = jar_name
+        self._mark_server_changed(server_name)
+        running = server_name in self.processes and self.processes[server_name].poll() is None
+        hint = " Wird beim nächsten Neustart aktiv." if running else ""
+        return True, f"Server '{server_name}' nutzt jetzt '{jar_name}' ({result}).{hint}"
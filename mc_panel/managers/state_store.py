@@ -0,0 +1,184 @@
+# mc_panel/managers/state_store.py
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Felder, die nur zur Laufzeit gelten und nie gespeichert werden
+RUNTIME_FIELDS = ('status',)
+
+
+class StateStore:
+    """
+    Transaktionaler Speicher für die Serverkonfiguration (SQLite im WAL-Modus).
+
+    Jeder Server ist eine eigene Zeile. Änderungen werden per mark_dirty()
+    vorgemerkt und nach flush_delay Sekunden gesammelt in einer einzigen
+    Transaktion geschrieben; viele kleine Änderungen kosten so nur einen Commit.
+    Ein Absturz mitten im Schreiben lässt die Datenbank im letzten
+    konsistenten Zustand.
+    """
+
+    def __init__(self, db_path, snapshot_fn, flush_delay=0.5):
+        """
+        :param db_path: Pfad zur SQLite-Datei.
+        :param snapshot_fn: Callable(name) -> aktuelles Konfig-Dict des Servers oder None.
+        :param flush_delay: Sekunden, die Änderungen gesammelt werden, bevor committet wird.
+        """
+        self.db_path = db_path
+        self.snapshot_fn = snapshot_fn
+        self.flush_delay = max(0.0, float(flush_delay))
+        self.commit_count = 0 # Für Metriken: Anzahl Schreibtransaktionen
+        self.rows_written = 0
+        self._lock = threading.RLock()
+        self._dirty = set()
+        self._deleted = set()
+        self._timer = None
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(db_dir, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS servers ("
+            " name TEXT PRIMARY KEY,"
+            " config TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        atexit.register(self.close)
+
+    # --- Lesen / Migration ---
+
+    def load_all(self):
+        """Lädt alle Server als {name: config_dict}. Kaputte Zeilen werden übersprungen."""
+        servers = {}
+        with self._lock:
+            rows = self._conn.execute("SELECT name, config FROM servers").fetchall()
+        for name, raw in rows:
+            try:
+                details = json.loads(raw)
+            except json.JSONDecodeError:
+                print(f"WARNUNG: Konfiguration von Server '{name}' in {self.db_path} ist nicht lesbar und wird ignoriert.")
+                continue
+            servers[name] = details
+        return servers
+
+    def import_legacy_json(self, json_path):
+        """
+        Übernimmt einmalig eine alte servers.json. Eine korrupte Datei wird
+        nicht stillschweigend verworfen, sondern beiseite gelegt und gemeldet.
+        """
+        with self._lock:
+            done = self._conn.execute("SELECT value FROM meta WHERE key = 'legacy_json_imported'").fetchone()
+        if done or not json_path or not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r') as f:
+                content = f.read()
+            legacy = json.loads(content) if content.strip() else {}
+            if not isinstance(legacy, dict):
+                raise ValueError("Oberste Ebene ist kein Objekt")
+        except (ValueError, OSError) as e:
+            backup = f"{json_path}.corrupt-{int(time.time())}"
+            print(f"FEHLER: {json_path} ist korrupt ({e}) und wurde nach {backup} verschoben. Bitte manuell prüfen!")
+            try:
+                os.replace(json_path, backup)
+            except OSError:
+                pass
+            return 0
+
+        now = time.time()
+        imported = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for name, details in legacy.items():
+                    if isinstance(details, dict):
+                        imported += 1
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO servers (name, config, updated_at) VALUES (?, ?, ?)",
+                            (name, self._serialize(details), now))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_json_imported', ?)", (str(now),))
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+        print(f"INFO: {imported} Server aus {json_path} in {self.db_path} übernommen.")
+        return imported
+
+    # --- Schreiben ---
+
+    @staticmethod
+    def _serialize(details):
+        persisted = {k: v for k, v in dict(details).items() if k not in RUNTIME_FIELDS} # dict() = atomare Kopie
+        return json.dumps(persisted, sort_keys=True)
+
+    def mark_dirty(self, name):
+        """Merkt einen geänderten Server für den nächsten gesammelten Commit vor."""
+        with self._lock:
+            self._deleted.discard(name)
+            self._dirty.add(name)
+            self._schedule_flush()
+
+    def mark_deleted(self, name):
+        with self._lock:
+            self._dirty.discard(name)
+            self._deleted.add(name)
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Schreibt alle vorgemerkten Änderungen atomar in einer Transaktion."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._conn is None or (not self._dirty and not self._deleted):
+                return
+            dirty, deleted = self._dirty, self._deleted
+            self._dirty, self._deleted = set(), set()
+            now = time.time()
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                written = 0
+                for name in dirty:
+                    details = self.snapshot_fn(name)
+                    if not isinstance(details, dict):
+                        continue
+                    self._conn.execute(
+                        "INSERT INTO servers (name, config, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET config = excluded.config, updated_at = excluded.updated_at",
+                        (name, self._serialize(details), now))
+                    written += 1
+                for name in deleted:
+                    self._conn.execute("DELETE FROM servers WHERE name = ?", (name,))
+                    written += 1
+                self._conn.execute("COMMIT")
+                self.commit_count += 1
+                self.rows_written += written
+            except sqlite3.Error as e:
+                try:
+                    self._conn.execute("ROLLBACK")
+                except sqlite3.Error:
+                    pass
+                # Änderungen nicht verlieren, beim nächsten Flush erneut versuchen
+                self._dirty |= dirty - self._deleted
+                self._deleted |= deleted - self._dirty
+                print(f"FEHLER: Konnte Serverkonfiguration nicht speichern: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is None:
+                return
+            self.flush()
+            self._conn.close()
+            self._conn = None
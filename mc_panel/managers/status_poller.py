@@ -0,0 +1,90 @@
+# mc_panel/managers/status_poller.py
+import asyncio
+import threading
+import time
+
+from ..utils.slp import ping_server
+
+
+class StatusPoller:
+    """
+    Fragt alle konfigurierten Server-Ports per Server List Ping ab, und zwar
+    gleichzeitig in einer asyncio-Schleife in einem eigenen Thread: Eine Runde
+    dauert so lange wie die langsamste Abfrage, nicht wie alle zusammen, und ein
+    hängender Server hält die anderen nicht auf. Leser bekommen nur den Cache
+    der letzten Runde.
+    """
+
+    def __init__(self, targets_source, interval=5.0, timeout=3.0, host='127.0.0.1'):
+        """
+        :param targets_source: Callable -> {server_name: port}
+        """
+        self.targets_source = targets_source
+        self.interval = max(0.5, float(interval))
+        self.timeout = float(timeout)
+        self.host = host
+        self._cache = {} # server_name -> letzter Status
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._thread_main, name='slp-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def get(self, server_name):
+        with self._lock:
+            entry = self._cache.get(server_name)
+            return dict(entry) if entry else None
+
+    def get_all(self):
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._cache.items()}
+
+    def forget(self, server_name):
+        with self._lock:
+            self._cache.pop(server_name, None)
+
+    def _thread_main(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                await self.poll_once()
+            except Exception as e: # Der Poller darf niemals sterben
+                print(f"FEHLER: Status-Abfrage (SLP): {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def poll_once(self):
+        targets = {}
+        for name, port in dict(self.targets_source()).items():
+            try:
+                targets[name] = int(port)
+            except (TypeError, ValueError):
+                continue
+        names = list(targets)
+        results = await asyncio.gather(*(ping_server(self.host, targets[n], self.timeout) for n in names),
+                                       return_exceptions=True)
+        now = time.time()
+        with self._lock:
+            for name, result in zip(names, results):
+                previous = self._cache.get(name) or {}
+                if isinstance(result, BaseException):
+                    entry = dict(previous, online=False, checked_at=now,
+                                 error=str(result) or type(result).__name__,
+                                 failures=previous.get('failures', 0) + 1)
+                else:
+                    entry = dict(result, online=True, checked_at=now, error=None, failures=0, last_ok_at=now)
+                entry['port'] = targets[name]
+                self._cache[name] = entry
+            for name in list(self._cache):
+                if name not in targets:
+                    del self._cache[name]
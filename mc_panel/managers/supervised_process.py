@@ -0,0 +1,272 @@
+# mc_panel/managers/supervised_process.py
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from .supervisor import SOCKET_FILE, read_state
+
+try:
+    import psutil # Startzeit des Aufpassers gegen wiederverwendete PIDs
+except ImportError:
+    psutil = None
+
+SUPERVISOR_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'supervisor.py')
+READY_FILE = 'ready' # Vom Panel angelegt, sobald der Server "Done" gemeldet hat
+MAX_SOCKET_PATH = 100 # sun_path ist unter Linux 108 Bytes lang
+START_TIME_TOLERANCE = 5.0 # Sekunden zwischen Prozessstart laut Kernel und der Startzeit in supervisor.json
+
+
+def supported():
+    return os.name != 'nt' and hasattr(socket, 'AF_UNIX')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError: # Existiert, gehört aber jemand anderem
+        return True
+    return True
+
+
+def _is_supervisor(pid, started_at=None):
+    """
+    Schützt vor wiederverwendeten PIDs (z.B. nach einem Neustart des Hosts): läuft
+    unter der PID wirklich noch der Aufpasser, der zur Startzeit started_at lief?
+    """
+    if not pid or not _pid_alive(pid):
+        return False
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            if SUPERVISOR_SCRIPT.encode() not in f.read():
+                return False
+    except FileNotFoundError:
+        return False
+    except OSError: # Kein /proc (z.B. macOS): nur die Startzeit prüfen
+        pass
+    if started_at is None or psutil is None:
+        return True
+    try:
+        created = psutil.Process(pid).create_time()
+    except psutil.NoSuchProcess:
+        return False
+    except psutil.Error:
+        return True
+    return abs(created - started_at) <= START_TIME_TOLERANCE
+
+
+def _supervisor_started_at(state):
+    # Ältere Statusdateien kennen nur den Start des Servers, der kurz nach dem Aufpasser liegt
+    return state.get('supervisor_started_at', state.get('started_at'))
+
+
+class _SocketReader:
+    """
+    stdout-Ersatz: fileno() für den Multiplexer und close(). Den Socket schließt
+    nur close(), das der Multiplexer nach EOF und Abmelden aufruft; würde er
+    vorher geschlossen, verlöre epoll den Eintrag stillschweigend.
+    """
+
+    def __init__(self, sock):
+        self._sock = sock
+        self.closed = False
+
+    def fileno(self):
+        return self._sock.fileno()
+
+    def readline(self): # Nur für den Lese-Thread ohne Multiplexer
+        data = bytearray()
+        while not data.endswith(b'\n'):
+            try:
+                chunk = self._sock.recv(1)
+            except BlockingIOError:
+                _wait(self._sock, selectors.EVENT_READ, None)
+                continue
+            if not chunk:
+                break
+            data += chunk
+        return bytes(data)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._sock.close()
+
+
+class _SocketWriter:
+    """stdin-Ersatz: write()/flush() auf den Socket, auch wenn der Multiplexer ihn nicht-blockierend gemacht hat."""
+
+    def __init__(self, sock, timeout=5.0):
+        self._sock = sock
+        self.timeout = timeout
+        self.closed = False
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError("stdin ist geschlossen")
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[self._sock.send(view):]
+            except BlockingIOError:
+                if not _wait(self._sock, selectors.EVENT_WRITE, self.timeout):
+                    raise TimeoutError("Aufpasser nimmt keine Eingaben an")
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def _wait(sock, event, timeout):
+    with selectors.DefaultSelector() as selector:
+        selector.register(sock, event)
+        return bool(selector.select(timeout))
+
+
+class SupervisedProcess:
+    """
+    Popen-ähnlicher Griff auf einen Server, der unter supervisor.py läuft.
+
+    Bietet, was der ServerManager von Popen nutzt (pid, stdin, stdout, poll,
+    wait, terminate, kill). pid ist die PID des Servers selbst, damit
+    psutil-Messungen und cgroup-Prüfungen den Server und nicht den Aufpasser
+    treffen. Beendet gilt der Server, sobald der Aufpasser weg ist; der
+    Exit-Code steht dann in supervisor.json.
+    """
+
+    def __init__(self, state_dir, state, sock, popen=None):
+        self.state_dir = state_dir
+        self.pid = state['pid']
+        self.supervisor_pid = state['supervisor_pid']
+        self.command = state.get('command') or []
+        self.started_at = state.get('started_at')
+        self.supervisor_started_at = _supervisor_started_at(state)
+        self.returncode = None
+        self._popen = popen # Nur wenn dieses Panel den Aufpasser gestartet hat (zum Abholen)
+        self._sock = sock
+        self.stdout = _SocketReader(sock)
+        self.stdin = _SocketWriter(sock)
+
+    @classmethod
+    def launch(cls, command, cwd, state_dir, buffer_bytes=1024 * 1024, cgroup_procs=None, cpus=None, timeout=10.0):
+        """
+        Startet den Aufpasser in einer eigenen Sitzung und verbindet sich mit ihm.
+        :param cgroup_procs: cgroup.procs, in die der Aufpasser vor dem Serverstart wechselt
+        :param cpus: Menge der CPUs für die Affinität (erbt der Server)
+        :raises OSError: wenn der Aufpasser nicht rechtzeitig bereit ist
+        """
+        socket_path = os.path.join(state_dir, SOCKET_FILE)
+        if len(socket_path.encode()) > MAX_SOCKET_PATH:
+            raise OSError(f"Socket-Pfad zu lang für einen Unix-Socket: {socket_path}")
+        os.makedirs(state_dir, exist_ok=True)
+        for name in (READY_FILE,): # supervisor.json überschreibt der neue Aufpasser selbst
+            try:
+                os.unlink(os.path.join(state_dir, name))
+            except FileNotFoundError:
+                pass
+        options = []
+        if cgroup_procs:
+            options += ['--cgroup', cgroup_procs]
+        if cpus:
+            options += ['--cpus', ','.join(str(cpu) for cpu in sorted(cpus))]
+        popen = subprocess.Popen(
+            [sys.executable, SUPERVISOR_SCRIPT, state_dir, str(int(buffer_bytes))] + options + ['--'] + list(command),
+            cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True, # Kein SIGINT/SIGHUP, wenn das Panel beendet wird
+            close_fds=True)
+        deadline = time.monotonic() + timeout
+        while True:
+            state = read_state(state_dir)
+            if state and state.get('supervisor_pid') == popen.pid:
+                try:
+                    return cls(state_dir, state, cls._connect(socket_path), popen)
+                except OSError:
+                    pass
+            if popen.poll() is not None:
+                raise OSError(f"Aufpasser beendet mit Code {popen.returncode}, bevor der Server lief.")
+            if time.monotonic() > deadline:
+                popen.kill()
+                popen.wait()
+                raise OSError(f"Aufpasser nicht innerhalb von {timeout:.0f} s bereit.")
+            time.sleep(0.05)
+
+    @classmethod
+    def attach(cls, state_dir):
+        """
+        Verbindet sich mit einem noch laufenden Aufpasser (z.B. nach einem Panel-Neustart).
+        :return: SupervisedProcess oder None, wenn dort nichts mehr läuft
+        """
+        state = read_state(state_dir)
+        if not state or state.get('exit_code') is not None \
+                or not _is_supervisor(state.get('supervisor_pid'), _supervisor_started_at(state)):
+            return None
+        try:
+            sock = cls._connect(os.path.join(state_dir, SOCKET_FILE))
+        except OSError as e:
+            print(f"WARNUNG: Aufpasser {state['supervisor_pid']} läuft, Verbinden fehlgeschlagen: {e}")
+            return None
+        return cls(state_dir, state, sock)
+
+    @staticmethod
+    def _connect(socket_path):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    @property
+    def ready(self):
+        """True, wenn der Server in diesem Lauf schon "Done" gemeldet hat (auch vor einem Panel-Neustart)."""
+        return os.path.exists(os.path.join(self.state_dir, READY_FILE))
+
+    def mark_ready(self):
+        try:
+            with open(os.path.join(self.state_dir, READY_FILE), 'w') as f:
+                f.write(str(time.time()))
+        except OSError:
+            pass
+
+    def poll(self):
+        if self.returncode is not None:
+            return self.returncode
+        if self._popen is not None:
+            if self._popen.poll() is None:
+                return None
+        elif _is_supervisor(self.supervisor_pid, self.supervisor_started_at):
+            return None
+        state = read_state(self.state_dir) or {}
+        code = state.get('exit_code') if state.get('supervisor_pid') == self.supervisor_pid else None
+        self.returncode = code if code is not None else -1 # Aufpasser ohne Exit-Code beendet (z.B. SIGKILL)
+        return self.returncode # Socket bleibt offen, bis der Multiplexer EOF gelesen hat (stdout.close())
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired(self.command, timeout)
+            time.sleep(0.1)
+        return self.returncode
+
+    def send_signal(self, signum):
+        if self.poll() is None:
+            try:
+                os.kill(self.pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
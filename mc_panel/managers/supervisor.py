@@ -0,0 +1,239 @@
+# mc_panel/managers/supervisor.py
+"""
+Kleiner, vom Panel losgelöster Aufpasser für genau einen Serverprozess.
+
+Wird als eigenes Programm gestartet (nicht importiert, nur Standardbibliothek):
+
+    python supervisor.py <Statusverzeichnis> <Puffergröße in Bytes> [--cgroup <cgroup.procs>] [--cpus <0,1,...>] -- <Befehl ...>
+
+Der Aufpasser startet den Befehl als Kindprozess und hält dessen stdin und
+stdout. Das Panel verbindet sich über den Unix-Socket console.sock im
+Statusverzeichnis: Alles, was es schreibt, geht an stdin des Servers, und die
+Ausgabe des Servers kommt über denselben Socket zurück. Ist kein Panel
+verbunden, wird die Ausgabe (bis zur Puffergröße, älteste zuerst verworfen)
+gepuffert und beim nächsten Verbinden nachgeliefert. Eingaben, die der Server
+gerade nicht liest, werden ebenfalls (bis INPUT_LIMIT) gepuffert, damit die
+Schleife nie an seinem stdin hängen bleibt. supervisor.json enthält
+beide PIDs und nach dem Ende den Exit-Code. Da der Aufpasser in einer eigenen
+Sitzung läuft, überlebt der Server Neustarts und Abstürze des Panels.
+Mit --cgroup/--cpus zieht der Aufpasser vor dem Start selbst in die cgroup des
+Servers und setzt seine CPU-Affinität; der Server erbt beides.
+"""
+import json
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import deque
+
+STATE_FILE = 'supervisor.json'
+SOCKET_FILE = 'console.sock'
+READ_SIZE = 64 * 1024
+INPUT_LIMIT = 1024 * 1024 # Max. gepufferte Eingabe, falls der Server stdin gerade nicht liest
+
+
+def read_state(state_dir):
+    try:
+        with open(os.path.join(state_dir, STATE_FILE), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_state(state_dir, state):
+    path = os.path.join(state_dir, STATE_FILE)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path) # Leser sehen nie eine halb geschriebene Datei
+
+
+def send_all(conn, data):
+    """Blockierend senden, obwohl der Socket nicht-blockierend ist. :return: False, wenn das Panel weg ist"""
+    view = memoryview(data)
+    while view:
+        try:
+            sent = conn.send(view)
+        except BlockingIOError:
+            if not _wait_writable(conn): # Panel hängt: lieber trennen als den Server ausbremsen
+                return False
+            continue
+        except OSError:
+            return False
+        view = view[sent:]
+    return True
+
+
+def _wait_writable(conn, timeout=5.0):
+    with selectors.DefaultSelector() as selector:
+        selector.register(conn, selectors.EVENT_WRITE)
+        return bool(selector.select(timeout))
+
+
+def enter_limits(procs_path, cpus):
+    """In die cgroup wechseln und Affinität setzen, solange der Aufpasser noch keine Threads oder Kinder hat."""
+    if procs_path:
+        try:
+            with open(procs_path, 'w') as f:
+                f.write(str(os.getpid()))
+        except OSError as e:
+            sys.stderr.write(f"cgroup {procs_path}: {e}\n") # Das Panel prüft nach dem Start selbst nach
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, {int(cpu) for cpu in cpus.split(',')})
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"CPU-Affinität {cpus}: {e}\n")
+
+
+def main(argv):
+    supervisor_started_at = time.time()
+    split = argv.index('--') if '--' in argv else -1
+    if split < 2 or split == len(argv) - 1 or (split - 2) % 2:
+        sys.stderr.write("Aufruf: supervisor.py <Statusverzeichnis> <Puffergröße> [--cgroup <Pfad>] [--cpus <Liste>] -- <Befehl ...>\n")
+        return 2
+    state_dir, buffer_limit, command = argv[0], int(argv[1]), argv[split + 1:]
+    options = dict(zip(argv[2:split:2], argv[3:split:2]))
+    enter_limits(options.get('--cgroup'), options.get('--cpus'))
+    os.umask(0o077) # Socket und Statusdateien nur für den Panel-Benutzer
+    os.makedirs(state_dir, exist_ok=True)
+    socket_path = os.path.join(state_dir, SOCKET_FILE)
+    try:
+        os.unlink(socket_path) # Übrig von einem abgestürzten Vorgänger
+    except FileNotFoundError:
+        pass
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(2)
+    listener.setblocking(False)
+
+    child = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                             bufsize=0)
+    state = {'supervisor_pid': os.getpid(), 'supervisor_started_at': supervisor_started_at, 'pid': child.pid,
+             'command': command, 'started_at': time.time(), 'exit_code': None}
+    write_state(state_dir, state)
+
+    def forward_signal(signum, frame): # z.B. systemd oder kill auf den Aufpasser: an den Server weitergeben
+        if child.poll() is None:
+            child.send_signal(signum)
+    signal.signal(signal.SIGTERM, forward_signal)
+    signal.signal(signal.SIGINT, forward_signal)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    os.set_blocking(child.stdout.fileno(), False)
+    os.set_blocking(child.stdin.fileno(), False) # Ein hängender Server darf die Schleife nicht blockieren
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, 'accept')
+    selector.register(child.stdout, selectors.EVENT_READ, 'output')
+    client = None
+    pending = deque() # Ausgabe, solange kein Panel verbunden ist
+    pending_bytes = 0
+    dropped_bytes = 0
+    stdin_pending = bytearray() # Eingabe, die der Server noch nicht abgenommen hat
+    stdin_open = True
+    stdin_watched = False
+
+    def flush_input():
+        """Schreibt, was stdin gerade abnimmt; den Rest erst, wenn der Server wieder liest."""
+        nonlocal stdin_open, stdin_watched
+        try:
+            while stdin_pending:
+                written = os.write(child.stdin.fileno(), stdin_pending)
+                del stdin_pending[:written]
+        except BlockingIOError:
+            pass
+        except OSError:
+            stdin_pending.clear() # Server beendet sich gerade
+            stdin_open = False
+        if stdin_pending and not stdin_watched:
+            selector.register(child.stdin, selectors.EVENT_WRITE, 'stdin')
+            stdin_watched = True
+        elif not stdin_pending and stdin_watched:
+            selector.unregister(child.stdin)
+            stdin_watched = False
+
+    def drop_client():
+        nonlocal client
+        if client is not None:
+            selector.unregister(client)
+            client.close()
+            client = None
+
+    running = True
+    while running:
+        for key, _ in selector.select(timeout=1.0):
+            if key.data == 'accept':
+                try:
+                    conn, _ = listener.accept()
+                except BlockingIOError:
+                    continue
+                drop_client() # Nur ein Panel zur Zeit; das neue gewinnt
+                conn.setblocking(False)
+                client = conn
+                selector.register(client, selectors.EVENT_READ, 'input')
+                backlog = b''.join(pending)
+                if dropped_bytes:
+                    backlog = f"[Supervisor] {dropped_bytes} Bytes Ausgabe ohne verbundenes Panel verworfen.\n".encode() + backlog
+                pending.clear()
+                pending_bytes = dropped_bytes = 0
+                if backlog and not send_all(client, backlog):
+                    drop_client()
+            elif key.data == 'input':
+                if client is None: # In dieser Runde bereits getrennt
+                    continue
+                try:
+                    data = client.recv(READ_SIZE)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b''
+                if not data:
+                    drop_client()
+                    continue
+                if not stdin_open:
+                    continue
+                if len(stdin_pending) + len(data) > INPUT_LIMIT:
+                    notice = f"[Supervisor] Server liest keine Eingabe, {len(data)} Bytes verworfen.\n".encode()
+                    if not send_all(client, notice):
+                        drop_client()
+                    continue
+                stdin_pending += data
+                flush_input()
+            elif key.data == 'stdin':
+                flush_input()
+            elif key.data == 'output':
+                try:
+                    data = os.read(child.stdout.fileno(), READ_SIZE)
+                except BlockingIOError:
+                    continue
+                if not data:
+                    running = False
+                    break
+                if client is not None and send_all(client, data):
+                    continue
+                drop_client()
+                pending.append(data)
+                pending_bytes += len(data)
+                while pending_bytes > buffer_limit and len(pending) > 1:
+                    old = pending.popleft()
+                    pending_bytes -= len(old)
+                    dropped_bytes += len(old)
+
+    state['exit_code'] = child.wait()
+    state['exited_at'] = time.time()
+    if client is not None:
+        client.close()
+    listener.close()
+    if read_state(state_dir).get('supervisor_pid') == os.getpid(): # Sonst gehören Datei und Socket schon einem Nachfolger
+        write_state(state_dir, state)
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,164 @@
+# mc_panel/managers/trash_reaper.py
+import ctypes
+import os
+import platform
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+
+# ioprio_set(2) hat keine Python-Anbindung; Syscall-Nummern je Architektur
+_IOPRIO_SET_SYSCALLS = {'x86_64': 251, 'aarch64': 30, 'i386': 289, 'i686': 289, 'armv7l': 314, 'ppc64le': 273}
+_IOPRIO_WHO_PROCESS = 1 # Unter Linux ist das eine Thread-ID
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+
+
+def _lower_thread_priority(nice):
+    """Setzt CPU- (nice) und I/O-Priorität (idle) nur für den aufrufenden Thread, best effort."""
+    if not hasattr(os, 'setpriority') or not hasattr(threading, 'get_native_id'):
+        return
+    tid = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, nice)
+    except OSError:
+        pass
+    syscall_nr = _IOPRIO_SET_SYSCALLS.get(platform.machine())
+    if syscall_nr is None:
+        return
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.syscall(syscall_nr, _IOPRIO_WHO_PROCESS, tid, _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT)
+    except (OSError, AttributeError):
+        pass
+
+
+class TrashReaper:
+    """
+    Löscht Instanzverzeichnisse im Hintergrund.
+
+    delete_server() benennt das Verzeichnis nur atomar in den Papierkorb
+    (<instances_dir>/.trash) um, was unabhängig von der Weltgröße sofort geht.
+    Ein einzelner Thread mit niedriger CPU- und I/O-Priorität löscht danach
+    Datei für Datei, höchstens unlinks_per_second pro Sekunde, damit laufende
+    Server beim Speichern ihrer Welten nicht ausgebremst werden. Reste aus einem
+    abgebrochenen Lauf werden beim Start wieder aufgenommen.
+    """
+
+    def __init__(self, trash_dir, unlinks_per_second=2000, nice=19, history_limit=20):
+        self.trash_dir = trash_dir
+        self.unlinks_per_second = max(1, int(unlinks_per_second))
+        self.nice = nice
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = [] # Noch nicht begonnene Einträge
+        self._current = None
+        self._finished = deque(maxlen=history_limit)
+        self._thread = None
+        os.makedirs(self.trash_dir, exist_ok=True)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        try:
+            leftovers = sorted(os.listdir(self.trash_dir))
+        except OSError:
+            leftovers = []
+        for entry in leftovers:
+            self._enqueue(os.path.join(self.trash_dir, entry), entry.split('~')[0])
+        self._thread = threading.Thread(target=self._run, name='trash-reaper', daemon=True)
+        self._thread.start()
+
+    def move_to_trash(self, path, label):
+        """
+        Verschiebt path atomar in den Papierkorb und reiht ihn zum Löschen ein.
+        :return: (True, Papierkorb-Pfad) oder (False, Fehlermeldung)
+        """
+        if not os.path.exists(path):
+            return True, None
+        target = os.path.join(self.trash_dir, f"{label}~{int(time.time())}~{uuid.uuid4().hex[:8]}")
+        try:
+            os.rename(path, target) # Gleiches Dateisystem (Unterordner von instances_dir), daher atomar
+        except OSError as e:
+            return False, f"Fehler beim Verschieben von '{path}' in den Papierkorb: {e}"
+        self._enqueue(target, label)
+        return True, target
+
+    def _enqueue(self, path, label):
+        item = {'label': label, 'path': path, 'state': 'queued', 'files_removed': 0,
+                'bytes_freed': 0, 'queued_at': time.time(), 'started_at': None, 'finished_at': None, 'error': None}
+        with self._lock:
+            self._pending.append(item)
+        self._queue.put(item)
+
+    def status(self):
+        """Fortschritt für die Anzeige: aktueller Eintrag, Warteschlange und zuletzt erledigte."""
+        with self._lock:
+            return {
+                'current': dict(self._current) if self._current else None,
+                'pending': [dict(item) for item in self._pending],
+                'finished': [dict(item) for item in self._finished],
+            }
+
+    def _run(self):
+        _lower_thread_priority(self.nice)
+        while True:
+            item = self._queue.get()
+            with self._lock:
+                if item in self._pending:
+                    self._pending.remove(item)
+                self._current = item
+            item['state'] = 'running'
+            item['started_at'] = time.time()
+            try:
+                self._reap(item)
+                item['state'] = 'done'
+            except Exception as e: # Der Thread muss weiterlaufen; Rest bleibt für den nächsten Panel-Start liegen
+                item['state'] = 'failed'
+                item['error'] = str(e)
+                print(f"FEHLER: Konnte '{item['path']}' nicht vollständig löschen: {e}")
+            item['finished_at'] = time.time()
+            with self._lock:
+                self._current = None
+                self._finished.append(item)
+
+    def _throttle(self, item, window_start):
+        expected = item['files_removed'] / self.unlinks_per_second
+        elapsed = time.monotonic() - window_start
+        if expected > elapsed:
+            time.sleep(expected - elapsed)
+
+    def _reap(self, item):
+        """Löscht den Baum von unten nach oben, ohne Symlinks zu folgen."""
+        root = item['path']
+        if not os.path.lexists(root):
+            return
+        if not os.path.isdir(root) or os.path.islink(root):
+            os.unlink(root)
+            return
+        window_start = time.monotonic()
+        stack = [(root, None)]
+        while stack:
+            path, entries = stack[-1]
+            if entries is None:
+                with os.scandir(path) as it:
+                    entries = list(it)
+                stack[-1] = (path, entries)
+            if entries:
+                entry = entries.pop()
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, None))
+                    continue
+                try:
+                    size = entry.stat(follow_symlinks=False).st_size
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
+                item['bytes_freed'] += size
+                item['files_removed'] += 1
+                if item['files_removed'] % 100 == 0:
+                    self._throttle(item, window_start)
+                continue
+            os.rmdir(path)
+            stack.pop()
@@ -0,0 +1,147 @@
+# mc_panel/utils/metrics.py
+import bisect
+import threading
+import time
+
+# Obergrenzen der Latenz-Buckets in Sekunden (wie die Standard-Buckets der Prometheus-Clients)
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RequestMetrics:
+    """
+    Latenz-Histogramme pro Route, Methode und Statusklasse.
+
+    Als Label dient die Routen-Regel (z.B. /server/start/<server_name>), nicht
+    die konkrete URL, damit die Anzahl der Zeitreihen nicht mit den Servern wächst.
+    observe() zählt nur ein paar Integer hoch und ist für jeden Request billig.
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._series = {} # (route, method, status) -> [Bucket-Zähler..., +Inf-Zähler, Summe]
+
+    def observe(self, route, method, status, seconds):
+        key = (route, method, f"{status // 100}xx")
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def render(self):
+        lines = ['# HELP mcpanel_http_request_duration_seconds Bearbeitungszeit der Panel-Requests.',
+                 '# TYPE mcpanel_http_request_duration_seconds histogram']
+        for (route, method, status), series in sorted(self.snapshot().items()):
+            labels = {'route': route, 'method': method, 'status': status}
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(_sample('mcpanel_http_request_duration_seconds_bucket', dict(labels, le=_format_value(bound)), cumulative))
+            cumulative += series[len(self.buckets)]
+            lines.append(_sample('mcpanel_http_request_duration_seconds_bucket', dict(labels, le='+Inf'), cumulative))
+            lines.append(_sample('mcpanel_http_request_duration_seconds_sum', labels, series[-1]))
+            lines.append(_sample('mcpanel_http_request_duration_seconds_count', labels, cumulative))
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _sample(name, labels, value):
+    if labels:
+        label_str = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        return f"{name}{{{label_str}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+# (Metrikname, Typ, Hilfetext, Schlüssel im Server-Sample)
+SERVER_METRICS = (
+    ('mcpanel_server_up', 'gauge', 'Serverprozess läuft (1) oder nicht (0).', 'up'),
+    ('mcpanel_server_ready', 'gauge', 'Server beantwortet Server List Ping.', 'ready'),
+    ('mcpanel_server_slp_status_seconds', 'gauge', 'Dauer von Verbindungsaufbau und Handshake bis zur Statusantwort.', 'slp_status_seconds'),
+    ('mcpanel_server_slp_latency_seconds', 'gauge', 'Ping/Pong-Laufzeit der letzten Statusabfrage.', 'slp_latency_seconds'),
+    ('mcpanel_server_cpu_seconds_total', 'counter', 'Verbrauchte CPU-Zeit (user + system).', 'cpu_seconds'),
+    ('mcpanel_server_resident_memory_bytes', 'gauge', 'Resident Set Size des Serverprozesses.', 'rss_bytes'),
+    ('mcpanel_server_threads', 'gauge', 'Anzahl Threads des Serverprozesses.', 'num_threads'),
+    ('mcpanel_server_open_fds', 'gauge', 'Offene Dateideskriptoren des Serverprozesses.', 'num_fds'),
+    ('mcpanel_server_io_read_bytes_total', 'counter', 'Vom Serverprozess gelesene Bytes.', 'io_read_bytes'),
+    ('mcpanel_server_io_write_bytes_total', 'counter', 'Vom Serverprozess geschriebene Bytes.', 'io_write_bytes'),
+    ('mcpanel_server_cpu_affinity_cores', 'gauge', 'Kerne, auf denen der Serverprozess laufen darf.', 'cpu_affinity_count'),
+    ('mcpanel_server_cpu_quota_cores', 'gauge', 'CPU-Quota der cgroup in Kernen (cpu.max).', 'cpu_quota_cores'),
+    ('mcpanel_server_cpu_periods_total', 'counter', 'CFS-Perioden der cgroup.', 'cpu_periods'),
+    ('mcpanel_server_cpu_throttled_periods_total', 'counter', 'Perioden, in denen die cgroup gedrosselt wurde.', 'cpu_throttled_periods'),
+    ('mcpanel_server_cpu_throttled_seconds_total', 'counter', 'Gesamtdauer der CPU-Drosselung.', 'cpu_throttled_seconds'),
+    ('mcpanel_server_memory_limit_bytes', 'gauge', 'Speicherobergrenze der cgroup (memory.max).', 'memory_max_bytes'),
+    ('mcpanel_server_cgroup_memory_bytes', 'gauge', 'Speicherverbrauch der cgroup inkl. Page Cache (memory.current).', 'memory_current_bytes'),
+    ('mcpanel_server_memory_limit_hits_total', 'counter', 'Erreichen der Speicherobergrenze (memory.events max).', 'memory_max_events'),
+    ('mcpanel_server_oom_kills_total', 'counter', 'Vom OOM-Killer beendete Prozesse in der cgroup.', 'oom_kills'),
+    ('mcpanel_server_io_weight', 'gauge', 'IO-Gewicht der cgroup (io.weight).', 'io_weight'),
+    ('mcpanel_server_tps', 'gauge', 'Ticks pro Sekunde (per RCON oder aus "Can\'t keep up!"-Zeilen geschätzt).', 'tps'),
+    ('mcpanel_server_tick_milliseconds', 'gauge', 'Mittlere Tickdauer (MSPT).', 'mspt'),
+    ('mcpanel_server_players_online', 'gauge', 'Spieler online.', 'players'),
+    ('mcpanel_server_uptime_seconds', 'gauge', 'Laufzeit des Serverprozesses.', 'uptime_seconds'),
+    ('mcpanel_server_restarts_total', 'counter', 'Starts seit Panel-Start, ohne den ersten.', 'restarts'),
+    ('mcpanel_server_console_lines_total', 'counter', 'Konsolenzeilen seit Panel-Start.', 'console_lines'),
+    ('mcpanel_server_console_lines_per_second', 'gauge', 'Konsolenzeilen pro Sekunde im letzten Messintervall.', 'console_lines_per_second'),
+    ('mcpanel_server_sample_age_seconds', 'gauge', 'Alter der zugrunde liegenden Messung.', 'sample_age_seconds'),
+)
+
+# (Metrikname, Typ, Hilfetext, Schlüssel im Panel-Sample)
+PANEL_METRICS = (
+    ('mcpanel_output_backlog_bytes', 'gauge', 'Bytes unvollständiger Konsolenzeilen im Ausgabe-Multiplexer.', 'output_backlog_bytes'),
+    ('mcpanel_output_streams', 'gauge', 'Vom Ausgabe-Multiplexer überwachte Pipes.', 'output_streams'),
+    ('mcpanel_state_commits_total', 'counter', 'Schreibtransaktionen der Serverkonfiguration.', 'state_commits'),
+    ('mcpanel_state_rows_written_total', 'counter', 'Geschriebene Konfigurationszeilen.', 'state_rows_written'),
+    ('mcpanel_jobs_active', 'gauge', 'Laufende oder wartende Hintergrundaufträge.', 'jobs_active'),
+    ('mcpanel_servers_configured', 'gauge', 'Konfigurierte Server.', 'servers_configured'),
+    ('mcpanel_servers_sleeping', 'gauge', 'Server im Ruhezustand (gestoppt, Platzhalter lauscht auf ihrem Port).', 'servers_sleeping'),
+    ('mcpanel_capacity_bytes', 'gauge', 'An Server vergebbarer Speicher (Host minus Reserve).', 'capacity_bytes'),
+    ('mcpanel_capacity_committed_bytes', 'gauge', 'Laufenden Servern zugesagter Speicher (Heap + JVM-Overhead).', 'capacity_committed_bytes'),
+)
+
+
+def render_metrics(samples, request_metrics=None):
+    """
+    Erzeugt das Prometheus-Textformat aus bereits erfassten Werten
+    (ServerManager.get_metrics_samples()). Es wird hier nichts gemessen.
+    """
+    lines = []
+    servers = samples.get('servers', {})
+    for name, kind, help_text, key in SERVER_METRICS:
+        values = [(server, sample[key]) for server, sample in sorted(servers.items()) if sample.get(key) is not None]
+        if not values:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(_sample(name, {'server': server}, value) for server, value in values)
+    panel = samples.get('panel', {})
+    for name, kind, help_text, key in PANEL_METRICS:
+        if panel.get(key) is None:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(_sample(name, None, panel[key]))
+    if request_metrics is not None:
+        lines.extend(request_metrics.render())
+    lines.append('# HELP mcpanel_scrape_timestamp_seconds Zeitpunkt der Ausgabe.')
+    lines.append('# TYPE mcpanel_scrape_timestamp_seconds gauge')
+    lines.append(_sample('mcpanel_scrape_timestamp_seconds', None, time.time()))
+    return '\n'.join(lines) + '\n'
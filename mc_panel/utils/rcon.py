@@ -0,0 +1,244 @@
+# mc_panel/utils/rcon.py
+import itertools
+import select
+import socket
+import struct
+import threading
+import time
+
+# Pakettypen des Source-RCON-Protokolls, wie Minecraft es verwendet
+TYPE_RESPONSE = 0
+TYPE_COMMAND = 2
+TYPE_AUTH = 3
+
+MAX_COMMAND_BYTES = 1446 # Größere Pakete verwirft der Minecraft-Server
+MAX_PACKET_BYTES = 1024 * 1024 # Schutz vor kaputten Längenangaben
+
+
+class RconError(Exception):
+    """Verbindungs-, Protokoll- oder Anmeldefehler bei RCON."""
+
+
+class RconUnavailable(RconError):
+    """Keine Verbindung zustande gekommen; es wurde nichts gesendet."""
+
+
+class RconConnection:
+    """
+    Eine angemeldete RCON-Verbindung.
+
+    Minecraft beantwortet die Anfragen einer Verbindung strikt der Reihe nach
+    und teilt lange Antworten auf mehrere 4-KiB-Pakete auf. Deshalb folgt auf
+    jeden Befehl ein Paket mit unbekanntem Typ, das der Server mit
+    "Unknown request" beantwortet: Es markiert das Ende der Antwort. So lassen
+    sich mehrere Befehle in einem sendall() verschicken (Pipelining).
+    """
+
+    def __init__(self, host, port, password, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._sock = None
+        self._reader = None
+
+    def connect(self):
+        try:
+            self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._reader = self._sock.makefile('rb')
+            auth_id = self._next_id()
+            self._sock.sendall(self._packet(auth_id, TYPE_AUTH, self.password))
+            while True:
+                request_id, _, _ = self._read_packet()
+                if request_id == -1:
+                    raise RconError("RCON-Anmeldung abgelehnt (falsches Passwort).")
+                if request_id == auth_id:
+                    return self
+        except OSError as e:
+            self.close()
+            raise RconUnavailable(f"RCON-Verbindung zu {self.host}:{self.port} fehlgeschlagen: {e}") from e
+        except RconError as e:
+            self.close()
+            raise RconUnavailable(str(e)) from e
+
+    def close(self):
+        for closable in (self._reader, self._sock):
+            if closable is not None:
+                try:
+                    closable.close()
+                except OSError:
+                    pass
+        self._reader = self._sock = None
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    def is_stale(self):
+        """True, wenn die Gegenseite die Verbindung inzwischen geschlossen hat (z.B. Serverneustart)."""
+        if self._sock is None:
+            return True
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+            if not readable:
+                return False
+            return self._sock.recv(1, socket.MSG_PEEK) == b''
+        except OSError:
+            return True
+
+    def execute_many(self, commands, timeout=None):
+        """
+        Schickt alle Befehle auf einmal und liest die Antworten in derselben Reihenfolge.
+        :param timeout: Wartezeit auf die Antworten (z.B. länger für save-all flush)
+        :return: Liste der Antworttexte
+        """
+        if self._sock is None:
+            raise RconError("RCON-Verbindung ist geschlossen.")
+        request_ids = []
+        payload = []
+        for command in commands:
+            encoded = command.encode('utf-8')
+            if len(encoded) > MAX_COMMAND_BYTES:
+                raise RconUnavailable(f"Befehl ist zu lang für RCON ({len(encoded)} > {MAX_COMMAND_BYTES} Bytes).")
+            command_id, marker_id = self._next_id(), self._next_id()
+            request_ids.append((command_id, marker_id))
+            payload.append(self._packet(command_id, TYPE_COMMAND, encoded))
+            payload.append(self._packet(marker_id, TYPE_RESPONSE, b''))
+        try:
+            self._sock.settimeout(timeout or self.timeout)
+            self._sock.sendall(b''.join(payload))
+            responses = []
+            for command_id, marker_id in request_ids:
+                parts = []
+                while True:
+                    request_id, _, body = self._read_packet()
+                    if request_id == marker_id:
+                        break
+                    if request_id == command_id:
+                        parts.append(body)
+                responses.append(b''.join(parts).decode('utf-8', 'replace'))
+            return responses
+        except OSError as e:
+            self.close()
+            raise RconError(f"RCON-Verbindung unterbrochen: {e}") from e
+        except RconError:
+            self.close()
+            raise
+
+    def execute(self, command, timeout=None):
+        return self.execute_many([command], timeout)[0]
+
+    def _next_id(self):
+        request_id = next(self._ids)
+        if request_id >= 2 ** 31 - 1:
+            self._ids = itertools.count(1)
+            request_id = next(self._ids)
+        return request_id
+
+    @staticmethod
+    def _packet(request_id, packet_type, body):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        return struct.pack('<iii', len(body) + 10, request_id, packet_type) + body + b'\x00\x00'
+
+    def _read_exact(self, size):
+        data = self._reader.read(size)
+        if data is None or len(data) < size:
+            raise RconError("RCON-Verbindung vom Server geschlossen.")
+        return data
+
+    def _read_packet(self):
+        (length,) = struct.unpack('<i', self._read_exact(4))
+        if length < 10 or length > MAX_PACKET_BYTES:
+            raise RconError(f"Ungültige RCON-Paketlänge {length}.")
+        data = self._read_exact(length)
+        request_id, packet_type = struct.unpack_from('<ii', data)
+        return request_id, packet_type, data[8:-2]
+
+
+class RconPool:
+    """
+    Hält bis zu size angemeldete Verbindungen zu einem Server offen.
+
+    Verbindungen werden erst bei Bedarf aufgebaut und nach Gebrauch
+    zurückgelegt. Vom Server geschlossene Verbindungen werden vor der
+    Wiederverwendung erkannt und ersetzt. Ein Befehl wird nach einem Fehler
+    nie automatisch wiederholt, weil er schon ausgeführt sein könnte. Nach
+    einem fehlgeschlagenen Verbindungsaufbau wartet der Pool retry_after
+    Sekunden, bevor er es erneut versucht; Aufrufer fallen so lange sofort
+    auf ihren Ersatzweg zurück.
+    """
+
+    def __init__(self, host, port, password, size=2, timeout=5.0, retry_after=5.0):
+        self.host = host
+        self.port = int(port)
+        self.password = password
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max(1, int(size)))
+        self._idle = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._down_until = 0.0
+
+    def execute_many(self, commands, timeout=None):
+        commands = list(commands)
+        if not commands:
+            return []
+        if not self._slots.acquire(timeout=self.timeout):
+            raise RconUnavailable("Alle RCON-Verbindungen sind belegt.")
+        try:
+            connection = self._checkout()
+            try:
+                responses = connection.execute_many(commands, timeout)
+            except RconUnavailable: # Nichts gesendet, die Verbindung ist weiter brauchbar
+                self._checkin(connection)
+                raise
+            except RconError:
+                connection.close()
+                raise
+            self._checkin(connection)
+            return responses
+        finally:
+            self._slots.release()
+
+    def execute(self, command, timeout=None):
+        return self.execute_many([command], timeout)[0]
+
+    @property
+    def backing_off(self):
+        """True, solange nach einem fehlgeschlagenen Verbindungsaufbau gewartet wird."""
+        return time.monotonic() < self._down_until
+
+    def _checkout(self):
+        with self._lock:
+            if self._closed:
+                raise RconUnavailable("RCON-Pool ist geschlossen.")
+            while self._idle:
+                connection = self._idle.pop()
+                if not connection.is_stale():
+                    return connection
+                connection.close()
+            if self.backing_off:
+                raise RconUnavailable("RCON derzeit nicht erreichbar.")
+        try:
+            return RconConnection(self.host, self.port, self.password, self.timeout).connect()
+        except RconUnavailable:
+            self._down_until = time.monotonic() + self.retry_after
+            raise
+
+    def _checkin(self, connection):
+        with self._lock:
+            if not self._closed and connection.connected:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
@@ -0,0 +1,179 @@
+# mc_panel/utils/slp.py
+import asyncio
+import json
+import struct
+import time
+
+# Protokollversion im Handshake; -1 heißt "egal", der Server antwortet trotzdem mit seiner eigenen
+HANDSHAKE_PROTOCOL_VERSION = -1
+STATE_STATUS = 1
+STATE_LOGIN = 2
+STATE_TRANSFER = 3 # Ab 1.20.5: Weiterleitung von einem anderen Server, verhält sich wie ein Login
+MAX_STATUS_BYTES = 512 * 1024 # Favicons sind groß, aber nicht beliebig groß
+
+
+def _varint(value):
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _packet(packet_id, payload=b''):
+    body = _varint(packet_id) + payload
+    return _varint(len(body)) + body
+
+
+def _string(text):
+    encoded = text.encode('utf-8')
+    return _varint(len(encoded)) + encoded
+
+
+async def _read_varint(reader):
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result
+    raise ValueError("VarInt zu lang")
+
+
+def _decode_varint(data, pos):
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+    raise ValueError("VarInt zu lang")
+
+
+def motd_text(description):
+    """Flacht das MOTD (String oder Chat-Komponente mit 'extra') zu reinem Text ab."""
+    if isinstance(description, str):
+        return description
+    if isinstance(description, dict):
+        return description.get('text', '') + ''.join(motd_text(part) for part in description.get('extra', []))
+    if isinstance(description, list):
+        return ''.join(motd_text(part) for part in description)
+    return ''
+
+
+async def ping_server(host, port, timeout=3.0):
+    """
+    Server List Ping (Minecraft 1.7+): Handshake, Status-Anfrage, Ping/Pong.
+    :return: dict mit 'status_ms' (Verbindung bis Statusantwort), 'latency_ms'
+             (Ping/Pong), 'motd', 'version', 'protocol', 'players_online', 'players_max'
+    """
+    started = time.perf_counter()
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        handshake = (_varint(HANDSHAKE_PROTOCOL_VERSION) + _string(host) + struct.pack('>H', port)
+                     + _varint(STATE_STATUS))
+        writer.write(_packet(0x00, handshake) + _packet(0x00))
+        await writer.drain()
+
+        async def read_status():
+            length = await _read_varint(reader)
+            if length <= 0 or length > MAX_STATUS_BYTES:
+                raise ValueError(f"Ungültige Paketlänge {length}")
+            data = await reader.readexactly(length)
+            packet_id, pos = _decode_varint(data, 0)
+            if packet_id != 0x00:
+                raise ValueError(f"Unerwartetes Paket 0x{packet_id:02x}")
+            json_length, pos = _decode_varint(data, pos)
+            return json.loads(data[pos:pos + json_length].decode('utf-8'))
+
+        status = await asyncio.wait_for(read_status(), timeout)
+        status_ms = (time.perf_counter() - started) * 1000
+
+        ping_started = time.perf_counter()
+        writer.write(_packet(0x01, struct.pack('>q', int(time.time() * 1000))))
+        await writer.drain()
+
+        async def read_pong():
+            length = await _read_varint(reader)
+            await reader.readexactly(length)
+
+        try:
+            await asyncio.wait_for(read_pong(), timeout)
+            latency_ms = (time.perf_counter() - ping_started) * 1000
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            latency_ms = None # Manche Proxies/Plugins beantworten den Ping nicht
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    version = status.get('version') or {}
+    players = status.get('players') or {}
+    return {
+        'status_ms': round(status_ms, 2),
+        'latency_ms': round(latency_ms, 2) if latency_ms is not None else None,
+        'motd': motd_text(status.get('description')),
+        'version': version.get('name'),
+        'protocol': version.get('protocol'),
+        'players_online': players.get('online'),
+        'players_max': players.get('max'),
+    }
+
+
+# --- Serverseite (für den Platzhalter schlafender Server) ---
+
+async def read_packet(reader, max_length=MAX_STATUS_BYTES):
+    """:return: (packet_id, payload) eines unkomprimierten Pakets"""
+    length = await _read_varint(reader)
+    if length <= 0 or length > max_length:
+        raise ValueError(f"Ungültige Paketlänge {length}")
+    data = await reader.readexactly(length)
+    packet_id, pos = _decode_varint(data, 0)
+    return packet_id, data[pos:]
+
+
+def parse_handshake(payload):
+    """
+    :return: dict mit 'protocol', 'host', 'port' und 'next_state' aus dem Handshake-Paket (0x00)
+    :raises ValueError: bei abgeschnittenem oder unsinnigem Paket (z.B. von Portscannern)
+    """
+    try:
+        protocol, pos = _decode_varint(payload, 0)
+        host_length, pos = _decode_varint(payload, pos)
+    except IndexError:
+        raise ValueError("Handshake abgeschnitten")
+    if pos + host_length + 3 > len(payload): # Host, Port (2 Bytes) und mindestens ein Byte next_state
+        raise ValueError("Handshake abgeschnitten")
+    host = payload[pos:pos + host_length].decode('utf-8', 'replace')
+    pos += host_length
+    port = struct.unpack('>H', payload[pos:pos + 2])[0]
+    try:
+        next_state, _ = _decode_varint(payload, pos + 2)
+    except IndexError:
+        raise ValueError("Handshake abgeschnitten")
+    if protocol & 0x80000000: # VarInts sind vorzeichenbehaftet (-1 = "egal")
+        protocol -= 1 << 32
+    return {'protocol': protocol, 'host': host, 'port': port, 'next_state': next_state}
+
+
+def status_packet(status):
+    """Statusantwort (0x00) mit dem JSON-Dokument status."""
+    return _packet(0x00, _string(json.dumps(status)))
+
+
+def pong_packet(payload):
+    """Antwort auf einen Ping (0x01) mit derselben Nutzlast."""
+    return _packet(0x01, payload)
+
+
+def login_disconnect_packet(text):
+    """Trennt im Login-Zustand (0x00) mit einer Meldung, die der Client anzeigt."""
+    return _packet(0x00, _string(json.dumps({'text': text})))
@@ -6,6 +6,12 @@ app = create_app()
 if __name__ == '__main__':
     # Host und Port werden aus der config geladen (app.config['HOST'], app.config['PORT'])
     # Debug wird ebenfalls aus der config geladen (app.config['DEBUG'])
+    debug = app.config.get('DEBUG', True)
+    # Der Reloader führt dieses Modul (und damit create_app) zusätzlich im überwachenden Prozess aus.
+    # Mit eingebetteten Managern gäbe es dann zwei davon: doppelte Übernahme der Aufpasser, doppelte
+    # Sampler, Platzhalter-Ports schlafender Server schon belegt. Nur zustandslose Clients dürfen neu laden.
+    use_reloader = debug and app.config.get('CONTROL_MODE', 'embedded') == 'client'
     app.run(host=app.config.get('HOST', '0.0.0.0'),
             port=app.config.get('PORT', 5000),
-            debug=app.config.get('DEBUG', True))
\ No newline at end of file
+            debug=debug,
+            use_reloader=use_reloader)
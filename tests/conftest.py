@@ -0,0 +1,16 @@
+# tests/conftest.py
+import zlib
+
+import pytest
+
+from region_builder import chunk_record
+
+
+@pytest.fixture
+def sample_chunks():
+    """Drei Chunks unterschiedlicher Größe, einer davon über mehrere Sektoren."""
+    return {
+        0: (chunk_record(zlib.compress(b'chunk-0' * 100)), 1000),
+        33: (chunk_record(zlib.compress(bytes(range(256)) * 40, 0)), 2000), # > 1 Sektor
+        1023: (chunk_record(zlib.compress(b'last chunk')), 3000),
+    }
@@ -0,0 +1,50 @@
+# tests/region_builder.py
+"""Synthetische Region-Dateien (.mca) für die Tests."""
+import struct
+
+from mc_panel.managers.region_file import SECTOR_SIZE, COMPRESSION_ZLIB
+
+
+def chunk_record(payload, compression=COMPRESSION_ZLIB):
+    """Chunk wie in der Region-Datei: 4 Byte Länge, 1 Byte Kompression, Daten."""
+    return struct.pack('>IB', len(payload) + 1, compression) + payload
+
+
+def build_region(path, chunks, gap_sectors=1):
+    """
+    Schreibt eine synthetische Region-Datei. Zwischen den Chunks bleiben gap_sectors
+    tote Sektoren frei, und die Chunks liegen in umgekehrter Index-Reihenfolge,
+    damit Kompaktieren wirklich etwas zu tun hat.
+    :param chunks: {Chunk-Index: (Datensatz inkl. 5-Byte-Header, Zeitstempel)}
+    :return: {Chunk-Index: Datensatz}
+    """
+    locations = bytearray(SECTOR_SIZE)
+    timestamps = bytearray(SECTOR_SIZE)
+    body = bytearray()
+    sector = 2
+    for index in sorted(chunks, reverse=True):
+        record, modified = chunks[index]
+        sector += gap_sectors
+        body += b'\xee' * (gap_sectors * SECTOR_SIZE) # Müll in toten Sektoren
+        sectors = -(-len(record) // SECTOR_SIZE)
+        struct.pack_into('>I', locations, index * 4, (sector << 8) | sectors)
+        struct.pack_into('>I', timestamps, index * 4, modified)
+        body += record + b'\0' * (sectors * SECTOR_SIZE - len(record))
+        sector += sectors
+    with open(path, 'wb') as f:
+        f.write(locations + timestamps + body)
+    return {index: record for index, (record, _) in chunks.items()}
+
+
+def read_chunks(path):
+    """:return: {Chunk-Index: Datensatz} und Zeitstempeltabelle einer Region-Datei"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    chunks = {}
+    for index in range(1024):
+        entry = struct.unpack_from('>I', data, index * 4)[0]
+        if entry:
+            start = (entry >> 8) * SECTOR_SIZE
+            length = struct.unpack_from('>I', data, start)[0]
+            chunks[index] = data[start:start + 4 + length]
+    return chunks, data[SECTOR_SIZE:2 * SECTOR_SIZE]
@@ -0,0 +1,119 @@
+# tests/test_backup_regions.py
+import os
+import shutil
+import zlib
+
+import pytest
+
+from mc_panel.managers.backup_manager import BackupManager
+
+from region_builder import build_region, chunk_record, read_chunks
+
+
+class _Job:
+    def set_message(self, message):
+        pass
+
+
+class _Trash:
+    """Wie TrashReaper.move_to_trash, nur ohne Hintergrund-Löschen."""
+
+    def __init__(self, trash_dir):
+        self.trash_dir = trash_dir
+
+    def move_to_trash(self, path, label):
+        target = os.path.join(self.trash_dir, label)
+        shutil.move(path, target)
+        return True, target
+
+
+@pytest.fixture
+def backups(tmp_path):
+    manager = BackupManager(str(tmp_path / 'backups'), workers=1)
+    yield manager
+    if manager._pool is not None:
+        manager._pool.shutdown()
+
+
+def _world(tmp_path, chunks):
+    instance = tmp_path / 'servers' / 'srv'
+    (instance / 'world' / 'region').mkdir(parents=True)
+    (instance / 'server.properties').write_text('motd=test\n')
+    region = instance / 'world' / 'region' / 'r.0.0.mca'
+    return instance, region, build_region(region, chunks)
+
+
+def test_region_backup_restores_chunks_byte_identical(tmp_path, backups, sample_chunks):
+    instance, region, original = _world(tmp_path, sample_chunks)
+    _, old_timestamps = read_chunks(region)
+
+    ok, _, summary = backups.create_backup(_Job(), 'srv', str(instance))
+    assert ok
+    entry = backups._load_manifest('srv', summary['id'])['files']['world/region/r.0.0.mca']
+    assert entry['kind'] == 'region'
+    assert sorted(entry['chunks']) == ['0', '1023', '33']
+
+    region.write_bytes(b'kaputt')
+    (tmp_path / 'trash').mkdir()
+    ok, message = backups.restore_backup(_Job(), 'srv', summary['id'], str(instance), _Trash(str(tmp_path / 'trash')))
+    assert ok, message
+
+    chunks, timestamps = read_chunks(region)
+    assert chunks == original
+    assert timestamps == old_timestamps
+    assert (instance / 'server.properties').read_text() == 'motd=test\n'
+
+
+def test_unchanged_chunks_are_stored_once(tmp_path, backups, sample_chunks):
+    instance, region, original = _world(tmp_path, sample_chunks)
+    ok, _, first = backups.create_backup(_Job(), 'srv', str(instance))
+    assert ok
+
+    changed = dict(sample_chunks)
+    changed[0] = (chunk_record(zlib.compress(b'neuer Inhalt')), 4000)
+    original = build_region(region, changed)
+    os.utime(region, ns=(1, 1))  # Andere mtime, sonst wird die Datei ungelesen übernommen
+    ok, _, second = backups.create_backup(_Job(), 'srv', str(instance))
+    assert ok
+
+    old_entry = backups._load_manifest('srv', first['id'])['files']['world/region/r.0.0.mca']
+    new_entry = backups._load_manifest('srv', second['id'])['files']['world/region/r.0.0.mca']
+    assert new_entry['chunks']['33'] == old_entry['chunks']['33']
+    assert new_entry['chunks']['1023'] == old_entry['chunks']['1023']
+    assert new_entry['chunks']['0'] != old_entry['chunks']['0']
+    # Nur der geänderte Chunk und die neue Zeitstempeltabelle kosten Platz (je 1 Byte Formatkennung)
+    assert second['new_bytes'] == len(original[0]) + 1 + 4096 + 1
+
+    (tmp_path / 'trash').mkdir()
+    ok, message = backups.restore_backup(_Job(), 'srv', second['id'], str(instance), _Trash(str(tmp_path / 'trash')))
+    assert ok, message
+    assert read_chunks(region)[0] == original
+
+
+def _object_count(manager):
+    return sum(len(files) for _, _, files in os.walk(manager.objects_dir))
+
+
+def test_garbage_collection_keeps_objects_when_a_manifest_is_unreadable(tmp_path, backups, sample_chunks):
+    instance, _, _ = _world(tmp_path, sample_chunks)
+    ok, _, summary = backups.create_backup(_Job(), 'srv', str(instance))
+    assert ok
+    objects = _object_count(backups)
+
+    manifest_path = backups._manifest_path('srv', summary['id'])
+    with open(manifest_path, 'r+') as f:
+        f.truncate(10)
+    ok, message = backups.collect_garbage()
+    assert not ok and 'nichts gelöscht' in message
+    assert _object_count(backups) == objects
+
+    os.remove(manifest_path)
+    (tmp_path / 'backups' / 'snapshots' / 'stray').write_text('')
+    ok, _ = backups.collect_garbage()
+    assert not ok
+    assert _object_count(backups) == objects
+
+    os.remove(tmp_path / 'backups' / 'snapshots' / 'stray')
+    ok, (freed_objects, _) = backups.collect_garbage()
+    assert ok and freed_objects == objects
+    assert _object_count(backups) == 0
@@ -0,0 +1,40 @@
+# tests/test_console_log.py
+import pytest
+
+from mc_panel.managers.console_log import ConsoleLog
+
+# 2023-11-14T22:13:20Z
+BASE_TS = 1700000000.0
+
+
+@pytest.fixture
+def log(tmp_path):
+    console_log = ConsoleLog(str(tmp_path / 'logs'))
+    console_log.append('[Server thread/INFO]: Done (3.2s)!', ts=BASE_TS)
+    console_log.append('player joined the game', ts=BASE_TS + 1)
+    console_log.append('Saved the game in 2023 ms', ts=BASE_TS + 2)
+    yield console_log
+    console_log.close()
+
+
+def _lines(result):
+    return [m['line'] for m in result['matches']]
+
+
+@pytest.mark.parametrize('query, ignore_case', [('2023', False), ('T22:', False), ('Z', False), ('t22:', True)])
+def test_query_ignores_timestamp_prefix(log, query, ignore_case):
+    lines = _lines(log.search(query=query, ignore_case=ignore_case))
+    assert all(query.lower() in line.lower() for line in lines)
+    assert len(lines) == (1 if query == '2023' else 0)
+
+
+def test_regex_anchors_apply_to_line_text(log):
+    assert _lines(log.search(query=r'^\[Server', regex=True)) == ['[Server thread/INFO]: Done (3.2s)!']
+    assert _lines(log.search(query='^player', regex=True)) == ['player joined the game']
+    assert _lines(log.search(query=r'ms$', regex=True)) == ['Saved the game in 2023 ms']
+    assert _lines(log.search(query=r'^\d{4}-', regex=True)) == []
+
+
+def test_search_without_query_returns_range(log):
+    result = log.search(start=BASE_TS + 1, end=BASE_TS + 1)
+    assert _lines(result) == ['player joined the game']
@@ -0,0 +1,62 @@
+# tests/test_jar_store.py
+import hashlib
+import io
+import os
+import zipfile
+
+import pytest
+
+from mc_panel.managers.jar_manager import JarManager
+
+
+class _Upload:
+    """Minimaler Ersatz für werkzeugs FileStorage."""
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.stream = io.BytesIO(data)
+
+
+def _jar(text):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('version.txt', text)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def jars(tmp_path):
+    return JarManager(str(tmp_path / 'jars'))
+
+
+def _stored(manager):
+    return sorted(name[:-4] for name in os.listdir(manager.store_dir) if name.endswith('.jar'))
+
+
+def test_reupload_under_same_name_releases_old_object(jars):
+    old, new = _jar('1.0'), _jar('2.0')
+    assert jars.save_jar(_Upload('server.jar', old))[0]
+    assert jars.save_jar(_Upload('server.jar', new))[0]
+
+    new_sha = hashlib.sha256(new).hexdigest()
+    assert _stored(jars) == [new_sha]
+    assert list(jars._index['objects']) == [new_sha]
+
+
+def test_reupload_keeps_object_used_by_server_or_other_name(jars, tmp_path):
+    old = _jar('1.0')
+    old_sha = hashlib.sha256(old).hexdigest()
+    instance = tmp_path / 'srv'
+    instance.mkdir()
+    assert jars.save_jar(_Upload('server.jar', old))[0]
+    assert jars.save_jar(_Upload('copy.jar', old))[0]
+    assert jars.link_jar('srv', 'server.jar', str(instance / 'server.jar'))[0]
+
+    assert jars.save_jar(_Upload('server.jar', _jar('2.0')))[0]
+    assert old_sha in _stored(jars)
+
+    jars.release_jar('srv')
+    assert old_sha in _stored(jars)  # copy.jar verweist noch darauf
+    assert jars.delete_jar('copy.jar')[0]
+    assert old_sha not in _stored(jars)
+    assert (instance / 'server.jar').read_bytes() == old
@@ -0,0 +1,101 @@
+# tests/test_region_file.py
+import os
+import struct
+
+import pytest
+
+from mc_panel.managers import region_file
+from mc_panel.managers.region_file import EXTERNAL_CHUNK_FLAG, COMPRESSION_ZLIB, REGION_HEADER_SIZE, SECTOR_SIZE, rewrite_region
+
+from region_builder import build_region, chunk_record, read_chunks
+
+
+def test_compact_keeps_chunks_byte_identical(tmp_path, sample_chunks):
+    path = tmp_path / 'r.0.0.mca'
+    original = build_region(path, sample_chunks, gap_sectors=3)
+    _, old_timestamps = read_chunks(path)
+
+    before, after, removed = rewrite_region(str(path))
+
+    chunks, timestamps = read_chunks(path)
+    assert chunks == original
+    assert timestamps == old_timestamps
+    assert removed == 0
+    assert before == os.path.getsize(path) + 3 * 3 * SECTOR_SIZE # Nur die toten Sektoren sind weg
+    assert after == os.path.getsize(path)
+    assert not os.path.exists(str(path) + '.compact.tmp')
+
+
+def test_compact_is_idempotent(tmp_path, sample_chunks):
+    path = tmp_path / 'r.0.0.mca'
+    build_region(path, sample_chunks)
+    rewrite_region(str(path))
+    with open(path, 'rb') as f:
+        first = f.read()
+    rewrite_region(str(path))
+    with open(path, 'rb') as f:
+        assert f.read() == first
+
+
+def test_dropped_chunks_lose_location_and_timestamp(tmp_path, sample_chunks):
+    path = tmp_path / 'r.0.0.mca'
+    original = build_region(path, sample_chunks)
+
+    _, _, removed = rewrite_region(str(path), drop={33})
+
+    chunks, timestamps = read_chunks(path)
+    assert removed == 1
+    assert chunks == {0: original[0], 1023: original[1023]}
+    assert struct.unpack_from('>I', timestamps, 33 * 4)[0] == 0
+    assert struct.unpack_from('>I', timestamps, 1023 * 4)[0] == 3000
+
+
+def test_dropping_every_chunk_removes_the_file(tmp_path, sample_chunks):
+    path = tmp_path / 'r.0.0.mca'
+    build_region(path, sample_chunks)
+    assert rewrite_region(str(path), drop=set(sample_chunks))[1:] == (0, 3)
+    assert not path.exists()
+
+
+def test_dropped_external_chunk_removes_its_mcc(tmp_path, sample_chunks):
+    path = tmp_path / 'r.-1.2.mca'
+    chunks = dict(sample_chunks)
+    chunks[33] = (chunk_record(b'', COMPRESSION_ZLIB | EXTERNAL_CHUNK_FLAG), 2000) # Index 33 = (1, 1) in der Region
+    chunks[34] = (chunk_record(b'', COMPRESSION_ZLIB | EXTERNAL_CHUNK_FLAG), 2000)
+    build_region(path, chunks)
+    dropped_mcc = tmp_path / 'c.-31.65.mcc'
+    kept_mcc = tmp_path / 'c.-30.65.mcc'
+    dropped_mcc.write_bytes(b'external')
+    kept_mcc.write_bytes(b'external')
+
+    rewrite_region(str(path), drop={33})
+
+    assert not dropped_mcc.exists()
+    assert kept_mcc.exists()
+    assert 34 in read_chunks(path)[0]
+
+
+def test_failed_write_leaves_original_and_no_temp_file(tmp_path, sample_chunks, monkeypatch):
+    path = tmp_path / 'r.0.0.mca'
+    build_region(path, sample_chunks)
+    with open(path, 'rb') as f:
+        original = f.read()
+
+    def fail(*args):
+        raise OSError('Platte voll')
+    monkeypatch.setattr(region_file.os, 'replace', fail)
+
+    with pytest.raises(OSError):
+        rewrite_region(str(path), drop={0})
+    assert not os.path.exists(str(path) + '.compact.tmp')
+    with open(path, 'rb') as f:
+        assert f.read() == original
+
+
+def test_broken_header_is_left_alone(tmp_path):
+    path = tmp_path / 'r.0.0.mca'
+    header = bytearray(REGION_HEADER_SIZE)
+    struct.pack_into('>I', header, 0, (50 << 8) | 1) # Zeigt hinter das Dateiende
+    path.write_bytes(bytes(header))
+    assert rewrite_region(str(path)) is None
+    assert path.read_bytes() == bytes(header)